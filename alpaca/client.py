@@ -1,4 +1,13 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 from alpaca_trade_api import REST
+from requests.adapters import HTTPAdapter
+
+from sentiment_analysis.sentiment_records import SentimentRecordBuilder
+
+logger = logging.getLogger(__name__)
 
 
 class AlpacaNewsFetcher:
@@ -11,17 +20,19 @@ class AlpacaNewsFetcher:
     - rest_client (alpaca_trade_api.REST): Alpaca REST API client.
     """
 
-    def __init__(self, api_key, api_secret):
+    def __init__(self, api_key, api_secret, rest_client=None):
         """
         Initializes the AlpacaNewsFetcher object.
 
         Args:
         - api_key (str): Alpaca API key for authentication.
         - api_secret (str): Alpaca API secret for authentication.
+        - rest_client: Optional client with the `get_news` method of alpaca_trade_api.REST, e.g. a
+          local stand-in for tests; a REST client for the credentials by default.
         """
         self.api_key = api_key
         self.api_secret = api_secret
-        self.rest_client = REST(api_key, api_secret)
+        self.rest_client = rest_client if rest_client is not None else REST(api_key, api_secret)
 
     def fetch_news(self, symbol, start_date, end_date):
         """
@@ -39,17 +50,193 @@ class AlpacaNewsFetcher:
         formatted_news = []
 
         for article in news_articles:
-            summary = article.summary
-            title = article.headline
-            timestamp = article.created_at
+            formatted_news.append(self._format_article(article))
 
-            relevant_info = {
-                'timestamp': timestamp,
-                'title': title,
-                'summary': summary
-            }
+        return formatted_news
 
-            formatted_news.append(relevant_info)
+    def stream_news(self, symbol, start_date, end_date, page_size=50, watermark_store=None):
+        """
+        Lazily fetches news articles for a stock symbol, one page at a time, oldest first.
 
-        return formatted_news
+        Articles are yielded as each page arrives, so memory stays bounded by the page size
+        regardless of the date range, or by the number of articles sharing one timestamp when
+        more than a page of them do. When a watermark store is given, fetching resumes after
+        the newest article stored for the symbol and the watermark is advanced after every page.
+
+        Args:
+        - symbol (str): Stock symbol for which news articles are to be fetched (e.g., "AAPL").
+        - start_date (str): Start date of the range in the format "YYYY-MM-DD".
+        - end_date (str): End date of the range in the format "YYYY-MM-DD".
+        - page_size (int): Number of articles requested per API call.
+        - watermark_store (NewsWatermarkStore): Optional per-symbol high-water mark store.
+
+        Yields:
+        - dict: Relevant information of each news article, in the format returned by `fetch_news`.
+        """
+        start = self._to_rfc3339(start_date)
+        seen_ids = set()
+
+        if watermark_store is not None:
+            watermark, watermark_ids = watermark_store.get(symbol)
+            if watermark is not None and pd.Timestamp(watermark) >= pd.Timestamp(start):
+                start, seen_ids = watermark, watermark_ids
+
+        limit = page_size
+        while True:
+            page = self.rest_client.get_news(symbol, start, end_date, limit=limit, sort='asc')
+            new_articles = [article for article in page if article.id not in seen_ids]
+            if not new_articles:
+                if len(page) < limit:
+                    break
+                # A full page of articles all published at `start`: the start time cannot move past
+                # them without losing the rest, so ask for a larger page, which the client fetches
+                # through the API's page tokens
+                limit *= 2
+                continue
+
+            for article in new_articles:
+                yield self._format_article(article)
+
+            last_page = len(page) < limit
+
+            # The next page starts at the newest timestamp seen; articles sharing it are skipped by id
+            newest = self._to_rfc3339(new_articles[-1].created_at)
+            if newest != start:
+                seen_ids = set()
+                limit = page_size
+            seen_ids.update(article.id for article in new_articles
+                            if self._to_rfc3339(article.created_at) == newest)
+            start = newest
+
+            if watermark_store is not None:
+                watermark_store.set(symbol, start, seen_ids)
+
+            if last_page:
+                break
+
+    def fetch_records(self, symbol, start_date, end_date, page_size=50, watermark_store=None):
+        """
+        Fetches news articles for a stock symbol into compact columnar records.
+
+        Articles are streamed page by page and appended to typed buffers as they arrive, so no
+        list of per-article dictionaries is kept. Store the result in a SentimentRecordStore or
+        score it with the `score_records` method of a sentiment backend.
+
+        Args:
+        - symbol (str): Stock symbol for which news articles are to be fetched (e.g., "AAPL").
+        - start_date (str): Start date of the range in the format "YYYY-MM-DD".
+        - end_date (str): End date of the range in the format "YYYY-MM-DD".
+        - page_size (int): Number of articles requested per API call.
+        - watermark_store (NewsWatermarkStore): Optional per-symbol high-water mark store.
+
+        Returns:
+        - SentimentRecords: The unscored articles, oldest first.
+        """
+        builder = SentimentRecordBuilder()
+        for article in self.stream_news(symbol, start_date, end_date, page_size=page_size,
+                                        watermark_store=watermark_store):
+            builder.append_article(symbol, article)
+        return builder.build()
+
+    def fetch_news_many(self, symbols, start_date, end_date, max_workers=8, page_size=50):
+        """
+        Fetches news articles for many stock symbols concurrently.
+
+        Symbols are fetched by a thread pool sharing the REST client's HTTP session, whose
+        connection pool is sized to the number of workers so connections are reused across
+        requests. An article mentioning several of the symbols is returned as the same dictionary
+        in each of their lists; use `unique_articles` to get every article exactly once for scoring.
+
+        Args:
+        - symbols (list): Stock symbols for which news articles are to be fetched (e.g., ["AAPL", "MSFT"]).
+        - start_date (str): Start date of the range in the format "YYYY-MM-DD".
+        - end_date (str): End date of the range in the format "YYYY-MM-DD".
+        - max_workers (int): Number of symbols fetched concurrently.
+        - page_size (int): Number of articles requested per API call.
+
+        Returns:
+        - dict: Mapping of each symbol to the list of its news articles, oldest first.
+        """
+        self._size_connection_pool(max_workers)
+
+        def fetch(symbol):
+            return list(self.stream_news(symbol, start_date, end_date, page_size=page_size))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(symbols, executor.map(fetch, symbols)))
+
+        articles_by_id = {}
+        return {
+            symbol: [articles_by_id.setdefault(article['id'], article) for article in articles]
+            for symbol, articles in results.items()
+        }
+
+    @staticmethod
+    def unique_articles(news_by_symbol):
+        """
+        Returns every article of a `fetch_news_many` result exactly once.
+
+        Args:
+        - news_by_symbol (dict): Mapping of symbols to lists of news articles.
+
+        Returns:
+        - list: De-duplicated news articles, in first-seen order.
+        """
+        articles_by_id = {}
+        for articles in news_by_symbol.values():
+            for article in articles:
+                articles_by_id.setdefault(article['id'], article)
+        return list(articles_by_id.values())
+
+    def _size_connection_pool(self, pool_size):
+        """
+        Sizes the connection pool of the REST client's HTTP session for concurrent use.
+
+        Args:
+        - pool_size (int): Maximum number of connections kept open per host.
+        """
+        # alpaca_trade_api 3.x keeps its requests.Session in the private REST._session attribute
+        session = getattr(self.rest_client, '_session', None)
+        if session is None:
+            logger.warning("%s has no _session attribute, the HTTP connection pool keeps its default size and "
+                           "concurrent requests may wait for a connection", type(self.rest_client).__name__)
+            return
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    @staticmethod
+    def _format_article(article):
+        """
+        Extracts the relevant information of a news article.
+
+        Args:
+        - article (alpaca_trade_api.entity_v2.NewsV2): News article returned by the API.
+
+        Returns:
+        - dict: The article's id, timestamp, title, summary and mentioned symbols.
+        """
+        return {
+            'id': article.id,
+            'timestamp': article.created_at,
+            'title': article.headline,
+            'summary': article.summary,
+            'symbols': list(article.symbols)
+        }
+
+    @staticmethod
+    def _to_rfc3339(timestamp):
+        """
+        Formats a date or timestamp as the UTC RFC 3339 string expected by the API.
+
+        Args:
+        - timestamp (str or datetime): Date or timestamp; naive values are taken as UTC.
+
+        Returns:
+        - str: Timestamp in the format "YYYY-MM-DDTHH:MM:SSZ".
+        """
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize('UTC')
+        return timestamp.tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
 
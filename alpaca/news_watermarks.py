@@ -0,0 +1,63 @@
+import json
+import os
+
+
+class NewsWatermarkStore:
+    """
+    A small JSON file recording, per symbol, the newest news timestamp already fetched.
+
+    Along with the timestamp the store keeps the ids of the articles published at exactly that
+    time, so a run resuming from the watermark can skip them instead of yielding them twice.
+
+    Attributes:
+    - path (str): Path of the JSON file holding the watermarks.
+    """
+
+    def __init__(self, path='data/news_watermarks.json'):
+        """
+        Initializes the NewsWatermarkStore object, loading existing watermarks if present.
+
+        Args:
+        - path (str): Path of the JSON file holding the watermarks.
+        """
+        self.path = path
+        self._watermarks = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                self._watermarks = json.load(file)
+
+    def get(self, symbol):
+        """
+        Returns the watermark of a symbol.
+
+        Args:
+        - symbol (str): Stock symbol (e.g., "AAPL").
+
+        Returns:
+        - tuple: (timestamp (str), ids (set)) of the newest fetched articles, or (None, empty set).
+        """
+        watermark = self._watermarks.get(symbol)
+        if watermark is None:
+            return None, set()
+        return watermark['timestamp'], set(watermark['ids'])
+
+    def set(self, symbol, timestamp, ids):
+        """
+        Records and persists the watermark of a symbol.
+
+        Args:
+        - symbol (str): Stock symbol (e.g., "AAPL").
+        - timestamp (str): RFC 3339 timestamp of the newest fetched articles.
+        - ids (iterable): Ids of the fetched articles published at `timestamp`.
+        """
+        self._watermarks[symbol] = {'timestamp': timestamp, 'ids': sorted(ids)}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so an interrupted run never leaves a truncated file
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self._watermarks, file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
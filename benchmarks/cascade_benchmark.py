@@ -0,0 +1,233 @@
+"""
+Benchmarks the cheap-first cascade against scoring every headline with the LLM.
+
+The headlines of the sample corpus are first scored by the LLM alone, whose labels are the
+reference. The cascade, a NewsSentimentAnalysis classifier escalating low-confidence headlines
+to the same LLM, is then run once per confidence threshold. Escalation backends:
+
+    corpus                        replays the LLM labels stored in the corpus, at no cost (default)
+    llm[:transformers|llama.cpp]  SentimentAnalysisWithLLM.classify_many, needs --llm-model / --gguf
+    openai                        AsyncOpenAISentimentAnalysis against a local stub server
+
+For every threshold the benchmark reports the escalation rate, the LLM calls relative to the
+LLM-only run, headlines/sec and the accuracy of the cascade against the LLM-only labels.
+Threshold 0 is the classifier alone.
+
+Replaying the corpus labels costs nothing, so with `corpus` the throughput and speedup would
+compare the cascade against a free baseline; they are reported as None and that backend only
+measures the escalation rate, cost and accuracy. The stub server derives its labels from a hash
+of the prompt, so with `openai` the accuracy would measure agreement with random labels; it is
+reported as None and that backend only measures throughput and cost under API latency.
+
+The default classifier, fine-tuned on SST-2, only answers Positive or Negative, while about
+45% of the corpus labels are Neutral: those headlines only match the reference when escalated.
+Pass a three-class model, e.g. --classifier-model ProsusAI/finbert, for a realistic cascade.
+
+Usage:
+    python -m benchmarks.cascade_benchmark --thresholds 0 0.9 0.95 0.99 --output bench/cascade.json
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.openai_stub_server import StubOpenAIServer
+from benchmarks.sentiment_benchmark import environment
+from sentiment_analysis.cascade_sentiment import CascadeSentimentAnalysis
+from sentiment_analysis.labels import normalize_label
+from sentiment_analysis.sentiment_analysis_pipeline import DEFAULT_MODEL
+
+DEFAULT_THRESHOLDS = (0.0, 0.8, 0.9, 0.95, 0.99)
+
+
+def load_labelled_corpus(path, limit=None):
+    """
+    Loads the corpus headlines with the LLM labels stored next to them.
+
+    Args:
+        path (str): CSV file with 'title' and 'sentiment' columns.
+        limit (int): Only use the first LIMIT headlines.
+
+    Returns:
+        tuple: (headlines, labels) lists; labels are canonical or None.
+    """
+    corpus = pd.read_csv(path, usecols=['title', 'sentiment'])
+    if limit:
+        corpus = corpus.head(limit)
+    return corpus['title'].astype(str).tolist(), [normalize_label(label) for label in corpus['sentiment']]
+
+
+class CorpusLabels:
+    """
+    Replays the corpus labels as the LLM answers, row by row.
+
+    The corpus labels repeated headlines differently, so a call answers the k-th occurrence of a
+    headline with the label of its k-th row. The classifier scores copies of a headline alike,
+    so the cascade escalates all of them or none, in row order.
+    """
+
+    def __init__(self, headlines, labels):
+        self.labels_by_headline = {}
+        for headline, label in zip(headlines, labels):
+            self.labels_by_headline.setdefault(headline, []).append(label)
+
+    def __call__(self, texts):
+        occurrences = {}
+        answers = []
+        for text in texts:
+            labels = self.labels_by_headline[text]
+            occurrence = occurrences[text] = occurrences.get(text, -1) + 1
+            answers.append(labels[min(occurrence, len(labels) - 1)])
+        return answers
+
+
+def _build_escalation(spec, args, headlines, corpus_labels):
+    """
+    Builds the LLM backend and returns a callable scoring a list of headlines.
+    """
+    kind, _, variant = spec.partition(':')
+
+    if kind == 'corpus':
+        return CorpusLabels(headlines, corpus_labels)
+
+    if kind == 'openai':
+        from llms.async_openai_llm import AsyncOpenAISentimentAnalysis
+
+        analyzer = AsyncOpenAISentimentAnalysis('stub-key', base_url=args.base_url, max_concurrency=args.concurrency)
+        return analyzer.analyze_many_sync
+
+    if kind == 'llm':
+        from llms.llama_llm import SentimentAnalysisWithLLM
+
+        backend = variant or 'transformers'
+        model = args.gguf if backend == 'llama.cpp' else args.llm_model
+        if not model:
+            raise SystemExit("{} needs {}".format(spec, '--gguf' if backend == 'llama.cpp' else '--llm-model'))
+        analyzer = SentimentAnalysisWithLLM(model, args.token, max_length=args.max_length, device='cpu',
+                                            backend=backend, mode='classify')
+        return lambda texts: analyzer.classify_many(texts, batch_size=args.llm_batch_size)
+
+    raise SystemExit("Unknown escalation backend {}".format(spec))
+
+
+def accuracy(labels, reference):
+    """
+    Returns:
+        float: Fraction of the texts with a reference label whose label matches it.
+    """
+    pairs = [(label, expected) for label, expected in zip(labels, reference) if expected is not None]
+    return sum(label == expected for label, expected in pairs) / len(pairs) if pairs else None
+
+
+def run(args):
+    """
+    Runs the LLM alone, then the cascade at every threshold.
+
+    Returns:
+        list: One result per run, the LLM-only run first.
+    """
+    from sentiment_analysis.sentiment_analysis_pipeline import NewsSentimentAnalysis
+
+    headlines, corpus_labels = load_labelled_corpus(args.corpus, args.limit)
+    escalate = _build_escalation(args.escalate, args, headlines, corpus_labels)
+    kind = args.escalate.partition(':')[0]
+    # The stub server's labels are random, so agreement with them says nothing about accuracy
+    stub_labels = kind == 'openai'
+    # Replayed labels take no time, so there is no LLM throughput to compare with
+    free_labels = kind == 'corpus'
+    classifier = NewsSentimentAnalysis(model=args.classifier_model, backend=args.classifier_backend)
+
+    # Load both models before timing anything
+    classifier.classify_texts(headlines[:1])
+    escalate(headlines[:1])
+
+    started_at = time.perf_counter()
+    reference = [CascadeSentimentAnalysis.label_of(answer)[0] for answer in escalate(headlines)]
+    llm_seconds = time.perf_counter() - started_at
+    results = [{
+        'run': 'llm-only',
+        'threshold': None,
+        'headlines': len(headlines),
+        'escalation_rate': 1.0,
+        'llm_calls': len(headlines),
+        'relative_cost': 1.0,
+        'headlines_per_second': None if free_labels else len(headlines) / llm_seconds,
+        'speedup': None if free_labels else 1.0,
+        'accuracy': None if stub_labels else 1.0,
+    }]
+
+    for threshold in args.thresholds:
+        cascade = CascadeSentimentAnalysis(classifier, escalate, threshold=threshold, batch_size=args.batch_size)
+        started_at = time.perf_counter()
+        labels = cascade.classify_texts(headlines)['label']
+        seconds = time.perf_counter() - started_at
+        results.append({
+            'run': 'cascade',
+            'threshold': threshold,
+            'headlines': len(headlines),
+            'escalation_rate': cascade.escalation_rate,
+            'llm_calls': cascade.escalated,
+            'relative_cost': cascade.escalated / len(headlines),
+            'headlines_per_second': None if free_labels else len(headlines) / seconds,
+            'speedup': None if free_labels else llm_seconds / seconds,
+            'accuracy': None if stub_labels else accuracy(labels, reference),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalate', default='corpus', help='LLM backend the cascade escalates to.')
+    parser.add_argument('--thresholds', nargs='+', type=float, default=list(DEFAULT_THRESHOLDS),
+                        help='Classifier confidence thresholds of the cascade.')
+    parser.add_argument('--classifier-model', default=DEFAULT_MODEL, help='Hugging Face model of the classifier.')
+    parser.add_argument('--classifier-backend', default='pytorch', help='Inference backend of the classifier.')
+    parser.add_argument('--corpus', default='data/stock_sentiment_data.csv',
+                        help='CSV file with title and sentiment columns.')
+    parser.add_argument('--limit', type=int, help='Only use the first LIMIT headlines.')
+    parser.add_argument('--batch-size', type=int, default=32, help='Classifier batch size.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight of openai.')
+    parser.add_argument('--stub-latency', type=float, default=0.2, help='Response delay of the stub server.')
+    parser.add_argument('--llm-model', help='Hugging Face model of the llm:transformers backend.')
+    parser.add_argument('--gguf', help='GGUF weights of the llm:llama.cpp backend.')
+    parser.add_argument('--token', default='', help='Hugging Face token of the llm:transformers backend.')
+    parser.add_argument('--max-length', type=int, default=256, help='Maximum generated length of the LLM.')
+    parser.add_argument('--llm-batch-size', type=int, default=8, help='Prompts per forward pass of the LLM.')
+    parser.add_argument('--output', help='JSON file the results are written to.')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results.')
+    args = parser.parse_args()
+
+    with StubOpenAIServer(latency=args.stub_latency) as stub:
+        args.base_url = stub.url
+        results = run(args)
+
+    report = {'environment': environment(), 'escalate': args.escalate, 'stub_latency': args.stub_latency,
+              'results': results}
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("{:<10} {:>9} {:>11} {:>9} {:>9} {:>12} {:>8} {:>9}".format(
+        "Run", "Threshold", "Escalated", "LLM calls", "Cost", "Headlines/s", "Speedup", "Accuracy"))
+    for result in results:
+        print("{:<10} {:>9} {:>11.1%} {:>9} {:>9.2f} {:>12} {:>8} {:>9}".format(
+            result['run'], _format(result['threshold'], '{:.2f}'), result['escalation_rate'], result['llm_calls'],
+            result['relative_cost'], _format(result['headlines_per_second'], '{:.1f}'),
+            _format(result['speedup'], '{:.1f}'), _format(result['accuracy'], '{:.1%}')))
+
+
+def _format(value, template):
+    return '-' if value is None else template.format(value)
+
+
+if __name__ == '__main__':
+    main()
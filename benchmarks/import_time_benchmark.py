@@ -0,0 +1,88 @@
+"""
+Measures how long importing the sentiment modules takes in a fresh interpreter.
+
+Model-backed modules are expected to defer their heavy imports (transformers, torch,
+langchain, openai) until a model is first used, so importing them must stay within a
+small, fixed budget. The script exits with a non-zero status when a module exceeds it.
+
+Usage:
+    python -m benchmarks.import_time_benchmark --budget 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = (
+    'llms.llama_llm',
+    'llms.openai_llm',
+    'llms.model_registry',
+    'sentiment_analysis.sentiment_analysis_pipeline',
+)
+
+HEAVY_MODULES = ('torch', 'transformers', 'langchain', 'openai')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{'seconds': elapsed, 'heavy_modules': heavy}}))
+"""
+
+
+def measure_import(module, repeats=5):
+    """
+    Imports a module in fresh interpreters and reports the median import time.
+
+    Args:
+        module (str): Dotted module name to import.
+        repeats (int): Number of fresh interpreters to measure.
+
+    Returns:
+        dict: Median import time in seconds and heavy modules pulled in by the import.
+    """
+    samples = []
+    heavy_modules = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+        heavy_modules = result['heavy_modules']
+    return {'module': module, 'seconds': statistics.median(samples), 'heavy_modules': heavy_modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=0.5, help='Maximum import time per module in seconds.')
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters measured per module.')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results.')
+    args = parser.parse_args()
+
+    results = [measure_import(module, args.repeats) for module in MODULES]
+    failures = [result for result in results if result['seconds'] > args.budget or result['heavy_modules']]
+
+    if args.json:
+        print(json.dumps({'budget': args.budget, 'results': results}, indent=2))
+    else:
+        print("{:<50} {:>10}  {}".format("Module", "Import (s)", "Heavy modules"))
+        for result in results:
+            print("{:<50} {:>10.4f}  {}".format(result['module'], result['seconds'],
+                                               ', '.join(result['heavy_modules']) or '-'))
+
+    if failures:
+        print("Over budget ({:.2f}s) or eagerly importing heavy modules: {}".format(
+            args.budget, ', '.join(result['module'] for result in failures)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
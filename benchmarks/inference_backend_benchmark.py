@@ -0,0 +1,171 @@
+"""
+Compares the inference backends of the sentiment models on CPU.
+
+Each backend runs in a fresh interpreter so that its peak RSS is measured in isolation. The
+headlines of the sample corpus are scored one at a time to measure latency, then (for the
+classifier) in batches to measure throughput. Model loading is reported separately.
+
+Backends:
+    classifier:pytorch, classifier:int8, classifier:onnx  NewsSentimentAnalysis
+    llm:transformers, llm:llama.cpp                        SentimentAnalysisWithLLM, needs --llm-model / --gguf
+
+Usage:
+    python -m benchmarks.inference_backend_benchmark --headlines 512 --json
+    python -m benchmarks.inference_backend_benchmark --backends llm:llama.cpp --gguf models/llama-2-7b.Q4_K_M.gguf
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+DEFAULT_BACKENDS = ('classifier:pytorch', 'classifier:int8', 'classifier:onnx')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_headlines(path, count):
+    """
+    Reads the first `count` headlines of a corpus, repeating them if the corpus is smaller.
+
+    Args:
+        path (str): CSV file with a 'title' column.
+        count (int): Number of headlines.
+
+    Returns:
+        list: Headlines.
+    """
+    titles = pd.read_csv(path, usecols=['title'])['title'].astype(str).tolist()
+    return (titles * (count // len(titles) + 1))[:count]
+
+
+def percentile(samples, q):
+    """
+    Returns:
+        float: Nearest-rank percentile `q` (0-100) of the samples.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))]
+
+
+def _build_analyzer(spec, args):
+    kind, backend = spec.split(':', 1)
+    if kind == 'classifier':
+        from sentiment_analysis.sentiment_analysis_pipeline import NewsSentimentAnalysis
+
+        return NewsSentimentAnalysis(backend=backend)
+
+    from llms.llama_llm import SentimentAnalysisWithLLM
+
+    model = args.gguf if backend == 'llama.cpp' else args.llm_model
+    if not model:
+        raise SystemExit("{} needs {}".format(spec, '--gguf' if backend == 'llama.cpp' else '--llm-model'))
+    return SentimentAnalysisWithLLM(model, args.token, max_length=args.max_length, device='cpu', backend=backend,
+                                    n_threads=args.threads)
+
+
+def run_backend(spec, args):
+    """
+    Benchmarks one backend in the current process.
+
+    Returns:
+        dict: Load time, latency percentiles, throughput and peak RSS of the backend.
+    """
+    kind = spec.split(':', 1)[0]
+    headlines = load_headlines(args.corpus, args.headlines)
+
+    def score_one(text):
+        if kind == 'classifier':
+            return analyzer.analyze_sentiment({'summary': '', 'headline': text, 'created_at': None})
+        return analyzer.analyze_sentiment(text)
+
+    started_at = time.perf_counter()
+    analyzer = _build_analyzer(spec, args)
+    score_one(headlines[0])
+    load_seconds = time.perf_counter() - started_at
+
+    latencies = []
+    for text in headlines[:args.latency_samples]:
+        call_started_at = time.perf_counter()
+        score_one(text)
+        latencies.append(time.perf_counter() - call_started_at)
+
+    if kind == 'classifier':
+        articles = [{'summary': '', 'headline': text, 'created_at': None} for text in headlines]
+        batch_started_at = time.perf_counter()
+        analyzer.analyze_batch(articles, batch_size=args.batch_size)
+        throughput = len(articles) / (time.perf_counter() - batch_started_at)
+    else:
+        throughput = len(latencies) / sum(latencies)
+
+    return {
+        'backend': spec,
+        'load_seconds': load_seconds,
+        'p50_ms': 1000.0 * statistics.median(latencies),
+        'p99_ms': 1000.0 * percentile(latencies, 99),
+        'headlines_per_second': throughput,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def measure_backend(spec, argv):
+    """
+    Benchmarks one backend in a fresh interpreter.
+
+    Returns:
+        dict: Result of `run_backend`, or the backend and error message if it failed.
+    """
+    completed = subprocess.run([sys.executable, '-m', 'benchmarks.inference_backend_benchmark', '--worker', spec]
+                               + argv, cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'backend': spec, 'error': (completed.stderr.strip().splitlines() or ['failed'])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=list(DEFAULT_BACKENDS), help='Backends to compare.')
+    parser.add_argument('--corpus', default='data/stock_sentiment_data.csv', help='CSV file with a title column.')
+    parser.add_argument('--headlines', type=int, default=512, help='Headlines scored for the throughput.')
+    parser.add_argument('--latency-samples', type=int, default=100, help='Headlines scored one at a time.')
+    parser.add_argument('--batch-size', type=int, default=32, help='Classifier batch size.')
+    parser.add_argument('--llm-model', help='Hugging Face model of the llm:transformers backend.')
+    parser.add_argument('--gguf', help='GGUF weights of the llm:llama.cpp backend.')
+    parser.add_argument('--token', default='', help='Hugging Face token of the llm:transformers backend.')
+    parser.add_argument('--max-length', type=int, default=256, help='Maximum generated length of the LLM.')
+    parser.add_argument('--threads', type=int, help='CPU threads of the llama.cpp backend.')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results.')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args)))
+        return
+
+    # Forward every option but the backend list to the workers
+    argv = [arg for arg in sys.argv[1:] if arg not in args.backends and arg not in ('--backends', '--json')]
+    results = [measure_backend(spec, argv) for spec in args.backends]
+
+    if args.json:
+        print(json.dumps({'headlines': args.headlines, 'results': results}, indent=2))
+        return
+
+    print("{:<22} {:>9} {:>9} {:>9} {:>12} {:>10}".format("Backend", "Load (s)", "p50 ms", "p99 ms",
+                                                         "Headlines/s", "RSS (MB)"))
+    for result in results:
+        if 'error' in result:
+            print("{:<22} error: {}".format(result['backend'], result['error']))
+            continue
+        print("{:<22} {:>9.2f} {:>9.2f} {:>9.2f} {:>12.1f} {:>10.0f}".format(
+            result['backend'], result['load_seconds'], result['p50_ms'], result['p99_ms'],
+            result['headlines_per_second'], result['peak_rss_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+A local stand-in for the OpenAI completions endpoint, used to benchmark the OpenAI backends
+without network access, cost or rate limits.
+
+Answers are deterministic: the label of a text is derived from its hash. Single-text prompts
+get a label, packed prompts one "<number>: <label>" line per numbered headline, and requests
+asking for logprobs get the top logprobs of the label tokens. Every response is delayed by a
+configurable latency to model the API round trip.
+
+Usage:
+    python -m benchmarks.openai_stub_server --port 8001 --latency 0.2
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sentiment_analysis.labels import LABELS
+
+_PACKED_ITEM_PATTERN = re.compile(r'^(\d+)\. (.*)$', re.MULTILINE)
+
+
+def stub_label(text):
+    """
+    Returns:
+        str: Deterministic label of a text.
+    """
+    return LABELS[int(hashlib.sha256(text.encode('utf-8')).hexdigest(), 16) % len(LABELS)]
+
+
+def stub_completion(prompt, logprobs=None):
+    """
+    Builds the completion choice answering a prompt.
+
+    Args:
+        prompt (str): Prompt of the request.
+        logprobs (int): Number of top logprobs requested, or None.
+
+    Returns:
+        dict: Completion choice in the format of the OpenAI API.
+    """
+    items = _PACKED_ITEM_PATTERN.findall(prompt)
+    if 'Sentiments:' in prompt and items:
+        text = '\n'.join('{}: {}'.format(number, stub_label(item)) for number, item in items)
+        return {'text': text, 'index': 0, 'logprobs': None, 'finish_reason': 'stop'}
+
+    label = stub_label(prompt)
+    choice = {'text': ' ' + label, 'index': 0, 'logprobs': None, 'finish_reason': 'stop'}
+    if logprobs:
+        top_logprobs = {' ' + other: (-0.05 if other == label else -3.5) for other in LABELS}
+        choice['logprobs'] = {'tokens': [' ' + label], 'token_logprobs': [top_logprobs[' ' + label]],
+                              'top_logprobs': [top_logprobs], 'text_offset': [0]}
+    return choice
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.rstrip('/').endswith('/completions'):
+            self._send(404, {'error': {'message': 'Unknown endpoint {}'.format(self.path)}})
+            return
+
+        server = self.server
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        with server.lock:
+            rate_limited = server.rejected < server.rate_limited_requests
+            if rate_limited:
+                server.rejected += 1
+        if rate_limited:
+            self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                       headers={'retry-after': '0'})
+            return
+
+        prompts = body.get('prompt', '')
+        prompts = prompts if isinstance(prompts, list) else [prompts]
+        choices = []
+        for index, prompt in enumerate(prompts):
+            choice = stub_completion(prompt, body.get('logprobs'))
+            choice['index'] = index
+            choices.append(choice)
+
+        with server.lock:
+            server.requests += 1
+        self._send(200, {
+            'id': 'cmpl-stub-{}'.format(server.requests),
+            'object': 'text_completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': choices,
+            'usage': {'prompt_tokens': sum(len(prompt) // 4 for prompt in prompts), 'completion_tokens': 1,
+                      'total_tokens': sum(len(prompt) // 4 for prompt in prompts) + 1},
+        })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubOpenAIServer:
+    """
+    Runs the stub completions endpoint in a background thread.
+
+    Attributes:
+        url (str): Base URL to pass to the OpenAI clients, e.g. "http://127.0.0.1:8001/v1".
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.0, rate_limited_requests=0):
+        """
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 for any free port.
+            latency (float): Delay in seconds added to every response.
+            jitter (float): Maximum random deviation in seconds from the latency.
+            rate_limited_requests (int): Number of first requests answered with a 429 and "retry-after: 0".
+        """
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.jitter = jitter
+        self._server.requests = 0
+        self._server.rejected = 0
+        self._server.rate_limited_requests = rate_limited_requests
+        self._server.lock = threading.Lock()
+        self._thread = None
+        self.url = 'http://{}:{}/v1'.format(host, self._server.server_address[1])
+
+    @property
+    def requests(self):
+        """Number of completion requests served."""
+        return self._server.requests
+
+    @property
+    def rejected(self):
+        """Number of requests answered with a 429."""
+        return self._server.rejected
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on.')
+    parser.add_argument('--port', type=int, default=8001, help='Port to listen on.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Delay in seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random deviation from the latency.')
+    args = parser.parse_args()
+
+    server = StubOpenAIServer(args.host, args.port, args.latency, args.jitter)
+    print("Serving OpenAI stub at {}".format(server.url))
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+Benchmarks the sentiment scoring stage across the three backends.
+
+The headlines of the sample corpus, or synthetic variants scaled up from it, are replayed through
+each backend in a fresh interpreter:
+
+    classifier[:pytorch|int8|onnx]      NewsSentimentAnalysis, batched with analyze_batch
+    openai[:generate|classify|packed]   OpenAISentimentAnalysis against a local stub server
+    openai-async                        AsyncOpenAISentimentAnalysis against the stub server
+    llm[:transformers|llama.cpp]        SentimentAnalysisWithLLM, needs --llm-model / --gguf
+
+For every backend and scale the suite reports cold start (construction, lazy imports and model
+load up to the first result), p50/p99 single-headline latency, headlines/sec over the corpus
+and peak RSS. With --output the results are written as JSON with the commit and environment,
+and with --baseline a previous output is compared against, exiting with a non-zero status on
+throughput or p99 regressions beyond --tolerance.
+
+Usage:
+    python -m benchmarks.sentiment_benchmark --backends classifier openai openai-async --scales 1 4 \\
+        --output bench/sentiment.json --baseline bench/sentiment-previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.inference_backend_benchmark import percentile
+from benchmarks.openai_stub_server import StubOpenAIServer
+
+DEFAULT_BACKENDS = ('classifier', 'openai', 'openai-async')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TICKER_PATTERN = re.compile(r'\b[A-Z]{2,5}\b')
+_NUMBER_PATTERN = re.compile(r'\d+(\.\d+)?')
+
+
+def load_corpus(path, scale=1, seed=0):
+    """
+    Loads the corpus headlines, scaled up with synthetic variants.
+
+    The first copy is the corpus itself. Every further copy rewrites each headline's tickers and
+    numbers at random, so the scaled corpus keeps the length and vocabulary of real headlines
+    while staying distinct text for caches and deduplication.
+
+    Args:
+        path (str): CSV file with a 'title' column.
+        scale (int): Number of copies of the corpus.
+        seed (int): Random seed of the variants.
+
+    Returns:
+        list: Headlines.
+    """
+    titles = pd.read_csv(path, usecols=['title'])['title'].astype(str).tolist()
+    tickers = sorted({ticker for title in titles for ticker in _TICKER_PATTERN.findall(title)}) or ['AAPL']
+    rng = random.Random(seed)
+
+    headlines = list(titles)
+    for _ in range(scale - 1):
+        for title in titles:
+            title = _TICKER_PATTERN.sub(lambda match: rng.choice(tickers), title)
+            headlines.append(_NUMBER_PATTERN.sub(lambda match: str(rng.randint(1, 999)), title))
+    return headlines
+
+
+def _build_scorer(spec, args):
+    """
+    Builds the backend and returns (score_one, score_all) callables over headlines.
+    """
+    kind, _, variant = spec.partition(':')
+
+    if kind == 'classifier':
+        from sentiment_analysis.sentiment_analysis_pipeline import NewsSentimentAnalysis
+
+        analyzer = NewsSentimentAnalysis(backend=variant or 'pytorch')
+
+        def articles(texts):
+            return [{'summary': '', 'headline': text, 'created_at': None} for text in texts]
+
+        return (lambda text: analyzer.analyze_sentiment(articles([text])[0]),
+                lambda texts: analyzer.analyze_batch(articles(texts), batch_size=args.batch_size))
+
+    if kind == 'openai':
+        from llms.openai_llm import OpenAISentimentAnalysis
+
+        mode = 'classify' if variant == 'classify' else 'generate'
+        analyzer = OpenAISentimentAnalysis('stub-key', mode=mode, base_url=args.base_url)
+        if variant == 'packed':
+            return (analyzer.analyze_sentiment,
+                    lambda texts: analyzer.analyze_sentiment_packed(texts, pack_size=args.pack_size))
+        return analyzer.analyze_sentiment, lambda texts: [analyzer.analyze_sentiment(text) for text in texts]
+
+    if kind == 'openai-async':
+        from llms.async_openai_llm import AsyncOpenAISentimentAnalysis
+
+        analyzer = AsyncOpenAISentimentAnalysis('stub-key', base_url=args.base_url,
+                                                max_concurrency=args.concurrency)
+        return lambda text: analyzer.analyze_many_sync([text]), analyzer.analyze_many_sync
+
+    if kind == 'llm':
+        from llms.llama_llm import SentimentAnalysisWithLLM
+
+        backend = variant or 'transformers'
+        model = args.gguf if backend == 'llama.cpp' else args.llm_model
+        if not model:
+            raise SystemExit("{} needs {}".format(spec, '--gguf' if backend == 'llama.cpp' else '--llm-model'))
+        analyzer = SentimentAnalysisWithLLM(model, args.token, max_length=args.max_length, device='cpu',
+                                            backend=backend, mode='classify')
+        return analyzer.analyze_sentiment, analyzer.classify_many
+
+    raise SystemExit("Unknown backend {}".format(spec))
+
+
+def run_case(spec, scale, args):
+    """
+    Benchmarks one backend on one corpus scale in the current process.
+
+    Returns:
+        dict: Cold start, latency percentiles, throughput and peak RSS.
+    """
+    headlines = load_corpus(args.corpus, scale, args.seed)
+    if args.limit:
+        headlines = headlines[:args.limit * scale]
+
+    started_at = time.perf_counter()
+    score_one, score_all = _build_scorer(spec, args)
+    score_one(headlines[0])
+    cold_start_seconds = time.perf_counter() - started_at
+
+    latencies = []
+    for text in headlines[1:args.latency_samples + 1]:
+        call_started_at = time.perf_counter()
+        score_one(text)
+        latencies.append(time.perf_counter() - call_started_at)
+
+    throughput_started_at = time.perf_counter()
+    score_all(headlines)
+    elapsed = time.perf_counter() - throughput_started_at
+
+    return {
+        'backend': spec,
+        'scale': scale,
+        'headlines': len(headlines),
+        'cold_start_seconds': cold_start_seconds,
+        'p50_ms': 1000.0 * statistics.median(latencies) if latencies else None,
+        'p99_ms': 1000.0 * percentile(latencies, 99) if latencies else None,
+        'headlines_per_second': len(headlines) / elapsed,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def measure_case(spec, scale, argv):
+    """
+    Benchmarks one backend on one corpus scale in a fresh interpreter.
+
+    Returns:
+        dict: Result of `run_case`, or the backend, scale and error message if it failed.
+    """
+    completed = subprocess.run([sys.executable, '-m', 'benchmarks.sentiment_benchmark', '--worker', spec,
+                                '--worker-scale', str(scale)] + argv,
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'backend': spec, 'scale': scale,
+                'error': (completed.stderr.strip().splitlines() or ['failed'])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    """
+    Returns:
+        dict: Commit, Python version, platform and CPU count the results were measured with.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Finds regressions against a previous run.
+
+    Args:
+        results (list): Results of this run.
+        baseline (list): Results of the previous run.
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list: Human-readable description of each regression.
+    """
+    previous = {(result['backend'], result['scale']): result for result in baseline if 'error' not in result}
+    regressions = []
+    for result in results:
+        before = previous.get((result['backend'], result['scale']))
+        if before is None or 'error' in result:
+            continue
+        name = '{} x{}'.format(result['backend'], result['scale'])
+        if result['headlines_per_second'] < before['headlines_per_second'] * (1.0 - tolerance):
+            regressions.append('{}: {:.1f} headlines/s, was {:.1f}'.format(
+                name, result['headlines_per_second'], before['headlines_per_second']))
+        if result['p99_ms'] is not None and before['p99_ms'] is not None \
+                and result['p99_ms'] > before['p99_ms'] * (1.0 + tolerance):
+            regressions.append('{}: p99 {:.1f} ms, was {:.1f} ms'.format(name, result['p99_ms'], before['p99_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=list(DEFAULT_BACKENDS), help='Backends to benchmark.')
+    parser.add_argument('--scales', nargs='+', type=int, default=[1], help='Corpus copies per run.')
+    parser.add_argument('--corpus', default='data/stock_sentiment_data.csv', help='CSV file with a title column.')
+    parser.add_argument('--limit', type=int, help='Only use the first LIMIT headlines of each corpus copy.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic variants.')
+    parser.add_argument('--latency-samples', type=int, default=100, help='Headlines scored one at a time.')
+    parser.add_argument('--batch-size', type=int, default=32, help='Classifier batch size.')
+    parser.add_argument('--pack-size', type=int, default=20, help='Headlines per prompt of openai:packed.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight of openai-async.')
+    parser.add_argument('--stub-latency', type=float, default=0.02, help='Response delay of the stub server.')
+    parser.add_argument('--llm-model', help='Hugging Face model of the llm:transformers backend.')
+    parser.add_argument('--gguf', help='GGUF weights of the llm:llama.cpp backend.')
+    parser.add_argument('--token', default='', help='Hugging Face token of the llm:transformers backend.')
+    parser.add_argument('--max-length', type=int, default=256, help='Maximum generated length of the LLM.')
+    parser.add_argument('--output', help='JSON file the results are written to.')
+    parser.add_argument('--baseline', help='JSON output of a previous run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression.')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results.')
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--worker-scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_case(args.worker, args.worker_scale, args)))
+        return
+
+    # Options forwarded to the workers
+    argv = ['--corpus', args.corpus, '--seed', str(args.seed), '--latency-samples', str(args.latency_samples),
+            '--batch-size', str(args.batch_size), '--pack-size', str(args.pack_size),
+            '--concurrency', str(args.concurrency), '--token', args.token, '--max-length', str(args.max_length)]
+    for option, value in (('--limit', args.limit), ('--llm-model', args.llm_model), ('--gguf', args.gguf)):
+        if value is not None:
+            argv += [option, str(value)]
+
+    with StubOpenAIServer(latency=args.stub_latency) as stub:
+        argv += ['--base-url', stub.url]
+        results = [measure_case(spec, scale, argv) for spec in args.backends for scale in args.scales]
+
+    report = {'environment': environment(), 'stub_latency': args.stub_latency, 'results': results}
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("{:<22} {:>6} {:>9} {:>12} {:>9} {:>9} {:>12} {:>10}".format(
+            "Backend", "Scale", "Headlines", "Cold (s)", "p50 ms", "p99 ms", "Headlines/s", "RSS (MB)"))
+        for result in results:
+            if 'error' in result:
+                print("{:<22} {:>6} error: {}".format(result['backend'], result['scale'], result['error']))
+                continue
+            print("{:<22} {:>6} {:>9} {:>12.2f} {:>9.2f} {:>9.2f} {:>12.1f} {:>10.0f}".format(
+                result['backend'], result['scale'], result['headlines'], result['cold_start_seconds'],
+                result['p50_ms'] or 0.0, result['p99_ms'] or 0.0, result['headlines_per_second'],
+                result['peak_rss_mb']))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        if regressions:
+            print("Regressions beyond {:.0%}:\n  {}".format(args.tolerance, '\n  '.join(regressions)),
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
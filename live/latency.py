@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+from profiling.histogram import LatencyHistogram
+
+
+class StageLatencies:
+    """
+    One LatencyHistogram per pipeline stage.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, stage, seconds):
+        """
+        Adds a latency sample to a stage, creating its histogram on first use.
+
+        Args:
+        - stage (str): Stage name.
+        - seconds (float): Measured latency.
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """
+        Context manager recording the duration of its block under `stage`.
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started_at)
+
+    def snapshot(self):
+        """
+        Returns:
+        - dict: Summary of every stage, keyed by stage name.
+        """
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def report(self):
+        """
+        Formats the stage summaries as a table.
+
+        Returns:
+        - str: One line per stage with the count and latency percentiles in milliseconds.
+        """
+        lines = ["{:<12} {:>8} {:>10} {:>10} {:>10} {:>10}".format("Stage", "Count", "p50 ms", "p90 ms", "p99 ms",
+                                                                   "Max ms")]
+        for stage, summary in self.snapshot().items():
+            lines.append("{:<12} {:>8} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+                stage, summary['count'], summary['p50_ms'], summary['p90_ms'], summary['p99_ms'], summary['max_ms']))
+        return '\n'.join(lines)
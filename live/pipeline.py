@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+from live.latency import StageLatencies
+from processor.incremental_sentiment import IncrementalSentimentAggregator
+from processor.sentiment_features import session_day
+from sentiment_analysis.labels import LABEL_SIGNALS, normalize_label
+
+
+class ClassifierBackend:
+    """
+    Adapts NewsSentimentAnalysis to the pipeline: a micro-batch is scored by `analyze_batch` in a
+    worker thread, so the event loop keeps receiving news during the forward pass.
+    """
+
+    def __init__(self, analyzer, batch_size=32):
+        """
+        Args:
+        - analyzer (NewsSentimentAnalysis): Classifier scoring the headlines.
+        - batch_size (int): Number of headlines per forward pass.
+        """
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+
+    async def score(self, articles):
+        """
+        Scores a micro-batch of articles.
+
+        Args:
+        - articles (list): Articles in the format of `AlpacaNewsFetcher.fetch_news`.
+
+        Returns:
+        - list: Sentiment label per article.
+        """
+        news_articles = [{'summary': article.get('summary') or '', 'headline': article['title'],
+                          'created_at': article['timestamp']} for article in articles]
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, self.analyzer.analyze_batch, news_articles, self.batch_size)
+        return results['label']
+
+
+class AsyncLLMBackend:
+    """
+    Adapts AsyncOpenAISentimentAnalysis to the pipeline: a micro-batch is scored by concurrent requests.
+    """
+
+    def __init__(self, analyzer):
+        """
+        Args:
+        - analyzer (AsyncOpenAISentimentAnalysis): LLM client scoring the headlines.
+        """
+        self.analyzer = analyzer
+
+    async def score(self, articles):
+        """
+        Scores a micro-batch of articles.
+
+        Args:
+        - articles (list): Articles in the format of `AlpacaNewsFetcher.fetch_news`.
+
+        Returns:
+        - list: Sentiment answer per article.
+        """
+        return await self.analyzer.analyze_many([article['title'] for article in articles])
+
+
+class LivePipeline:
+    """
+    A long-running async pipeline turning a news stream into trading decisions.
+
+    Stages:
+    - ingest: articles from the source are stamped with their arrival time and put on a bounded queue.
+    - score: the scorer drains the queue in micro-batches, taking whatever arrived while the previous
+      batch was scored, up to `batch_size`, and waiting at most `max_batch_delay` for a batch to fill.
+    - bars: with a bar source, the daily bars closed before the headline's session are handed to the
+      trader's `on_bar`, so its indicators and fill price follow the market.
+    - signal: the label of each headline updates the incremental sentiment features of every mentioned symbol.
+    - decide: the trader re-evaluates its rules for those symbols and submits orders to its broker.
+
+    Per-stage latencies, and the end-to-end headline-to-decision latency, are recorded in `latencies`.
+    """
+
+    def __init__(self, source, backend, trader, signal_state=None, batch_size=32, max_batch_delay=0.01,
+                 queue_size=1000, bar_source=None):
+        """
+        Initializes the LivePipeline object.
+
+        Args:
+        - source: Async iterable of articles, e.g. ReplayNewsSource or AlpacaNewsStream.
+        - backend: Sentiment backend with an async `score(articles)` method, e.g. ClassifierBackend.
+        - trader (SentimentTrader): Receives every signal update through `on_signal(symbol, signal)` and,
+          with a bar source, every new daily bar through `on_bar(symbol, closes)`.
+        - signal_state (IncrementalSentimentAggregator): Running sentiment features per symbol, e.g. restored
+          from a snapshot; a new one by default.
+        - batch_size (int): Maximum number of headlines scored together.
+        - max_batch_delay (float): Maximum time in seconds a headline waits for its batch to fill.
+        - queue_size (int): Maximum number of headlines waiting to be scored; ingestion pauses beyond it.
+        - bar_source: Daily bars with a `closes(symbol, session)` method, e.g. ReplayBarSource, or None
+          when the trader's price history is updated by the caller.
+        """
+        self.source = source
+        self.backend = backend
+        self.trader = trader
+        self.signal_state = signal_state if signal_state is not None else IncrementalSentimentAggregator()
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay
+        self.queue_size = queue_size
+        self.bar_source = bar_source
+        self.latencies = StageLatencies()
+        self._bar_counts = {}
+        self.decisions = []
+        self.processed = 0
+
+    async def _ingest(self, queue, finished):
+        try:
+            async for article in self.source:
+                await queue.put((time.perf_counter(), article))
+        finally:
+            # Also wakes the scorer when the source fails; run() then re-raises the error. This must not
+            # block: run() cancels the task after a scorer error, when nothing drains a full queue anymore
+            finished.set()
+            if not queue.full():
+                queue.put_nowait(None)
+
+    async def _next_batch(self, queue, finished):
+        # A source finishing on a full queue leaves no end marker, only the event
+        if queue.empty() and finished.is_set():
+            return None, True
+        item = await queue.get()
+        if item is None:
+            return None, True
+        batch = [item]
+        deadline = time.perf_counter() + self.max_batch_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _update_bars(self, symbol, timestamp):
+        state = self.signal_state
+        session = session_day(timestamp, state.timezone, state.market_close, state.holidays)
+        closes = self.bar_source.closes(symbol, session)
+        if closes is not None and len(closes) != self._bar_counts.get(symbol):
+            self._bar_counts[symbol] = len(closes)
+            self.trader.on_bar(symbol, closes)
+
+    async def _process(self, batch):
+        dequeued_at = time.perf_counter()
+        for received_at, _ in batch:
+            self.latencies.record('queue', dequeued_at - received_at)
+
+        articles = [article for _, article in batch]
+        with self.latencies.time('score'):
+            labels = await self.backend.score(articles)
+
+        for (received_at, article), label in zip(batch, labels):
+            signal = LABEL_SIGNALS.get(normalize_label(label), 0)
+            for symbol in article.get('symbols') or ():
+                if self.bar_source is not None:
+                    with self.latencies.time('bars'):
+                        self._update_bars(symbol, article['timestamp'])
+                with self.latencies.time('signal'):
+                    features = self.signal_state.update(symbol, article['timestamp'], signal)
+                with self.latencies.time('decide'):
+                    order = self.trader.on_signal(symbol, features['signal'])
+                if order is not None:
+                    self.decisions.append(dict(order, article_id=article.get('id')))
+            self.latencies.record('end_to_end', time.perf_counter() - received_at)
+        self.processed += len(batch)
+
+    async def run(self):
+        """
+        Runs the pipeline until the source is exhausted (never, for a live stream).
+
+        Returns:
+        - dict: Latency summary of every stage, see `StageLatencies.snapshot`.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        finished = asyncio.Event()
+        ingest_task = asyncio.ensure_future(self._ingest(queue, finished))
+        try:
+            done = False
+            while not done:
+                batch, done = await self._next_batch(queue, finished)
+                if batch:
+                    await self._process(batch)
+            # Re-raises the error of a failed source
+            await ingest_task
+        finally:
+            ingest_task.cancel()
+        return self.latencies.snapshot()
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    from live.sources import ReplayBarSource, ReplayNewsSource
+    from live.trading import PaperBroker, SentimentTrader
+    from sentiment_analysis.sentiment_analysis_pipeline import NewsSentimentAnalysis
+
+    # Example Usage: replay the sample headlines and daily bars as AAPL news through the small classifier
+    merged_df = pd.read_csv('data/merged_df.csv', index_col=0, parse_dates=True)
+    broker = PaperBroker()
+    trader = SentimentTrader(broker, {}, weight=1.0)
+    pipeline = LivePipeline(ReplayNewsSource('data/stock_sentiment_data.csv', symbols=('AAPL',)),
+                            ClassifierBackend(NewsSentimentAnalysis()), trader,
+                            bar_source=ReplayBarSource({'AAPL': merged_df}))
+
+    asyncio.run(pipeline.run())
+    print("Headlines: {}, Orders: {}".format(pipeline.processed, len(pipeline.decisions)))
+    print(pipeline.latencies.report())
@@ -0,0 +1,182 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+
+class ReplayNewsSource:
+    """
+    An async news source replaying stored headlines, a local stand-in for the Alpaca news stream.
+
+    Articles are yielded oldest first in the format of `AlpacaNewsFetcher.fetch_news`. With a
+    `speed` the original gaps between publication times are reproduced, divided by `speed`;
+    without one the articles are yielded as fast as the consumer takes them.
+
+    Attributes:
+    - articles (list): Articles to replay, sorted by timestamp.
+    - speed (float): Replay speed-up factor, or None for no pacing.
+    """
+
+    def __init__(self, articles, speed=None, symbols=()):
+        """
+        Initializes the ReplayNewsSource object.
+
+        Args:
+        - articles (list or str): Articles as returned by `AlpacaNewsFetcher.fetch_news`, or the path of
+          a CSV file with 'timestamp' and 'title' columns and optional 'summary' and 'symbols' columns.
+        - speed (float): Replay speed-up factor, or None for no pacing.
+        - symbols (tuple): Symbols attached to CSV rows without a 'symbols' column.
+        """
+        if isinstance(articles, str):
+            articles = self.read_csv(articles, symbols)
+        self.articles = sorted(articles, key=lambda article: pd.Timestamp(article['timestamp']))
+        self.speed = speed
+
+    @staticmethod
+    def read_csv(path, symbols=()):
+        """
+        Reads stored headlines into articles.
+
+        Args:
+        - path (str): CSV file with 'timestamp' and 'title' columns.
+        - symbols (tuple): Symbols attached to rows without a 'symbols' column.
+
+        Returns:
+        - list: Articles in the format of `AlpacaNewsFetcher.fetch_news`.
+        """
+        frame = pd.read_csv(path)
+        return [{
+            'id': row.get('id', index),
+            'timestamp': row['timestamp'],
+            'title': row['title'],
+            'summary': row.get('summary', '') if isinstance(row.get('summary', ''), str) else '',
+            'symbols': row['symbols'].split(',') if isinstance(row.get('symbols'), str) else list(symbols),
+        } for index, row in enumerate(frame.to_dict('records'))]
+
+    async def __aiter__(self):
+        previous = None
+        for article in self.articles:
+            if self.speed and previous is not None:
+                gap = (pd.Timestamp(article['timestamp']) - previous).total_seconds() / self.speed
+                if gap > 0:
+                    await asyncio.sleep(gap)
+            previous = pd.Timestamp(article['timestamp'])
+            yield article
+
+
+class ReplayBarSource:
+    """
+    A source of daily bars replaying stored prices, driven by LivePipeline as the news clock advances.
+
+    A bar source only has to answer `closes(symbol, session)`: the closes of the bars completed
+    before a session, which the pipeline hands to `SentimentTrader.on_bar` whenever a new bar closed.
+
+    Attributes:
+    - symbols (list): Symbols with price history.
+    """
+
+    def __init__(self, bars, close_column='Close'):
+        """
+        Initializes the ReplayBarSource object.
+
+        Args:
+        - bars (dict): Daily bars per symbol as DataFrames indexed by session date, e.g. the merged data.
+        - close_column (str): Column holding the close prices.
+        """
+        self._days = {}
+        self._closes = {}
+        for symbol, frame in bars.items():
+            frame = frame.sort_index()
+            self._days[symbol] = pd.DatetimeIndex(frame.index).values.astype('datetime64[D]').view('int64')
+            self._closes[symbol] = frame[close_column].to_numpy(dtype=np.float64)
+        self.symbols = list(self._days)
+
+    def closes(self, symbol, session):
+        """
+        Returns the close prices of the bars completed before a session.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - session (int): Session day, counted in days since 1970-01-01, see `session_day`.
+
+        Returns:
+        - np.ndarray: Close prices, oldest first, or None for a symbol without price history.
+        """
+        days = self._days.get(symbol)
+        if days is None:
+            return None
+        return self._closes[symbol][:np.searchsorted(days, session)]
+
+
+class AlpacaNewsStream:
+    """
+    An async news source reading the Alpaca real-time news websocket.
+
+    Articles pushed by the websocket are formatted like `AlpacaNewsFetcher.fetch_news` and queued;
+    when the consumer falls more than `max_queue` articles behind, the oldest are dropped so the
+    pipeline keeps working on recent news.
+
+    Attributes:
+    - symbols (tuple): Symbols subscribed to; '*' subscribes to all news.
+    - dropped (int): Number of articles dropped because the queue was full.
+    """
+
+    def __init__(self, api_key, api_secret, symbols=('*',), max_queue=10000):
+        """
+        Initializes the AlpacaNewsStream object.
+
+        Args:
+        - api_key (str): Alpaca API key for authentication.
+        - api_secret (str): Alpaca API secret for authentication.
+        - symbols (tuple): Symbols subscribed to; '*' subscribes to all news.
+        - max_queue (int): Maximum number of articles waiting for the consumer.
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.symbols = tuple(symbols)
+        self.max_queue = max_queue
+        self.dropped = 0
+
+    async def __aiter__(self):
+        from alpaca_trade_api.stream import Stream
+
+        from alpaca.client import AlpacaNewsFetcher
+
+        queue = asyncio.Queue(maxsize=self.max_queue)
+
+        async def on_news(news):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(AlpacaNewsFetcher._format_article(news))
+
+        stream = Stream(self.api_key, self.api_secret)
+        stream.subscribe_news(on_news, *self.symbols)
+        stream_task = asyncio.ensure_future(_run_stream(stream))
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            await stream.stop_ws()
+            stream_task.cancel()
+
+
+def _run_stream(stream):
+    """
+    Returns the coroutine running an alpaca_trade_api Stream on the current event loop.
+
+    alpaca_trade_api (3.x, pinned in requirements.txt) only exposes the blocking Stream.run(), which
+    starts its own event loop; the coroutine it runs is the private Stream._run_forever(). This is
+    the only place relying on it, so an upgrade that renames it fails here with a clear error.
+
+    Args:
+    - stream (alpaca_trade_api.stream.Stream): Stream with its subscriptions set up.
+
+    Returns:
+    - coroutine: Runs the websocket until the stream is stopped.
+    """
+    run_forever = getattr(stream, '_run_forever', None)
+    if run_forever is None:
+        raise RuntimeError("This alpaca_trade_api version has no Stream._run_forever(); "
+                           "install alpaca_trade_api 3.x.")
+    return run_forever()
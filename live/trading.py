@@ -0,0 +1,155 @@
+import numpy as np
+
+from strategies.optimized_rules import optimized_orders
+from strategies.vectorized_indicators import relative_strength_index, simple_moving_average
+
+
+class PaperBroker:
+    """
+    A simulated broker filling market orders immediately at the given price.
+
+    Uses the cash and commission model of BacktestRunner: percentage commission on the traded
+    value and no rejection for lack of cash.
+
+    Attributes:
+    - cash (float): Available cash.
+    - positions (dict): Number of shares held per symbol, negative for short positions.
+    - orders (list): Filled orders as dicts with symbol, size, price and commission.
+    """
+
+    def __init__(self, cash=100000, commission=0.001):
+        """
+        Initializes the PaperBroker object.
+
+        Args:
+        - cash (float): Starting cash.
+        - commission (float): Commission as a fraction of the traded value.
+        """
+        self.starting_cash = cash
+        self.cash = cash
+        self.commission = commission
+        self.positions = {}
+        self.orders = []
+
+    def position(self, symbol):
+        """
+        Returns:
+        - int: Number of shares held in the symbol.
+        """
+        return self.positions.get(symbol, 0)
+
+    def submit(self, symbol, size, price):
+        """
+        Fills a market order.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - size (int): Number of shares, positive to buy and negative to sell.
+        - price (float): Fill price.
+
+        Returns:
+        - dict: The filled order.
+        """
+        commission = abs(size * price) * self.commission
+        self.cash -= size * price + commission
+        self.positions[symbol] = self.position(symbol) + size
+        order = {'symbol': symbol, 'size': size, 'price': price, 'commission': commission}
+        self.orders.append(order)
+        return order
+
+    def value(self, prices):
+        """
+        Marks the portfolio to market.
+
+        Args:
+        - prices (dict): Latest price per symbol.
+
+        Returns:
+        - float: Cash plus the value of every position.
+        """
+        return self.cash + sum(size * prices[symbol] for symbol, size in self.positions.items())
+
+
+class SentimentTrader:
+    """
+    Applies the technical-with-sentiment OptimizedStrategy rules to live sentiment updates.
+
+    The moving averages and RSI only change once per daily bar, so they are computed from the
+    daily price history with the vectorized indicators when a bar closes (LivePipeline calls
+    `on_bar` from its bar source), and each headline only re-evaluates the rules of
+    `optimized_orders` against the updated sentiment signal. Orders fill at the last close. Positions are sized like
+    EqualWeightSizer: a buy moves the position to +target shares and a sell to -target shares.
+
+    Parameters mirror OptimizedStrategy: fast_ma, slow_ma, rsi_period, rsi_oversold and rsi_overbought.
+    """
+
+    def __init__(self, broker, price_history, weight=None, fast_ma=20, slow_ma=50, rsi_period=14, rsi_oversold=30,
+                 rsi_overbought=70):
+        """
+        Initializes the SentimentTrader object.
+
+        Args:
+        - broker (PaperBroker): Broker receiving the orders.
+        - price_history (dict): Daily close prices per symbol (array-like, oldest first), e.g. empty when
+          the bars come from the pipeline's bar source.
+        - weight (float): Share of the starting cash allocated to each symbol; defaults to 1 / number of symbols.
+        - fast_ma (int): Period for the fast moving average.
+        - slow_ma (int): Period for the slow moving average.
+        - rsi_period (int): Period for the Relative Strength Index (RSI).
+        - rsi_oversold (float): RSI level considered as oversold for buying.
+        - rsi_overbought (float): RSI level considered as overbought for selling.
+        """
+        self.broker = broker
+        self.weight = weight or 1.0 / max(len(price_history), 1)
+        self.fast_ma = fast_ma
+        self.slow_ma = slow_ma
+        self.rsi_period = rsi_period
+        self.rsi_oversold = rsi_oversold
+        self.rsi_overbought = rsi_overbought
+        self.closes = {}
+        self.indicators = {}
+        for symbol, closes in price_history.items():
+            self.on_bar(symbol, closes)
+
+    def on_bar(self, symbol, closes):
+        """
+        Recomputes the indicators of a symbol after a daily bar closes.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - closes (array-like): Daily close prices, oldest first, including the new bar.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        self.closes[symbol] = closes
+        self.indicators[symbol] = (
+            simple_moving_average(closes, self.fast_ma)[-1],
+            simple_moving_average(closes, self.slow_ma)[-1],
+            relative_strength_index(closes, self.rsi_period)[-1],
+        )
+
+    def on_signal(self, symbol, signal, price=None):
+        """
+        Re-evaluates the rules of a symbol after its sentiment signal changed and trades on a decision.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - signal (float): Current net sentiment signal of the symbol.
+        - price (float): Current price, defaults to the last daily close.
+
+        Returns:
+        - dict: The filled order, or None when the rules do not trade (or the symbol has no price history).
+        """
+        if symbol not in self.indicators:
+            return None
+        fast, slow, rsi = self.indicators[symbol]
+        price = float(price if price is not None else self.closes[symbol][-1])
+
+        direction = optimized_orders(fast, slow, rsi, self.rsi_oversold, self.rsi_overbought, signal)
+        if direction == 0:
+            return None
+
+        target = direction * int(self.broker.starting_cash * self.weight / price)
+        size = target - self.broker.position(symbol)
+        if size * direction <= 0:
+            return None
+        return self.broker.submit(symbol, size, price)
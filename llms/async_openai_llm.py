@@ -0,0 +1,234 @@
+import asyncio
+import random
+import time
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, RateLimitError
+
+from llms.openai_llm import MODEL, PROMPT_TEMPLATE
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket enforcing a per-minute budget.
+
+    Attributes:
+    - rate (float): Tokens added to the bucket per second.
+    - capacity (float): Maximum number of tokens the bucket holds.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        """
+        Initializes the TokenBucket object with a full bucket.
+
+        Args:
+        - per_minute (float): Budget replenished every minute.
+        - capacity (float): Maximum burst size, defaults to the per-minute budget.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount=1):
+        """
+        Waits until `amount` tokens are available and takes them from the bucket.
+
+        Args:
+        - amount (float): Number of tokens to take; clamped to the bucket capacity.
+        """
+        amount = min(amount, self.capacity)
+        # Holding the lock while sleeping keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+
+class AsyncOpenAISentimentAnalysis:
+    """
+    An asyncio variant of OpenAISentimentAnalysis that scores many texts concurrently.
+
+    Requests are fanned out under a bounded concurrency limit, paced by token buckets for the
+    requests-per-minute and tokens-per-minute budgets, and retried with jittered exponential
+    backoff on rate limiting, server errors and connection failures.
+
+    Attributes:
+    - client (AsyncOpenAI): Asynchronous OpenAI client for making API requests.
+    - max_concurrency (int): Maximum number of requests in flight.
+    - max_tokens (int): Maximum number of tokens generated per request.
+    - max_retries (int): Maximum number of retries per request.
+    - backoff_base (float): Base delay in seconds of the exponential backoff.
+    - backoff_max (float): Maximum delay in seconds between two attempts.
+    - cache (SentimentCache): Optional persistent cache consulted before calling the API.
+    """
+
+    RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError)
+
+    def __init__(self, api_key, base_url=None, max_concurrency=16, requests_per_minute=3500,
+                 tokens_per_minute=90000, max_tokens=10, max_retries=6, backoff_base=0.5, backoff_max=30.0,
+                 cache=None):
+        """
+        Initializes the AsyncOpenAISentimentAnalysis object.
+
+        Args:
+        - api_key (str): OpenAI API key for authentication.
+        - base_url (str): Optional API base URL, e.g. a local stub server standing in for the API.
+        - max_concurrency (int): Maximum number of requests in flight.
+        - requests_per_minute (float): Requests-per-minute budget of the API key.
+        - tokens_per_minute (float): Tokens-per-minute budget of the API key.
+        - max_tokens (int): Maximum number of tokens generated per request.
+        - max_retries (int): Maximum number of retries per request.
+        - backoff_base (float): Base delay in seconds of the exponential backoff.
+        - backoff_max (float): Maximum delay in seconds between two attempts.
+        - cache (SentimentCache): Optional persistent cache consulted before calling the API.
+        """
+        # Retries are handled by the scheduler so that they also respect the rate limits
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.max_concurrency = max_concurrency
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+
+    @staticmethod
+    def estimate_tokens(prompt, max_tokens):
+        """
+        Estimates the number of tokens a request consumes from the tokens-per-minute budget.
+
+        Args:
+        - prompt (str): Prompt sent to the API.
+        - max_tokens (int): Maximum number of tokens generated.
+
+        Returns:
+        - int: Estimated token count, assuming roughly four characters per token.
+        """
+        return len(prompt) // 4 + 1 + max_tokens
+
+    def _is_retryable(self, error):
+        if isinstance(error, self.RETRYABLE_ERRORS):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code >= 500
+
+    def _backoff_delay(self, error, attempt):
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter spreads out retries of requests that failed together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _complete(self, text, semaphore, request_bucket, token_bucket):
+        prompt = PROMPT_TEMPLATE.format(text=text)
+        tokens = self.estimate_tokens(prompt, self.max_tokens)
+
+        for attempt in range(self.max_retries + 1):
+            await request_bucket.acquire()
+            await token_bucket.acquire(tokens)
+            try:
+                async with semaphore:
+                    response = await self.client.completions.create(
+                        model=MODEL,
+                        prompt=prompt,
+                        max_tokens=self.max_tokens,
+                        temperature=0
+                    )
+                return response.choices[0].text.strip()
+            except Exception as error:
+                if attempt == self.max_retries or not self._is_retryable(error):
+                    raise
+                await asyncio.sleep(self._backoff_delay(error, attempt))
+
+    async def analyze_many(self, texts):
+        """
+        Analyzes the sentiment of many texts concurrently.
+
+        Args:
+        - texts (list): Texts to analyze.
+
+        Returns:
+        - list: Sentiment analysis results, in the same order as `texts`.
+
+        Raises:
+        - openai.OpenAIError: The first error of the requests that failed after their retries; the
+          results of the other requests are cached before it is raised.
+        """
+        results = {}
+        keys = {}
+        if self.cache is not None:
+            keys = {text: self.cache.make_key(MODEL, PROMPT_TEMPLATE, text) for text in set(texts)}
+            cached = self.cache.get_many(keys.values())
+            results = {text: cached[key] for text, key in keys.items() if key in cached}
+
+        # Identical texts are only requested once
+        pending = [text for text in dict.fromkeys(texts) if text not in results]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        request_bucket = TokenBucket(self._requests_per_minute, capacity=self.max_concurrency)
+        token_bucket = TokenBucket(self._tokens_per_minute)
+        # A request failing after its retries must not lose the results of the others
+        outcomes = await asyncio.gather(
+            *(self._complete(text, semaphore, request_bucket, token_bucket) for text in pending),
+            return_exceptions=True)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        completed = {text: outcome for text, outcome in zip(pending, outcomes)
+                     if not isinstance(outcome, BaseException)}
+        results.update(completed)
+
+        if self.cache is not None and completed:
+            self.cache.set_many({keys[text]: sentiment for text, sentiment in completed.items()})
+        if errors:
+            raise errors[0]
+
+        return [results[text] for text in texts]
+
+    async def analyze_sentiment(self, text):
+        """
+        Analyzes the sentiment of the provided text using OpenAI GPT-3.5 Turbo.
+
+        Args:
+        - text (str): Text to analyze.
+
+        Returns:
+        - str: Sentiment analysis result.
+        """
+        return (await self.analyze_many([text]))[0]
+
+    def analyze_many_sync(self, texts):
+        """
+        Blocking convenience wrapper around `analyze_many` for non-async callers.
+
+        Args:
+        - texts (list): Texts to analyze.
+
+        Returns:
+        - list: Sentiment analysis results, in the same order as `texts`.
+        """
+        return asyncio.run(self.analyze_many(texts))
+
+
+# Example usage
+if __name__ == "__main__":
+    # Add your OpenAI API key here, or point base_url at a local stub server
+    sentiment_analysis = AsyncOpenAISentimentAnalysis("your_openai_api_key", max_concurrency=8)
+
+    headlines = [
+        "Apple beats earnings expectations on record iPhone sales",
+        "Apple shares slide as supply chain issues weigh on outlook",
+    ]
+
+    for headline, sentiment in zip(headlines, sentiment_analysis.analyze_many_sync(headlines)):
+        print(f'{sentiment}: {headline}')
@@ -0,0 +1,82 @@
+import math
+
+from sentiment_analysis.labels import LABELS
+
+# The prompt ends right before the answer, so the next token is the start of a label
+CLASSIFY_PROMPT_TEMPLATE = ("Analyse the sentiment of the following stock market news:\n\n```{text}```\n\n"
+                            "Answer with one word: Positive, Negative or Neutral.\n\nSentiment:")
+
+
+def label_token_ids(tokenize, prompt_end='Sentiment:'):
+    """
+    Finds the token starting each label's continuation of the classification prompt.
+
+    Each label is tokenized after the end of the prompt and a space, and the first token past the
+    prompt's own tokens is kept, which handles both BPE tokenizers (" Positive") and SentencePiece
+    ones ("▁Positive").
+
+    Args:
+    - tokenize (callable): Maps a string to its list of token ids, without special tokens.
+    - prompt_end (str): Last characters of the prompt.
+
+    Returns:
+    - dict: First token id of each label, keyed by label.
+
+    Raises:
+    - ValueError: If two labels start with the same token and cannot be told apart in one step.
+    """
+    offset = len(tokenize(prompt_end))
+    token_ids = {label: tokenize(prompt_end + ' ' + label)[offset] for label in LABELS}
+    if len(set(token_ids.values())) != len(LABELS):
+        raise ValueError("The labels share their first token: {}".format(token_ids))
+    return token_ids
+
+
+def label_for_token(token):
+    """
+    Maps a generated token to the label it starts, e.g. " Pos" or "Positive" to 'Positive'.
+
+    Args:
+    - token (str): Decoded token.
+
+    Returns:
+    - str: The only label of LABELS starting with the token, ignoring case and surrounding spaces, or None.
+    """
+    prefix = token.strip().lower()
+    if not prefix:
+        return None
+    matches = [label for label in LABELS if label.lower().startswith(prefix)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def label_probabilities(label_scores):
+    """
+    Normalizes the logits or log-probabilities of the label tokens into probabilities.
+
+    Args:
+    - label_scores (dict): Logit or log-probability per label; missing labels count as impossible.
+
+    Returns:
+    - dict: Probability of each label of LABELS, summing to 1, or None when no label has a score,
+      e.g. when the answer starts with none of them.
+    """
+    scores = [label_scores.get(label, -math.inf) for label in LABELS]
+    top = max(scores)
+    if top == -math.inf:
+        return None
+    weights = [math.exp(score - top) for score in scores]
+    total = sum(weights)
+    return {label: weight / total for label, weight in zip(LABELS, weights)}
+
+
+def most_likely_label(probabilities):
+    """
+    Args:
+    - probabilities (dict): Probability per label, as returned by `label_probabilities`, or None.
+
+    Returns:
+    - str: Label with the highest probability, ties resolving in LABELS order, or None without probabilities.
+    """
+    if probabilities is None:
+        return None
+    return max(LABELS, key=lambda label: probabilities[label])
@@ -1,13 +1,28 @@
-from langchain import HuggingFacePipeline, PromptTemplate, LLMChain
-from transformers import AutoTokenizer
-import transformers
-import torch
+from llms.label_scoring import CLASSIFY_PROMPT_TEMPLATE, label_probabilities, label_token_ids, most_likely_label
+from llms.model_registry import ModelRegistry
+from llms.prompt_packing import PACKED_PROMPT_TEMPLATE, analyze_packed, format_packed_items
+from profiling.tracer import traced
+
+PROMPT_TEMPLATE = """Analyse the sentiment of the following stock market news:\n\n```{text}```\n\nSentiment:"""
+
+# Inference backends: the Transformers pipeline, or quantized GGUF weights run by llama.cpp on CPU
+BACKENDS = ('transformers', 'llama.cpp')
+
+# 'generate' samples a free-form answer; 'classify' scores the three label tokens in one forward pass
+MODES = ('generate', 'classify')
+
+# New tokens llama.cpp generates for a single label, and per headline of a packed answer such as "20: Positive"
+LABEL_MAX_TOKENS = 16
+PACKED_MAX_TOKENS_PER_ITEM = 8
 
 
 class SentimentAnalysisWithLLM:
     """
     A class for sentiment analysis of stock market news using a Hugging Face language model.
 
+    The model is loaded on the first analysis call and shared process-wide through the
+    ModelRegistry, so constructing or importing this class is cheap.
+
     Attributes:
     - model (str): Hugging Face model name or path.
     - token (str): Token used for tokenization.
@@ -16,11 +31,17 @@ class SentimentAnalysisWithLLM:
     - top_k (int): Top-k sampling for text generation.
     - num_return_sequences (int): Number of sequences to generate.
     - eos_token_id (int): End of sequence token id.
-    - device (str): Device on which the model will run.
+    - device (str): Device on which the model will run, or None to pick CUDA, then MPS, then CPU.
+    - cache (SentimentCache): Optional persistent cache consulted before running the model.
+    - backend (str): Inference backend, one of BACKENDS.
+    - n_threads (int): CPU threads used by llama.cpp, defaults to its own choice.
+    - n_ctx (int): Context window of the llama.cpp model.
+    - mode (str): Answering mode, one of MODES.
     """
 
     def __init__(self, model, token, max_length=1000, temperature=0, top_k=10,
-                 num_return_sequences=1, eos_token_id=None, device='mps'):
+                 num_return_sequences=1, eos_token_id=None, device=None, cache=None, backend='transformers',
+                 n_threads=None, n_ctx=2048, mode='generate'):
         """
         Initializes the SentimentAnalysisWithLLM object.
 
@@ -32,8 +53,19 @@ class SentimentAnalysisWithLLM:
         - top_k (int): Top-k sampling for text generation.
         - num_return_sequences (int): Number of sequences to generate.
         - eos_token_id (int): End of sequence token id.
-        - device (str): Device on which the model will run.
+        - device (str): Device on which the model will run, or None to pick CUDA, then MPS, then CPU.
+        - cache (SentimentCache): Optional persistent cache consulted before running the model.
+        - backend (str): 'transformers', or 'llama.cpp' to run quantized GGUF weights on CPU, in which
+          case `model` is the path of the .gguf file and `token` is unused.
+        - n_threads (int): CPU threads used by llama.cpp, defaults to its own choice.
+        - n_ctx (int): Context window of the llama.cpp model.
+        - mode (str): 'generate' to sample an answer, or 'classify' to pick the most likely label from the
+          next-token logits of the three labels, which is deterministic and needs a single forward pass.
         """
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend {!r}, expected one of {}.".format(backend, ', '.join(BACKENDS)))
+        if mode not in MODES:
+            raise ValueError("Unknown mode {!r}, expected one of {}.".format(mode, ', '.join(MODES)))
         self.model = model
         self.token = token
         self.max_length = max_length
@@ -42,32 +74,122 @@ class SentimentAnalysisWithLLM:
         self.num_return_sequences = num_return_sequences
         self.eos_token_id = eos_token_id
         self.device = device
+        self.cache = cache
+        self.backend = backend
+        self.n_threads = n_threads
+        self.n_ctx = n_ctx
+        self.mode = mode
+        self._label_token_ids = None
+        self._llm_chain = None
+        self._packed_llm_chain = None
+        self._packed_llm_chains_by_size = {}
+
+    def _registry_key(self):
+        return ('text-generation', self.backend, self.model, self.max_length, self.temperature, self.top_k,
+                self.num_return_sequences, self.eos_token_id, self.device, self.n_threads, self.n_ctx)
 
-        tokenizer = AutoTokenizer.from_pretrained(model, token=token)
+    def _model_id(self):
+        """
+        Returns the identifier of the model and backend, used to key cached results.
+        """
+        return self.model if self.backend == 'transformers' else '{}@{}'.format(self.model, self.backend)
+
+    @staticmethod
+    def _default_device():
+        import torch
+
+        if torch.cuda.is_available():
+            return 'cuda'
+        if torch.backends.mps.is_available():
+            return 'mps'
+        return 'cpu'
+
+    def _load_llm(self):
+        """
+        Builds the LangChain LLM of the selected backend.
+
+        Returns:
+        - LLM: LangChain LLM backed by the model.
+        """
+        if self.backend == 'llama.cpp':
+            return self._load_llama_cpp()
+
+        from langchain import HuggingFacePipeline
+        from transformers import AutoTokenizer
+        import transformers
+        import torch
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model, token=self.token)
+        device = self.device or self._default_device()
 
         pipeline = transformers.pipeline(
             "text-generation",
-            model=model,
+            model=self.model,
             tokenizer=tokenizer,
-            torch_dtype=torch.bfloat16,
+            # bfloat16 matmuls are emulated, and slow, on most CPUs
+            torch_dtype=torch.float32 if device == 'cpu' else torch.bfloat16,
             trust_remote_code=True,
-            device_map="auto",
-            max_length=max_length,
+            max_length=self.max_length,
             do_sample=True,
-            top_k=top_k,
-            num_return_sequences=num_return_sequences,
-            eos_token_id=eos_token_id,
-            token=token,
+            top_k=self.top_k,
+            num_return_sequences=self.num_return_sequences,
+            eos_token_id=self.eos_token_id,
+            token=self.token,
             device=device
         )
 
-        llm = HuggingFacePipeline(pipeline=pipeline, model_kwargs={'temperature': temperature})
+        return HuggingFacePipeline(pipeline=pipeline, model_kwargs={'temperature': self.temperature})
 
-        template = """Analyse the sentiment of the following stock market news:\n\n```{text}```\n\nSentiment:"""
-        prompt = PromptTemplate(template=template, input_variables=["text"])
+    def _load_llama_cpp(self):
+        """
+        Builds the LangChain wrapper around llama.cpp running quantized GGUF weights.
 
-        self.llm_chain = LLMChain(prompt=prompt, llm=llm)
+        Returns:
+        - LlamaCpp: LangChain LLM backed by the model.
+        """
+        try:
+            import llama_cpp  # noqa: F401
+        except ImportError:
+            raise ImportError("The llama.cpp backend requires llama-cpp-python; install it with "
+                              "`pip install llama-cpp-python`.")
+        from langchain.llms import LlamaCpp
+
+        # The answer is a single label, so only a few new tokens are generated
+        return LlamaCpp(model_path=self.model, n_ctx=self.n_ctx, n_threads=self.n_threads,
+                        temperature=self.temperature, top_k=self.top_k, max_tokens=LABEL_MAX_TOKENS, verbose=False)
 
+    @property
+    def llm(self):
+        """
+        The shared LangChain LLM, loaded on first access.
+        """
+        return ModelRegistry.get(self._registry_key(), self._load_llm)
+
+    @property
+    def llm_chain(self):
+        """
+        The single-text sentiment chain, built on first access.
+        """
+        if self._llm_chain is None:
+            from langchain import PromptTemplate, LLMChain
+
+            prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["text"])
+            self._llm_chain = LLMChain(prompt=prompt, llm=self.llm)
+        return self._llm_chain
+
+    @property
+    def packed_llm_chain(self):
+        """
+        The multi-text sentiment chain used by `analyze_sentiment_packed`, built on first access.
+        """
+        if self._packed_llm_chain is None:
+            from langchain import PromptTemplate, LLMChain
+
+            packed_prompt = PromptTemplate(template=PACKED_PROMPT_TEMPLATE, input_variables=["items"])
+            self._packed_llm_chain = LLMChain(prompt=packed_prompt, llm=self.llm)
+        return self._packed_llm_chain
+
+    @traced()
     def analyze_sentiment(self, text):
         """
         Analyzes the sentiment of the provided stock market news text.
@@ -76,17 +198,173 @@ class SentimentAnalysisWithLLM:
         - text (str): Stock market news text to analyze.
 
         Returns:
-        - dict: A dictionary containing the sentiment analysis results.
+        - str: The generated answer, or in 'classify' mode the most likely label.
         """
+        if self.mode == 'classify':
+            return most_likely_label(self.classify(text))
+        if self.cache is not None:
+            return self.cache.get_or_compute(self._model_id(), PROMPT_TEMPLATE, text,
+                                             lambda text: self.llm_chain.run(text))
         return self.llm_chain.run(text)
 
+    def classify(self, text):
+        """
+        Scores the three sentiment labels of a news text from the model's next-token logits.
+
+        Args:
+        - text (str): Stock market news text to analyze.
+
+        Returns:
+        - dict: Probability of 'Positive', 'Negative' and 'Neutral'.
+        """
+        return self.classify_many([text])[0]
+
+    @traced()
+    def classify_many(self, texts, batch_size=8):
+        """
+        Scores the three sentiment labels of many news texts, several texts per forward pass.
+
+        Args:
+        - texts (list): Stock market news texts to analyze.
+        - batch_size (int): Number of prompts per forward pass of the Transformers backend.
+
+        Returns:
+        - list: Probability of each label per text, in input order.
+        """
+        results = {}
+        keys = {}
+        if self.cache is not None:
+            keys = {text: self.cache.make_key(self._model_id(), CLASSIFY_PROMPT_TEMPLATE, text) for text in set(texts)}
+            cached = self.cache.get_many(keys.values())
+            results = {text: cached[key] for text, key in keys.items() if key in cached}
+
+        pending = [text for text in dict.fromkeys(texts) if text not in results]
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            prompts = [CLASSIFY_PROMPT_TEMPLATE.format(text=text) for text in batch]
+            for text, label_logits in zip(batch, self._label_logits(prompts)):
+                results[text] = label_probabilities(label_logits)
+
+        if self.cache is not None and pending:
+            self.cache.set_many({keys[text]: results[text] for text in pending})
+
+        return [results[text] for text in texts]
+
+    def score_records(self, records, batch_size=8):
+        """
+        Labels columnar news records with their most likely sentiment and its probability.
+
+        Args:
+        - records (SentimentRecords): News articles, e.g. from AlpacaNewsFetcher.fetch_records.
+        - batch_size (int): Number of prompts per forward pass of the Transformers backend.
+
+        Returns:
+        - SentimentRecords: The records with their label codes and scores set.
+        """
+        return records.with_probabilities(self.classify_many(list(records.relevant_texts()), batch_size=batch_size))
+
+    def _label_logits(self, prompts):
+        """
+        Runs prompts through the model and reads the logits of the label tokens at the next position.
+
+        Args:
+        - prompts (list): Classification prompts.
+
+        Returns:
+        - list: Logit of each label per prompt.
+        """
+        if self.backend == 'llama.cpp':
+            client = self.llm.client
+            if self._label_token_ids is None:
+                self._label_token_ids = label_token_ids(
+                    lambda string: client.tokenize(string.encode('utf-8'), add_bos=False))
+            label_logits = []
+            for prompt in prompts:
+                client.reset()
+                client.eval(client.tokenize(prompt.encode('utf-8')))
+                # Without logits_all, llama.cpp keeps the logits of the last evaluated token only
+                logits = client.scores[client.n_tokens - 1]
+                label_logits.append({label: float(logits[token_id])
+                                     for label, token_id in self._label_token_ids.items()})
+            return label_logits
+
+        import torch
+
+        pipeline = self.llm.pipeline
+        tokenizer, model = pipeline.tokenizer, pipeline.model
+        if self._label_token_ids is None:
+            self._label_token_ids = label_token_ids(lambda string: tokenizer.encode(string, add_special_tokens=False))
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        # Left padding puts the last prompt token of every row in the last position
+        tokenizer.padding_side = 'left'
+
+        inputs = tokenizer(prompts, return_tensors='pt', padding=True).to(model.device)
+        # Count positions from each row's first real token, so a prompt's logits do not depend on
+        # the padding its batch adds in front of it
+        position_ids = (inputs['attention_mask'].cumsum(-1) - 1).clamp(min=0)
+        with torch.no_grad():
+            logits = model(**inputs, position_ids=position_ids).logits[:, -1, :].float().cpu()
+
+        labels = list(self._label_token_ids)
+        selected = logits[:, [self._label_token_ids[label] for label in labels]].tolist()
+        return [dict(zip(labels, row)) for row in selected]
+
+    def analyze_sentiment_packed(self, texts, pack_size=20):
+        """
+        Analyzes the sentiment of many news texts with several numbered texts packed into each prompt.
+
+        Items the model fails to answer in the requested format are retried with single-text calls.
+
+        Args:
+        - texts (list): Stock market news texts to analyze.
+        - pack_size (int): Maximum number of texts per prompt.
+
+        Returns:
+        - list: One sentiment label ('Positive', 'Negative' or 'Neutral') per text, in input order.
+        """
+        return analyze_packed(texts, self._complete_packed, self.analyze_sentiment,
+                              pack_size=pack_size, cache=self.cache, model_id=self._model_id())
+
+    def _complete_packed(self, texts):
+        """
+        Runs the packed prompt for several texts through the model.
+
+        Args:
+        - texts (list): Texts packed into the prompt.
+
+        Returns:
+        - str: Generated text.
+        """
+        return self._packed_llm_chain_for(len(texts)).run(format_packed_items(texts))
+
+    def _packed_llm_chain_for(self, pack_size):
+        """
+        Returns the packed chain with room for the answers of `pack_size` texts.
+
+        The shared llama.cpp LLM stops after LABEL_MAX_TOKENS, which cuts a packed answer off after a
+        few lines, so packs run through a copy sharing the loaded model with a limit sized to the pack.
+        """
+        if self.backend != 'llama.cpp':
+            return self.packed_llm_chain
+
+        chain = self._packed_llm_chains_by_size.get(pack_size)
+        if chain is None:
+            from langchain import PromptTemplate, LLMChain
+
+            llm = self.llm.copy(update={'max_tokens': PACKED_MAX_TOKENS_PER_ITEM * pack_size})
+            packed_prompt = PromptTemplate(template=PACKED_PROMPT_TEMPLATE, input_variables=["items"])
+            chain = self._packed_llm_chains_by_size[pack_size] = LLMChain(prompt=packed_prompt, llm=llm)
+        return chain
+
 
-# Example Usage:
-model_name = "meta-llama/Llama-2-7b-chat-hf"
-token = ""
-sentiment_analyzer = SentimentAnalysisWithLLM(model_name, token)
+if __name__ == '__main__':
+    # Example Usage:
+    model_name = "meta-llama/Llama-2-7b-chat-hf"
+    token = ""
+    sentiment_analyzer = SentimentAnalysisWithLLM(model_name, token)
 
-stock_news_text = """Some Stock market news data of a particular stock fetched using alpaca apis"""
+    stock_news_text = """Some Stock market news data of a particular stock fetched using alpaca apis"""
 
-sentiment_result = sentiment_analyzer.analyze_sentiment(stock_news_text)
-print(sentiment_result)
+    sentiment_result = sentiment_analyzer.analyze_sentiment(stock_news_text)
+    print(sentiment_result)
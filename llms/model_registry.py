@@ -0,0 +1,62 @@
+import threading
+
+
+class ModelRegistry:
+    """
+    A process-wide registry of lazily materialized models.
+
+    Models are built by a factory the first time they are requested and the same object is
+    returned to every later caller asking for the same key, so a model is loaded at most once
+    per process no matter how many analyzers use it.
+    """
+
+    _models = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, factory):
+        """
+        Returns the model registered under `key`, building it with `factory` on first use.
+
+        Args:
+        - key (tuple): Hashable description of the model, e.g. (task, model name, options).
+        - factory (callable): Called without arguments to build the model on a registry miss.
+
+        Returns:
+        - The shared model object.
+        """
+        model = cls._models.get(key)
+        if model is None:
+            with cls._lock:
+                model = cls._models.get(key)
+                if model is None:
+                    model = factory()
+                    cls._models[key] = model
+        return model
+
+    @classmethod
+    def is_loaded(cls, key):
+        """
+        Checks whether the model registered under `key` has been materialized.
+
+        Args:
+        - key (tuple): Hashable description of the model.
+
+        Returns:
+        - bool: True if the model is loaded in this process.
+        """
+        return key in cls._models
+
+    @classmethod
+    def unload(cls, key=None):
+        """
+        Drops one or all models from the registry so that they can be garbage collected.
+
+        Args:
+        - key (tuple): Model to drop, or None to drop every model.
+        """
+        with cls._lock:
+            if key is None:
+                cls._models.clear()
+            else:
+                cls._models.pop(key, None)
@@ -1,4 +1,15 @@
-from openai import OpenAI
+import math
+
+from llms.label_scoring import CLASSIFY_PROMPT_TEMPLATE, label_for_token, label_probabilities, label_token_ids, \
+    most_likely_label
+from llms.prompt_packing import analyze_packed, build_packed_prompt
+from profiling.tracer import traced
+
+MODEL = 'gpt-3.5-turbo-instruct'
+PROMPT_TEMPLATE = "Sentiment analysis of the following text: '{text}'"
+
+# 'generate' returns the free-form answer; 'classify' scores the three label tokens from their logprobs
+MODES = ('generate', 'classify')
 
 
 class OpenAISentimentAnalysis:
@@ -8,26 +19,44 @@ class OpenAISentimentAnalysis:
     Attributes:
     - api_key (str): OpenAI API key for authentication.
     - client (OpenAI): OpenAI client for making API requests.
+    - cache (SentimentCache): Optional persistent cache consulted before calling the API.
+    - mode (str): Answering mode, one of MODES.
     """
 
     _instance = None
 
-    def __new__(cls, api_key):
+    def __new__(cls, api_key, cache=None, mode=None, base_url=None):
         """
         Creates a singleton instance of OpenAISentimentAnalysis.
 
         Args:
         - api_key (str): OpenAI API key for authentication.
+        - cache (SentimentCache): Optional persistent cache consulted before calling the API.
+        - mode (str): 'generate' for the free-form answer, or 'classify' for the most likely label from
+          the logprobs of a single generated token, which is deterministic and cheaper.
+        - base_url (str): Optional API base URL of the client created by the first call, e.g. a local stub server.
 
         Returns:
         - OpenAISentimentAnalysis: An instance of the OpenAISentimentAnalysis class.
         """
         if not cls._instance:
+            from openai import OpenAI
+
             cls._instance = super(OpenAISentimentAnalysis, cls).__new__(cls)
             # Initialize the OpenAI client
-            cls._instance.client = OpenAI(api_key=api_key)
+            cls._instance.client = OpenAI(api_key=api_key, base_url=base_url)
+            cls._instance.cache = None
+            cls._instance.mode = 'generate'
+            cls._instance._logit_bias = None
+        if cache is not None:
+            cls._instance.cache = cache
+        if mode is not None:
+            if mode not in MODES:
+                raise ValueError("Unknown mode {!r}, expected one of {}.".format(mode, ', '.join(MODES)))
+            cls._instance.mode = mode
         return cls._instance
 
+    @traced()
     def analyze_sentiment(self, text):
         """
         Analyzes the sentiment of the provided text using OpenAI GPT-3.5 Turbo.
@@ -35,12 +64,99 @@ class OpenAISentimentAnalysis:
         Args:
         - text (str): Text to analyze.
 
+        Returns:
+        - str: Sentiment analysis result, or in 'classify' mode the most likely label.
+        """
+        if self.mode == 'classify':
+            return most_likely_label(self.classify(text))
+        if self.cache is not None:
+            return self.cache.get_or_compute(MODEL, PROMPT_TEMPLATE, text, self._complete)
+        return self._complete(text)
+
+    def classify(self, text):
+        """
+        Scores the three sentiment labels of a text from the logprobs of the first answer token.
+
+        Args:
+        - text (str): Text to analyze.
+
+        Returns:
+        - dict: Probability of 'Positive', 'Negative' and 'Neutral', or None when no label is among
+          the most likely answer tokens.
+        """
+        if self.cache is not None:
+            return self.cache.get_or_compute(MODEL, CLASSIFY_PROMPT_TEMPLATE, text, self._classify)
+        return self._classify(text)
+
+    def score_records(self, records):
+        """
+        Labels columnar news records with their most likely sentiment and its probability.
+
+        Args:
+        - records (SentimentRecords): News articles, e.g. from AlpacaNewsFetcher.fetch_records.
+
+        Returns:
+        - SentimentRecords: The records with their label codes and scores set.
+        """
+        return records.with_probabilities([self.classify(text) for text in records.relevant_texts()])
+
+    def _label_bias(self):
+        """
+        Builds the logit bias restricting the answer to the label tokens, when tiktoken is installed.
+
+        Returns:
+        - dict: Token id to bias, or an empty dict without tiktoken.
+        """
+        if self._logit_bias is None:
+            try:
+                import tiktoken
+            except ImportError:
+                self._logit_bias = {}
+            else:
+                encoding = tiktoken.encoding_for_model(MODEL)
+                self._logit_bias = {str(token_id): 100 for token_id in label_token_ids(encoding.encode).values()}
+        return self._logit_bias
+
+    def _classify(self, text):
+        """
+        Requests a single answer token with its top logprobs from the OpenAI API.
+
+        Args:
+        - text (str): Text to analyze.
+
+        Returns:
+        - dict: Probability of 'Positive', 'Negative' and 'Neutral', or None.
+        """
+        logit_bias = self._label_bias()
+        response = self.client.completions.create(
+            model=MODEL,
+            prompt=CLASSIFY_PROMPT_TEMPLATE.format(text=text),
+            max_tokens=1,
+            temperature=0,
+            logprobs=5,
+            **({'logit_bias': logit_bias} if logit_bias else {})
+        )
+        # Several tokens can start the same label (" Positive", "Positive"): add up their probabilities
+        label_probability_mass = {}
+        for token, logprob in response.choices[0].logprobs.top_logprobs[0].items():
+            label = label_for_token(token)
+            if label is not None:
+                label_probability_mass[label] = label_probability_mass.get(label, 0.0) + math.exp(logprob)
+        return label_probabilities({label: math.log(mass) for label, mass in label_probability_mass.items()})
+
+    def _complete(self, text):
+        """
+        Requests the sentiment of the provided text from the OpenAI API.
+
+        Args:
+        - text (str): Text to analyze.
+
         Returns:
         - str: Sentiment analysis result.
         """
-        prompt = f"Sentiment analysis of the following text: '{text}'"
+        prompt = PROMPT_TEMPLATE.format(text=text)
         response = self.client.completions.create(
-            model='gpt-3.5-turbo-instruct',
+            model=MODEL,
             prompt=prompt,
             max_tokens=10,
             temperature=0
@@ -49,6 +165,40 @@ class OpenAISentimentAnalysis:
         sentiment = response.choices[0].text.strip()
         return sentiment
 
+    def analyze_sentiment_packed(self, texts, pack_size=20):
+        """
+        Analyzes the sentiment of many texts with several numbered texts packed into each prompt.
+
+        Items the model fails to answer in the requested format are retried with single-text calls.
+
+        Args:
+        - texts (list): Texts to analyze.
+        - pack_size (int): Maximum number of texts per prompt.
+
+        Returns:
+        - list: One sentiment label ('Positive', 'Negative' or 'Neutral') per text, in input order.
+        """
+        return analyze_packed(texts, self._complete_packed, self.analyze_sentiment,
+                              pack_size=pack_size, cache=self.cache, model_id=MODEL)
+
+    def _complete_packed(self, texts):
+        """
+        Requests the completion of a prompt packing several texts from the OpenAI API.
+
+        Args:
+        - texts (list): Texts packed into the prompt.
+
+        Returns:
+        - str: Completion text.
+        """
+        response = self.client.completions.create(
+            model=MODEL,
+            prompt=build_packed_prompt(texts),
+            max_tokens=8 * len(texts),
+            temperature=0
+        )
+        return response.choices[0].text
+
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+import re
+
+from sentiment_analysis.labels import normalize_label
+
+PACKED_PROMPT_TEMPLATE = """Classify the sentiment of each of the following numbered stock market news headlines \
+as Positive, Negative or Neutral.
+Answer with exactly one line per headline in the format "<number>: <label>" and nothing else.
+
+{items}
+
+Sentiments:
+"""
+
+_ANSWER_PATTERN = re.compile(r'^\s*(\d+)\s*[:.)\-]\s*(.+?)\s*$', re.MULTILINE)
+
+
+def format_packed_items(texts):
+    """
+    Formats headlines as the numbered list inserted into PACKED_PROMPT_TEMPLATE.
+
+    Args:
+    - texts (list): Headlines to classify.
+
+    Returns:
+    - str: One line per headline, numbered from 1.
+    """
+    return '\n'.join(f'{number}. {" ".join(text.split())}' for number, text in enumerate(texts, start=1))
+
+
+def build_packed_prompt(texts):
+    """
+    Builds a prompt asking for the sentiment of several numbered headlines at once.
+
+    Args:
+    - texts (list): Headlines to classify.
+
+    Returns:
+    - str: Prompt listing the headlines numbered from 1.
+    """
+    return PACKED_PROMPT_TEMPLATE.format(items=format_packed_items(texts))
+
+
+def parse_packed_labels(output, count):
+    """
+    Parses and validates the per-item labels of a packed completion.
+
+    Args:
+    - output (str): Completion text returned by the model.
+    - count (int): Number of headlines that were packed into the prompt.
+
+    Returns:
+    - list: One canonical label per headline, or None for items that are missing,
+      out of range, ambiguous or answered more than once with different labels.
+    """
+    labels = [None] * count
+    conflicting = set()
+
+    for number, answer in _ANSWER_PATTERN.findall(output):
+        index = int(number) - 1
+        label = normalize_label(answer)
+        if not 0 <= index < count or label is None:
+            continue
+        if labels[index] is not None and labels[index] != label:
+            conflicting.add(index)
+        labels[index] = label
+
+    for index in conflicting:
+        labels[index] = None
+
+    return labels
+
+
+def analyze_packed(texts, complete, analyze_single, pack_size=20, cache=None, model_id=None):
+    """
+    Classifies texts in packs of `pack_size` headlines per prompt.
+
+    Items whose label cannot be parsed from the packed completion fall back to one
+    `analyze_single` call each.
+
+    Args:
+    - texts (list): Headlines to classify.
+    - complete (callable): Called with a list of headlines, returns the completion of their packed prompt.
+    - analyze_single (callable): Called with a single headline when its packed answer is unusable.
+    - pack_size (int): Maximum number of headlines per prompt.
+    - cache (SentimentCache): Optional persistent cache of packed labels.
+    - model_id (str): Model identifier used to key cached labels.
+
+    Returns:
+    - list: One label per text, in the same order as `texts`.
+    """
+    results = {}
+    keys = {}
+    if cache is not None:
+        keys = {text: cache.make_key(model_id, PACKED_PROMPT_TEMPLATE, text) for text in set(texts)}
+        cached = cache.get_many(keys.values())
+        results = {text: cached[key] for text, key in keys.items() if key in cached}
+
+    pending = [text for text in dict.fromkeys(texts) if text not in results]
+
+    for start in range(0, len(pending), pack_size):
+        pack = pending[start:start + pack_size]
+        labels = parse_packed_labels(complete(pack), len(pack))
+        for text, label in zip(pack, labels):
+            if label is None:
+                answer = analyze_single(text)
+                label = normalize_label(answer) or answer
+            results[text] = label
+
+    if cache is not None and pending:
+        cache.set_many({keys[text]: results[text] for text in pending})
+
+    return [results[text] for text in texts]
@@ -1,8 +1,12 @@
 import os
-import pandas as pd
+from contextlib import nullcontext
 
+from processor.market_data_store import MarketDataStore
 from processor.stock_data_processor import StockDataProcessor
+from profiling.tracer import Profiler, span
 from runner.backtest_runner import BacktestRunner
+from runner.parameter_sweep import ParameterSweep
+from runner.walk_forward import WalkForward
 
 if __name__ == '__main__':
     # Configuration
@@ -10,20 +14,46 @@ if __name__ == '__main__':
     START_DATE = '2022-03-21'
     END_DATE = '2022-12-31'
     SENTIMENT_DATA_PATH = 'data/stock_sentiment_data.csv'
+    MARKET_DATA_STORE_PATH = 'data/market_store'
+    # Walk-forward mode optimizes the strategy params on rolling train windows and reports out-of-sample results
+    WALK_FORWARD = False
+    TRAIN_SIZE = 126
+    TEST_SIZE = 21
+    # Profiling records the time, CPU and memory of each stage to a JSON trace, plus a cProfile dump if a path is set
+    PROFILE = False
+    PROFILE_TRACE_PATH = 'output/profile_trace.json'
+    PROFILE_CPROFILE_PATH = None
 
     # Create output directory
     os.makedirs('output', exist_ok=True)
 
-    # Initialize the StockDataProcessor
-    processor = StockDataProcessor(STOCK_TICKER, START_DATE, END_DATE, SENTIMENT_DATA_PATH)
-
-    # Download stock data
-    stock_data = processor.download_stock_data()
-
-    # Preprocess sentiment data and merge with stock data
-    sentiment_data = processor.preprocess_sentiment_data()
-    merged_df = pd.merge(stock_data, sentiment_data, left_index=True, right_index=True, how='left')
-
-
-    # Run backtest
-    BacktestRunner.run_backtest('data/merged_df.csv', STOCK_TICKER, START_DATE, END_DATE)
+    profiler = Profiler(PROFILE_TRACE_PATH, cprofile_path=PROFILE_CPROFILE_PATH) if PROFILE else None
+
+    # The profiler writes its trace on exit, also when a stage raises
+    with profiler if profiler is not None else nullcontext():
+        # Initialize the StockDataProcessor, reading stock data from the local store when available
+        with span('stock_data'):
+            market_data_store = MarketDataStore(MARKET_DATA_STORE_PATH)
+            processor = StockDataProcessor(STOCK_TICKER, START_DATE, END_DATE, SENTIMENT_DATA_PATH, market_data_store)
+
+        # Preprocess sentiment data and merge with stock data
+        with span('sentiment_preprocessing'):
+            merged_df = processor.preprocess_sentiment_data()
+
+        if WALK_FORWARD:
+            walk_forward = WalkForward(merged_df, train_size=TRAIN_SIZE, test_size=TEST_SIZE)
+            with span('walk_forward'):
+                report = walk_forward.run(ParameterSweep.grid({
+                    'fast_ma': [5, 10, 20],
+                    'slow_ma': [30, 50],
+                    'rsi_period': [7, 14],
+                }))
+            report['equity'].to_csv('output/walk_forward_equity.csv')
+            print("Out-of-sample Final Value: ${:.2f}".format(report['equity'].iloc[-1]))
+        else:
+            # Run backtest on the in-memory merged data
+            with span('backtest'):
+                BacktestRunner.run_backtest(merged_df, STOCK_TICKER, START_DATE, END_DATE)
+
+    if profiler is not None:
+        print(profiler.report())
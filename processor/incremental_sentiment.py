@@ -0,0 +1,327 @@
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from processor.sentiment_features import EXCHANGE_TIMEZONE, MARKET_CLOSE, encode_signals, session_day
+
+INCREMENTAL_FEATURE_COLUMNS = ('signal', 'count', 'positive_ratio', 'decayed_score', 'rolling_signal',
+                               'rolling_count', 'zscore')
+
+
+class _SymbolState:
+    """
+    Sentiment state of one symbol: the open session's counters, a ring buffer of the net signals
+    and counts of the last `window` closed sessions with their running sums, and the numerator and
+    denominator of the decayed score up to the last closed session.
+    """
+
+    __slots__ = ('day', 'signal', 'count', 'positive', 'signals', 'counts', 'head', 'filled', 'signal_sum',
+                 'signal_squares', 'count_sum', 'decay_numerator', 'decay_denominator', 'closed_day')
+
+    def __init__(self, window, day):
+        self.day = day
+        self.signal = 0
+        self.count = 0
+        self.positive = 0
+        self.signals = [0] * window
+        self.counts = [0] * window
+        self.head = 0
+        self.filled = 0
+        self.signal_sum = 0
+        self.signal_squares = 0
+        self.count_sum = 0
+        self.decay_numerator = 0.0
+        self.decay_denominator = 0.0
+        self.closed_day = None
+
+    def push(self, signal, count):
+        # Overwrite the oldest session of the ring buffer and update the running sums
+        window = len(self.signals)
+        if self.filled == window:
+            old = self.signals[self.head]
+            self.signal_sum -= old
+            self.signal_squares -= old * old
+            self.count_sum -= self.counts[self.head]
+        else:
+            self.filled += 1
+        self.signals[self.head] = signal
+        self.counts[self.head] = count
+        self.signal_sum += signal
+        self.signal_squares += signal * signal
+        self.count_sum += count
+        self.head = (self.head + 1) % window
+
+
+class IncrementalSentimentAggregator:
+    """
+    Maintains rolling daily sentiment features per symbol with O(1) work per headline.
+
+    Headlines are assigned to exchange sessions like `aggregate_daily_sentiment` does, and every
+    update returns the features of the headline's session so far:
+
+    - signal, count, positive_ratio: Net score, number of headlines and share of positive ones.
+    - decayed_score: Exponentially weighted mean of the daily net score over business days, equal to
+      the 'decayed_score' of `aggregate_daily_sentiment`.
+    - rolling_signal, rolling_count: Net score and headline count over the session and the previous
+      `window - 1` business days.
+    - zscore: Net score of the session standardized by the mean and standard deviation of the
+      previous `window` sessions, 0 until two sessions closed or without dispersion.
+
+    A session closes when a headline of a later session arrives for the symbol, or through
+    `advance`. Sessions without news count as zeros. The whole state is a few numbers plus two ring
+    buffers per symbol, so it can be snapshotted to JSON and restored, e.g. when a live process restarts.
+    """
+
+    def __init__(self, window=20, halflife=3, timezone=EXCHANGE_TIMEZONE, market_close=MARKET_CLOSE, holidays=None,
+                 record_history=False):
+        """
+        Args:
+            window (int): Number of sessions of the rolling features and z-score.
+            halflife (float): Half-life of the decayed score in business days.
+            timezone (str): Exchange timezone used for session alignment.
+            market_close (str): Local market close time as "HH:MM".
+            holidays (list): Optional exchange holidays as dates.
+            record_history (bool): Keep the final features of every closed session, see `history`.
+        """
+        self.window = window
+        self.halflife = halflife
+        self.timezone = timezone
+        self.market_close = market_close
+        self.holidays = [] if holidays is None else [str(day) for day in np.asarray(holidays, dtype='datetime64[D]')]
+        self.record_history = record_history
+        self.decay = 0.5 ** (1.0 / halflife)
+        self._symbols = {}
+        self._history = []
+
+    def _session_gap(self, start_day, end_day):
+        # Number of business days from start_day (excluded) to end_day (included)
+        return int(np.busday_count(np.datetime64(start_day, 'D') + 1, np.datetime64(end_day, 'D') + 1,
+                                   holidays=self.holidays))
+
+    def _close_session(self, symbol, state):
+        if self.record_history:
+            self._history.append((symbol, state.day, self._features(state)))
+
+        if state.closed_day is None:
+            state.decay_numerator, state.decay_denominator = float(state.signal), 1.0
+        else:
+            # Each business day since the last closed session adds a weight of 1 to the decayed
+            # denominator; the news-free ones add nothing to the numerator
+            decay = self.decay ** self._session_gap(state.closed_day, state.day)
+            state.decay_numerator = state.decay_numerator * decay + state.signal
+            state.decay_denominator = state.decay_denominator * decay + (1.0 - decay) / (1.0 - self.decay)
+        state.push(state.signal, state.count)
+        state.closed_day = state.day
+
+    def _advance(self, symbol, state, day):
+        """Close the open session and any news-free sessions before `day`, then open `day`."""
+        self._close_session(symbol, state)
+        empty_sessions = self._session_gap(state.day, day) - 1
+        if empty_sessions > 0:
+            if self.record_history:
+                # Dense history: close every news-free session individually
+                for empty_day in np.arange(state.day + 1, day):
+                    if np.is_busday(np.datetime64(int(empty_day), 'D'), holidays=self.holidays):
+                        state.day, state.signal, state.count, state.positive = int(empty_day), 0, 0, 0
+                        self._close_session(symbol, state)
+            else:
+                # Zeros only shift the ring buffer, so at most `window` pushes are needed
+                for _ in range(min(empty_sessions, self.window)):
+                    state.push(0, 0)
+                # The decayed score accounts for the zeros in closed form when the next session closes
+        state.day, state.signal, state.count, state.positive = day, 0, 0, 0
+
+    def _features(self, state):
+        if state.closed_day is None:
+            decayed_score = float(state.signal)
+        else:
+            decay = self.decay ** self._session_gap(state.closed_day, state.day)
+            numerator = state.decay_numerator * decay + state.signal
+            denominator = state.decay_denominator * decay + (1.0 - decay) / (1.0 - self.decay)
+            decayed_score = numerator / denominator
+
+        # The ring buffer holds the previous `window` sessions; the rolling features replace the oldest by today
+        oldest = state.head if state.filled == self.window else None
+        rolling_signal = state.signal_sum + state.signal - (state.signals[oldest] if oldest is not None else 0)
+        rolling_count = state.count_sum + state.count - (state.counts[oldest] if oldest is not None else 0)
+
+        zscore = 0.0
+        if state.filled >= 2:
+            mean = state.signal_sum / state.filled
+            variance = state.signal_squares / state.filled - mean * mean
+            if variance > 1e-12:
+                zscore = (state.signal - mean) / math.sqrt(variance)
+
+        return {
+            'signal': state.signal,
+            'count': state.count,
+            'positive_ratio': state.positive / state.count if state.count else 0.0,
+            'decayed_score': decayed_score,
+            'rolling_signal': rolling_signal,
+            'rolling_count': rolling_count,
+            'zscore': zscore,
+        }
+
+    def update(self, symbol, timestamp, signal):
+        """
+        Add one scored headline.
+
+        Args:
+            symbol (str): Stock symbol the headline mentions.
+            timestamp (str or datetime): Publication timestamp; naive values are taken as UTC.
+            signal (int): +1 (positive), -1 (negative) or 0 (neutral).
+
+        Returns:
+            dict: Features of the headline's session after the update. Headlines of a session
+            already closed for the symbol are ignored and the open session's features are returned.
+        """
+        day = session_day(timestamp, self.timezone, self.market_close, self.holidays)
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolState(self.window, day)
+        elif day > state.day:
+            self._advance(symbol, state, day)
+
+        if day == state.day:
+            state.signal += signal
+            state.count += 1
+            state.positive += signal == 1
+        return self._features(state)
+
+    def advance(self, day):
+        """
+        Close the sessions of every symbol before `day`, e.g. at the market open of a live loop.
+
+        Args:
+            day (str or datetime): First session kept open.
+        """
+        day = int(np.busday_offset(np.datetime64(pd.Timestamp(day).date(), 'D'), 0, roll='forward',
+                                   holidays=self.holidays).astype(np.int64))
+        for symbol, state in self._symbols.items():
+            if day > state.day:
+                self._advance(symbol, state, day)
+
+    def features(self, symbol):
+        """
+        Returns:
+            dict: Features of the open session of a symbol, or None if it never had news.
+        """
+        state = self._symbols.get(symbol)
+        return None if state is None else self._features(state)
+
+    def history(self):
+        """
+        Final features of every closed session recorded with `record_history`.
+
+        Returns:
+            pd.DataFrame: Features indexed by ('symbol', 'date').
+        """
+        frame = pd.DataFrame([features for _, _, features in self._history],
+                             columns=list(INCREMENTAL_FEATURE_COLUMNS))
+        frame.index = pd.MultiIndex.from_arrays([
+            [symbol for symbol, _, _ in self._history],
+            pd.DatetimeIndex(np.array([day for _, day, _ in self._history], dtype='datetime64[D]')
+                             .astype('datetime64[ns]')),
+        ], names=['symbol', 'date'])
+        return frame
+
+    @classmethod
+    def aggregate(cls, sentiment_data, timestamp_column='timestamp', label_column='sentiment', symbol_column=None,
+                  **kwargs):
+        """
+        Replay stored headlines through a new aggregator, giving backtests the exact features a live loop sees.
+
+        Args:
+            sentiment_data (pd.DataFrame): Scored headlines.
+            timestamp_column (str): Column holding publication timestamps.
+            label_column (str): Column holding sentiment labels.
+            symbol_column (str): Optional column holding stock symbols.
+            **kwargs: Arguments of the aggregator, e.g. `window` or `halflife`.
+
+        Returns:
+            pd.DataFrame: Features of every business day from each symbol's first to last session with news,
+            indexed by 'date', or by ('symbol', 'date') with a symbol column.
+        """
+        aggregator = cls(record_history=True, **kwargs)
+        timestamps = pd.to_datetime(sentiment_data[timestamp_column], utc=True)
+        order = np.argsort(timestamps.to_numpy(), kind='stable')
+        signals = encode_signals(sentiment_data[label_column])[order]
+        symbols = sentiment_data[symbol_column].to_numpy()[order] if symbol_column is not None \
+            else [None] * len(order)
+
+        for timestamp, symbol, signal in zip(timestamps.iloc[order], symbols, signals):
+            aggregator.update(symbol, timestamp, int(signal))
+        for symbol, state in aggregator._symbols.items():
+            aggregator._close_session(symbol, state)
+
+        history = aggregator.history().sort_index()
+        return history if symbol_column is not None else history.droplevel('symbol')
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: JSON-serializable state of the aggregator, see `restore`.
+        """
+        return {
+            'window': self.window,
+            'halflife': self.halflife,
+            'timezone': self.timezone,
+            'market_close': self.market_close,
+            'holidays': self.holidays,
+            'symbols': {symbol: {slot: getattr(state, slot) for slot in _SymbolState.__slots__}
+                        for symbol, state in self._symbols.items()},
+        }
+
+    @classmethod
+    def restore(cls, snapshot):
+        """
+        Rebuild an aggregator from a snapshot.
+
+        Args:
+            snapshot (dict): State returned by `snapshot`.
+
+        Returns:
+            IncrementalSentimentAggregator: Aggregator continuing from the snapshot.
+        """
+        aggregator = cls(snapshot['window'], snapshot['halflife'], snapshot['timezone'], snapshot['market_close'],
+                         snapshot['holidays'])
+        for symbol, values in snapshot['symbols'].items():
+            state = _SymbolState(aggregator.window, values['day'])
+            for slot, value in values.items():
+                setattr(state, slot, value)
+            aggregator._symbols[symbol] = state
+        return aggregator
+
+    def save(self, path):
+        """
+        Write a snapshot to a JSON file.
+
+        Args:
+            path (str): Destination file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so an interrupted run never leaves a truncated file
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an aggregator saved with `save`.
+
+        Args:
+            path (str): Snapshot file.
+
+        Returns:
+            IncrementalSentimentAggregator: Aggregator continuing from the snapshot.
+        """
+        with open(path) as file:
+            return cls.restore(json.load(file))
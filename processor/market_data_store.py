@@ -0,0 +1,181 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+
+class MarketDataStore:
+    """
+    Local columnar store of daily OHLCV data, one directory per symbol.
+
+    Every column is kept as a NumPy ``.npy`` file that is memory-mapped on load, next to a
+    ``meta.json`` recording the column names and the contiguous date range already covered.
+    Requests are served from disk and only the dates outside the covered range are downloaded
+    and appended, so repeated backtests over the same window do no network I/O.
+    """
+
+    INDEX_FILE = 'date.npy'
+    META_FILE = 'meta.json'
+
+    def __init__(self, root='data/market_store', downloader=None):
+        """
+        Args:
+            root (str): Directory holding one sub-directory per symbol.
+            downloader (callable): Called as ``downloader(symbol, start_date, end_date)`` to fetch
+                missing data as a DataFrame indexed by date. Defaults to Yahoo Finance; pass a
+                fixture loader to use the store offline.
+        """
+        self.root = root
+        self.downloader = downloader or self.download_from_yahoo
+
+    @staticmethod
+    def download_from_yahoo(symbol, start_date, end_date):
+        """
+        Download daily OHLCV data from Yahoo Finance.
+
+        Returns:
+            pd.DataFrame: Stock data with flat column names.
+        """
+        data = yf.download(symbol, start=start_date, end=end_date, progress=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data
+
+    def coverage(self, symbol):
+        """
+        Date range already stored for a symbol.
+
+        Returns:
+            tuple: (start, end) as pd.Timestamp with ``end`` exclusive, or None if nothing is stored.
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def load(self, symbol, start_date, end_date, fetch_missing=True):
+        """
+        Load stock data for a date range, downloading only what is not stored yet.
+
+        Args:
+            symbol (str): Stock ticker.
+            start_date (str): First date of the range.
+            end_date (str): End of the range (exclusive, like ``yf.download``).
+            fetch_missing (bool): Whether to download and append dates outside the stored range.
+
+        Returns:
+            pd.DataFrame: Stock data indexed by date.
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+        if fetch_missing:
+            missing = self._missing_ranges(self.coverage(symbol), start, end)
+            if missing:
+                frames = [self.downloader(symbol, missing_start.strftime('%Y-%m-%d'), missing_end.strftime('%Y-%m-%d'))
+                          for missing_start, missing_end in missing]
+                self.append(symbol, pd.concat(frames), min(s for s, _ in missing), max(e for _, e in missing))
+
+        return self.read(symbol, start, end)
+
+    def read(self, symbol, start_date=None, end_date=None):
+        """
+        Read stored stock data without any network access.
+
+        Args:
+            symbol (str): Stock ticker.
+            start_date (str): First date of the range, or None for the first stored date.
+            end_date (str): End of the range (exclusive), or None for the last stored date.
+
+        Returns:
+            pd.DataFrame: Stock data indexed by date, empty if nothing is stored.
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return pd.DataFrame()
+
+        directory = self._symbol_dir(symbol)
+        dates = np.load(os.path.join(directory, self.INDEX_FILE), mmap_mode='r')
+        first = 0 if start_date is None else np.searchsorted(dates, pd.Timestamp(start_date).value, side='left')
+        last = len(dates) if end_date is None else np.searchsorted(dates, pd.Timestamp(end_date).value, side='left')
+
+        columns = {column: np.load(os.path.join(directory, self._column_file(column)), mmap_mode='r')[first:last]
+                   for column in meta['columns']}
+        index = pd.DatetimeIndex(np.asarray(dates[first:last]).view('datetime64[ns]'), name='Date')
+        return pd.DataFrame(columns, index=index)
+
+    def append(self, symbol, data, start_date, end_date):
+        """
+        Merge new stock data into the store and extend the covered date range.
+
+        Rows already stored for the same dates are replaced by the new ones.
+
+        Args:
+            symbol (str): Stock ticker.
+            data (pd.DataFrame): Stock data indexed by date.
+            start_date (str): First date the data covers.
+            end_date (str): End of the range the data covers (exclusive).
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        # Bars for today and later may still change, so they are never marked as covered
+        end = min(end, pd.Timestamp.today().normalize())
+
+        coverage = self.coverage(symbol)
+        if coverage is not None:
+            start, end = min(start, coverage[0]), max(end, coverage[1])
+            existing = self.read(symbol)
+            data = pd.concat([existing, data])
+
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+
+        directory = self._symbol_dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        self._save_array(directory, self.INDEX_FILE, data.index.values.astype('datetime64[ns]').view('int64'))
+        for column in data.columns:
+            self._save_array(directory, self._column_file(column), data[column].to_numpy())
+
+        # meta.json is written last so a crash mid-write leaves the previous coverage in place
+        meta = {'columns': [str(column) for column in data.columns],
+                'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d')}
+        temporary_path = os.path.join(directory, self.META_FILE + '.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(meta, file, indent=2)
+        os.replace(temporary_path, os.path.join(directory, self.META_FILE))
+
+    @staticmethod
+    def _missing_ranges(coverage, start, end):
+        """
+        Date ranges to download so that the stored range covers [start, end) and stays contiguous.
+        """
+        if coverage is None:
+            return [(start, end)] if start < end else []
+
+        covered_start, covered_end = coverage
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        return missing
+
+    @staticmethod
+    def _save_array(directory, filename, array):
+        temporary_path = os.path.join(directory, filename + '.tmp.npy')
+        np.save(temporary_path, np.ascontiguousarray(array))
+        os.replace(temporary_path, os.path.join(directory, filename))
+
+    @staticmethod
+    def _column_file(column):
+        return '{}.npy'.format(str(column).replace(' ', '_'))
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, symbol.upper())
+
+    def _read_meta(self, symbol):
+        path = os.path.join(self._symbol_dir(symbol), self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)
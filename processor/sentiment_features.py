@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+from sentiment_analysis.labels import LABEL_SIGNALS, normalize_label
+
+EXCHANGE_TIMEZONE = 'America/New_York'
+MARKET_CLOSE = '16:00'
+FEATURE_COLUMNS = ('signal', 'count', 'positive_ratio', 'decayed_score')
+
+NS_PER_DAY = 86400 * 10 ** 9
+
+
+def encode_signals(labels):
+    """
+    Map sentiment labels to +1 (positive), -1 (negative) and 0 (neutral or unknown).
+
+    Labels are converted to a categorical first, so each distinct label string is normalized
+    once and the per-row work is a single integer lookup.
+
+    Args:
+        labels (pd.Series): Sentiment labels such as ' Positive' or 'NEGATIVE'.
+
+    Returns:
+        np.ndarray: int8 signal per label.
+    """
+    categorical = labels.astype('category')
+    # The extra trailing 0 is picked up by the -1 code of missing labels
+    lookup = np.array([LABEL_SIGNALS.get(normalize_label(category), 0) for category in categorical.cat.categories] + [0],
+                      dtype=np.int8)
+    return lookup[categorical.cat.codes.to_numpy()]
+
+
+def trading_holidays(sessions):
+    """
+    Find the weekdays without a session between the first and last trading session.
+
+    Passed as `holidays`, they roll the news of exchange holidays forward to the next session
+    instead of onto a day without prices.
+
+    Args:
+        sessions (pd.DatetimeIndex): Trading sessions, e.g. the index of the daily stock data.
+
+    Returns:
+        np.ndarray: Holidays as datetime64[D] dates.
+    """
+    sessions = np.unique(pd.DatetimeIndex(sessions).values.astype('datetime64[D]'))
+    if len(sessions) == 0:
+        return sessions
+    calendar = np.arange(sessions[0], sessions[-1] + 1)
+    weekdays = calendar[np.is_busday(calendar)]
+    return weekdays[~np.isin(weekdays, sessions)]
+
+
+def session_days(timestamps, timezone=EXCHANGE_TIMEZONE, market_close=MARKET_CLOSE, holidays=None):
+    """
+    Assign each timestamp to the trading session its news can first affect.
+
+    News published at or after the market close in the exchange timezone rolls to the next day,
+    and weekend or holiday news rolls forward to the next business day.
+
+    Args:
+        timestamps (pd.Series): Publication timestamps; naive values are taken as UTC.
+        timezone (str): Exchange timezone.
+        market_close (str): Local market close time as "HH:MM".
+        holidays (list): Optional exchange holidays as dates.
+
+    Returns:
+        np.ndarray: int64 session day per timestamp, counted in days since 1970-01-01.
+    """
+    local = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).tz_convert(timezone).tz_localize(None)
+    local_ns = local.values.astype('datetime64[ns]').view('int64')
+
+    days = local_ns // NS_PER_DAY
+    close_ns = pd.Timedelta(market_close + ':00').value
+    days += (local_ns - days * NS_PER_DAY) >= close_ns
+
+    holidays = [] if holidays is None else np.asarray(holidays, dtype='datetime64[D]')
+    return np.busday_offset(days.astype('datetime64[D]'), 0, roll='forward', holidays=holidays).view('int64')
+
+
+def session_day(timestamp, timezone=EXCHANGE_TIMEZONE, market_close=MARKET_CLOSE, holidays=None):
+    """
+    Scalar counterpart of `session_days` for a single timestamp, used when headlines arrive one at a time.
+
+    Args:
+        timestamp (str or datetime): Publication timestamp; naive values are taken as UTC.
+        timezone (str): Exchange timezone.
+        market_close (str): Local market close time as "HH:MM".
+        holidays (list): Optional exchange holidays as dates.
+
+    Returns:
+        int: Session day, counted in days since 1970-01-01.
+    """
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    local = timestamp.tz_convert(timezone)
+
+    day = np.datetime64(local.date(), 'D')
+    if local.strftime('%H:%M') >= market_close:
+        day += 1
+
+    holidays = [] if holidays is None else np.asarray(holidays, dtype='datetime64[D]')
+    return int(np.busday_offset(day, 0, roll='forward', holidays=holidays).astype(np.int64))
+
+
+def aggregate_daily_sentiment(sentiment_data, timestamp_column='timestamp', label_column='sentiment',
+                              symbol_column=None, halflife=3, timezone=EXCHANGE_TIMEZONE,
+                              market_close=MARKET_CLOSE, holidays=None):
+    """
+    Aggregate scored headlines into daily sentiment features in one vectorized pass.
+
+    The output has one row per business day between the first and last session with news
+    (per symbol when a symbol column is given), with the following features:
+
+    - signal: Net score, the number of positive minus negative headlines.
+    - count: Number of headlines.
+    - positive_ratio: Share of positive headlines, 0 on days without news.
+    - decayed_score: Exponentially weighted mean of the net score over business days.
+
+    Args:
+        sentiment_data (pd.DataFrame): Scored headlines.
+        timestamp_column (str): Column holding publication timestamps.
+        label_column (str): Column holding sentiment labels.
+        symbol_column (str): Optional column holding stock symbols.
+        halflife (float): Half-life of the decayed score in business days.
+        timezone (str): Exchange timezone used for session alignment.
+        market_close (str): Local market close time as "HH:MM".
+        holidays (list): Optional exchange holidays as dates.
+
+    Returns:
+        pd.DataFrame: Daily features indexed by 'date', or by ('symbol', 'date') with a symbol column.
+    """
+    signals = encode_signals(sentiment_data[label_column])
+    frame = pd.DataFrame({
+        'day': session_days(sentiment_data[timestamp_column], timezone, market_close, holidays),
+        'signal': signals.astype(np.int64),
+        'count': np.ones(len(signals), dtype=np.int64),
+        'positive': (signals == 1).astype(np.int64),
+    })
+
+    keys = ['day']
+    if symbol_column is not None:
+        frame.insert(0, 'symbol', sentiment_data[symbol_column].astype('category').to_numpy())
+        keys = ['symbol', 'day']
+
+    daily = frame.groupby(keys, sort=True, observed=True).sum()
+    if daily.empty:
+        index = pd.DatetimeIndex([], name='date')
+        if symbol_column is not None:
+            index = pd.MultiIndex.from_arrays([pd.Index([], dtype=object), index], names=['symbol', 'date'])
+        return pd.DataFrame({column: pd.Series(dtype=np.float64) for column in FEATURE_COLUMNS}, index=index)
+
+    # Densify to every business day so days without news count as zero and decay over time
+    holidays = [] if holidays is None else np.asarray(holidays, dtype='datetime64[D]')
+    days = daily.index.get_level_values('day')
+    calendar = np.arange(days.min(), days.max() + 1).astype('datetime64[D]')
+    business_days = calendar[np.is_busday(calendar, holidays=holidays)].view('int64')
+    if symbol_column is None:
+        dense_index = pd.Index(business_days, name='day')
+    else:
+        # Each symbol spans its own first to last session with news
+        bounds = pd.Series(days, index=daily.index.get_level_values('symbol')).groupby(level=0, sort=False,
+                                                                                       observed=True).agg(['min', 'max'])
+        firsts = np.searchsorted(business_days, bounds['min'].to_numpy(), side='left')
+        lasts = np.searchsorted(business_days, bounds['max'].to_numpy(), side='right')
+        dense_index = pd.MultiIndex.from_arrays([
+            np.repeat(bounds.index.to_numpy(), lasts - firsts),
+            np.concatenate([business_days[first:last] for first, last in zip(firsts, lasts)]),
+        ], names=keys)
+    daily = daily.reindex(dense_index, fill_value=0)
+
+    counts = daily['count'].to_numpy()
+    daily['positive_ratio'] = np.divide(daily['positive'].to_numpy(), counts, out=np.zeros(len(daily)),
+                                        where=counts > 0)
+    net = daily['signal'].astype(np.float64)
+    if symbol_column is None:
+        daily['decayed_score'] = net.ewm(halflife=halflife).mean()
+    else:
+        daily['decayed_score'] = net.groupby(level='symbol', sort=False).transform(
+            lambda series: series.ewm(halflife=halflife).mean())
+
+    daily = daily.drop(columns='positive').reset_index()
+    daily['date'] = daily.pop('day').to_numpy().astype('datetime64[D]').astype('datetime64[ns]')
+    return daily.set_index(['symbol', 'date'] if symbol_column is not None else 'date')[list(FEATURE_COLUMNS)]
@@ -1,53 +1,93 @@
 import yfinance as yf
 import pandas as pd
 
+from processor.incremental_sentiment import INCREMENTAL_FEATURE_COLUMNS, IncrementalSentimentAggregator
+from processor.sentiment_features import FEATURE_COLUMNS, aggregate_daily_sentiment, trading_holidays
+from profiling.tracer import span
+
 
 class StockDataProcessor:
-    def __init__(self, stock_ticker, start_date, end_date, sentiment_data_path):
+    def __init__(self, stock_ticker, start_date, end_date, sentiment_data_path, market_data_store=None,
+                 sentiment_store=None):
+        """
+        Args:
+            stock_ticker (str): Stock Ticker name.
+            start_date (str): Start date of the stock data.
+            end_date (str): End date of the stock data.
+            sentiment_data_path (str): Path of the sentiment CSV file.
+            market_data_store (MarketDataStore): Optional local store read before downloading.
+            sentiment_store (SentimentRecordStore): Optional store of scored news records, read
+                instead of the sentiment CSV file.
+        """
         self.stock_ticker = stock_ticker
         self.start_date = start_date
         self.end_date = end_date
         self.sentiment_data_path = sentiment_data_path
+        self.market_data_store = market_data_store
+        self.sentiment_store = sentiment_store
         self.data = self.download_stock_data()
 
     def download_stock_data(self):
         """
         Download stock data from Yahoo Finance.
 
+        When a market data store is configured, stored dates are read from disk and only the
+        missing ones are downloaded and appended to the store.
+
         Returns:
             pd.DataFrame: Stock data.
         """
-        return yf.download(self.stock_ticker, start=self.start_date, end=self.end_date)
+        with span('download_stock_data'):
+            if self.market_data_store is not None:
+                return self.market_data_store.load(self.stock_ticker, self.start_date, self.end_date)
+            return yf.download(self.stock_ticker, start=self.start_date, end=self.end_date)
 
-    def preprocess_sentiment_data(self):
+    def preprocess_sentiment_data(self, halflife=3, holidays=None, incremental=False, window=20):
         """
         Preprocess sentiment data and merge with stock data.
 
-        Returns:
-            pd.DataFrame: Merged DataFrame.
-        """
-        sentiment_data = pd.read_csv(self.sentiment_data_path)
-
-        # Create a column for buy/sell signals based on sentiment
-        sentiment_data['signal'] = 0
-        sentiment_data.loc[sentiment_data['sentiment'] == ' Positive', 'signal'] = 1
-        sentiment_data.loc[sentiment_data['sentiment'] == ' Negative', 'signal'] = -1
+        Headlines are aligned to exchange sessions (news after the close, on weekends or on
+        holidays counts for the next trading day) and aggregated into daily features by `aggregate_daily_sentiment`: the net
+        'signal' used by the strategies, 'count', 'positive_ratio' and 'decayed_score'.
 
-        # Assuming df is your existing DataFrame
-        sentiment_data['timestamp'] = pd.to_datetime(sentiment_data['timestamp']).dt.date
+        With `incremental`, the headlines are instead replayed through an
+        IncrementalSentimentAggregator, which adds the rolling features and z-score and gives the
+        backtest exactly the features a live loop computes.
 
-        # Group by day and sum up 'Signal' values
-        sentiment_daily_sum = sentiment_data.groupby('timestamp')['signal'].sum().reset_index()
-        sentiment_daily_sum = sentiment_daily_sum.rename(columns={'timestamp': 'date', 'signal': 'signal'})
+        Args:
+            halflife (float): Half-life of the decayed score in business days.
+            holidays (list): Exchange holidays as dates, by default the weekdays missing from the stock data.
+            incremental (bool): Aggregate with IncrementalSentimentAggregator.
+            window (int): Number of sessions of the rolling features when `incremental` is set.
 
-        sentiment_daily_sum['date'] = pd.to_datetime(sentiment_daily_sum['date'])
+        Returns:
+            pd.DataFrame: Merged DataFrame.
+        """
+        if holidays is None:
+            holidays = trading_holidays(self.data.index)
 
-        # sentiment_daily_sum.to_csv('sentiment_daily_sum.csv')
+        with span('read_sentiment_data'):
+            if self.sentiment_store is not None:
+                records = self.sentiment_store.read(self.stock_ticker, end_date=self.end_date)
+                sentiment_data = records.to_frame()[['timestamp', 'sentiment']]
+            else:
+                sentiment_data = pd.read_csv(self.sentiment_data_path, usecols=['timestamp', 'sentiment'],
+                                             dtype={'sentiment': 'category'})
 
-        # Merge DataFrames on 'Date'
-        merged_df = pd.merge(self.data, sentiment_daily_sum, left_index=True, right_on='date', how='left')
-        merged_df.set_index('date', inplace=True)
+        with span('aggregate_sentiment'):
+            if incremental:
+                feature_columns = list(INCREMENTAL_FEATURE_COLUMNS)
+                sentiment_daily = IncrementalSentimentAggregator.aggregate(sentiment_data, window=window,
+                                                                           halflife=halflife, holidays=holidays)
+            else:
+                feature_columns = list(FEATURE_COLUMNS)
+                sentiment_daily = aggregate_daily_sentiment(sentiment_data, halflife=halflife, holidays=holidays)
 
-        # merged_df.to_csv('merged_df.csv')
+        # Merge DataFrames on 'date'; days outside the news history carry no sentiment
+        with span('merge'):
+            merged_df = self.data.join(sentiment_daily, how='left')
+            merged_df[feature_columns] = merged_df[feature_columns].fillna(0)
+            merged_df[['signal', 'count']] = merged_df[['signal', 'count']].astype('int64')
+            merged_df.index.name = 'date'
 
-        return sentiment_data
+        return merged_df
@@ -0,0 +1,77 @@
+import bisect
+import math
+
+
+class LatencyHistogram:
+    """
+    A fixed-memory latency histogram with logarithmic buckets.
+
+    Bucket bounds grow by `growth` from `min_seconds`, so percentiles are reported with a
+    relative error below `growth - 1` whatever the number of samples.
+
+    Attributes:
+        bounds (list): Upper bound of each bucket in seconds; the last bucket is unbounded.
+        counts (list): Number of samples per bucket.
+    """
+
+    def __init__(self, min_seconds=1e-5, max_seconds=100.0, growth=1.1):
+        """
+        Initializes an empty LatencyHistogram.
+
+        Args:
+            min_seconds (float): Upper bound of the first bucket.
+            max_seconds (float): Latency beyond which samples fall in the last, unbounded bucket.
+            growth (float): Ratio between consecutive bucket bounds.
+        """
+        buckets = int(math.ceil(math.log(max_seconds / min_seconds, growth))) + 1
+        self.bounds = [min_seconds * growth ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """
+        Adds one sample.
+
+        Args:
+            seconds (float): Measured latency.
+        """
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """
+        Estimates a latency percentile.
+
+        Args:
+            q (float): Percentile in [0, 100].
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile, capped at the largest sample; 0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.count)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self):
+        """
+        Returns:
+            dict: Sample count and mean, p50, p90, p99 and max latency in milliseconds.
+        """
+        return {
+            'count': self.count,
+            'mean_ms': 1000.0 * self.total / self.count if self.count else 0.0,
+            'p50_ms': 1000.0 * self.percentile(50),
+            'p90_ms': 1000.0 * self.percentile(90),
+            'p99_ms': 1000.0 * self.percentile(99),
+            'max_ms': 1000.0 * self.max,
+        }
@@ -0,0 +1,366 @@
+"""
+Spans, counters and an optional cProfile dump for the backtest and sentiment pipelines.
+
+Code is instrumented once with `span` blocks, `traced` functions and `count` calls. They do
+nothing until a Profiler is started, so the instrumentation stays in place with a single global
+lookup of overhead per call when profiling is off:
+
+    with Profiler('output/profile_trace.json', cprofile_path='output/profile.prof') as profiler:
+        with span('backtest'):
+            ...
+    print(profiler.report())
+
+Every span records its wall time, the CPU time of its thread and, with `track_memory`, the bytes
+it allocated and its peak traced memory. The JSON trace holds one complete event per span in the
+Chrome trace event format, so it opens as a flame chart in Perfetto or chrome://tracing, plus a
+'summary' with the aggregated span statistics and counters. The cProfile dump can be explored
+with pstats or turned into a flamegraph with tools such as snakeviz or flameprof.
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from profiling.histogram import LatencyHistogram
+
+# The running Profiler; spans and counters are no-ops while it is None
+_profiler = None
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name):
+    """
+    Context manager timing its block under `name` when a profiler is running.
+
+    Args:
+        name (str): Span name; spans of the same name are aggregated.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return _Span(profiler, name)
+
+
+def traced(name=None):
+    """
+    Decorator timing every call of a function as a span.
+
+    Args:
+        name (str): Span name, by default the qualified name of the function, e.g. "OptimizedStrategy.next".
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            with _Span(profiler, span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, amount=1):
+    """
+    Increments a counter when a profiler is running.
+
+    Args:
+        name (str): Counter name.
+        amount (int or float): Increment.
+    """
+    profiler = _profiler
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def active_profiler():
+    """
+    Returns:
+        Profiler: The running profiler, or None.
+    """
+    return _profiler
+
+
+class _Span:
+    __slots__ = ('profiler', 'name')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit()
+        return False
+
+
+class _Frame:
+    """An open span: its start times, the traced memory at its start and the highest peak seen inside it."""
+
+    __slots__ = ('name', 'started_at', 'cpu_started_at', 'memory_start', 'peak')
+
+    def __init__(self, name, memory_start):
+        self.name = name
+        self.memory_start = memory_start
+        self.peak = memory_start
+
+
+class _SpanStats:
+    """Aggregated statistics of the spans of one name."""
+
+    __slots__ = ('wall', 'cpu_seconds', 'allocated_bytes', 'peak_bytes')
+
+    def __init__(self):
+        self.wall = LatencyHistogram(min_seconds=1e-6, max_seconds=1e4)
+        self.cpu_seconds = 0.0
+        self.allocated_bytes = 0
+        self.peak_bytes = 0
+
+    def summary(self):
+        wall = self.wall.summary()
+        return {
+            'count': wall['count'],
+            'wall_seconds': self.wall.total,
+            'mean_ms': wall['mean_ms'],
+            'p50_ms': wall['p50_ms'],
+            'p99_ms': wall['p99_ms'],
+            'max_ms': wall['max_ms'],
+            'cpu_seconds': self.cpu_seconds,
+            'allocated_bytes': self.allocated_bytes,
+            'peak_bytes': self.peak_bytes,
+        }
+
+
+class Profiler:
+    """
+    Collects the spans and counters of the code running between `start` and `stop`.
+
+    Only one profiler runs at a time. Spans nest per thread; memory is traced process-wide, so
+    the allocations of spans running concurrently in several threads are attributed to each of them.
+    """
+
+    def __init__(self, trace_path=None, track_memory=True, cprofile_path=None, max_events=100000):
+        """
+        Args:
+            trace_path (str): JSON trace file written by `stop`, or None to keep the results in memory.
+            track_memory (bool): Trace allocations with tracemalloc, which slows Python code down noticeably.
+            cprofile_path (str): File the cProfile statistics of the whole run are dumped to, or None.
+            max_events (int): Maximum number of span events kept for the trace; statistics cover every span.
+        """
+        self.trace_path = trace_path
+        self.track_memory = track_memory
+        self.cprofile_path = cprofile_path
+        self.max_events = max_events
+        self.spans = {}
+        self.counters = {}
+        self.events = []
+        self.dropped_events = 0
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_memory_bytes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._tracemalloc = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        """
+        Start collecting and make this profiler the running one.
+
+        Returns:
+            Profiler: self.
+
+        Raises:
+            RuntimeError: If another profiler is running.
+        """
+        global _profiler
+        if _profiler is not None:
+            raise RuntimeError("A profiler is already running.")
+
+        if self.track_memory:
+            # tracemalloc and cProfile are imported on demand to keep the instrumented modules cheap to import
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+        if self.cprofile_path is not None:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started_at = time.perf_counter()
+        self._cpu_started_at = time.process_time()
+        _profiler = self
+        return self
+
+    def stop(self):
+        """
+        Stop collecting, then write the trace and the cProfile dump when their paths are set.
+        """
+        global _profiler
+        _profiler = None
+        self.wall_seconds = time.perf_counter() - self._started_at
+        self.cpu_seconds = time.process_time() - self._cpu_started_at
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            _make_parent_directory(self.cprofile_path)
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            self.peak_memory_bytes = max(self.peak_memory_bytes, tracemalloc.get_traced_memory()[1])
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+        self._tracemalloc = None
+        if self.trace_path is not None:
+            self.save(self.trace_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name):
+        stack = self._stack()
+        memory_start = 0
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None:
+            # Hand the peak so far to the enclosing span, then measure this span's peak from here
+            memory_start, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self.peak_memory_bytes = max(self.peak_memory_bytes, peak)
+            tracemalloc.reset_peak()
+
+        frame = _Frame(name, memory_start)
+        stack.append(frame)
+        # Read the clocks last so the bookkeeping above is not attributed to the span
+        frame.cpu_started_at = time.thread_time()
+        frame.started_at = time.perf_counter()
+
+    def _exit(self):
+        ended_at = time.perf_counter()
+        cpu_ended_at = time.thread_time()
+        stack = self._stack()
+        frame = stack.pop()
+
+        allocated = peak = 0
+        if self._tracemalloc is not None:
+            current, peak = self._tracemalloc.get_traced_memory()
+            peak = max(peak, frame.peak)
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self.peak_memory_bytes = max(self.peak_memory_bytes, peak)
+            allocated = current - frame.memory_start
+            peak -= frame.memory_start
+
+        wall_seconds = ended_at - frame.started_at
+        cpu_seconds = cpu_ended_at - frame.cpu_started_at
+        with self._lock:
+            stats = self.spans.get(frame.name)
+            if stats is None:
+                stats = self.spans[frame.name] = _SpanStats()
+            stats.wall.record(wall_seconds)
+            stats.cpu_seconds += cpu_seconds
+            stats.allocated_bytes += allocated
+            stats.peak_bytes = max(stats.peak_bytes, peak)
+
+            if len(self.events) < self.max_events:
+                self.events.append({
+                    'name': frame.name,
+                    'ph': 'X',
+                    'ts': 1e6 * (frame.started_at - self._started_at),
+                    'dur': 1e6 * wall_seconds,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': {'cpu_ms': 1000.0 * cpu_seconds, 'allocated_bytes': allocated, 'peak_bytes': peak},
+                })
+            else:
+                self.dropped_events += 1
+
+    def count(self, name, amount=1):
+        """
+        Increments a counter.
+
+        Args:
+            name (str): Counter name.
+            amount (int or float): Increment.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """
+        Returns:
+            dict: Wall and CPU time of the run, peak traced memory, counters and the statistics of
+            every span name, sorted by total wall time.
+        """
+        spans = sorted(((name, stats.summary()) for name, stats in self.spans.items()),
+                       key=lambda item: item[1]['wall_seconds'], reverse=True)
+        return {
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_memory_bytes': self.peak_memory_bytes if self.track_memory else None,
+            'dropped_events': self.dropped_events,
+            'counters': dict(self.counters),
+            'spans': dict(spans),
+        }
+
+    def save(self, path):
+        """
+        Write the trace events and the summary to a JSON file.
+
+        Args:
+            path (str): Destination file.
+        """
+        import json
+
+        _make_parent_directory(path)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'summary': self.summary()}, file)
+
+    def report(self):
+        """
+        Formats the span statistics and counters as a table.
+
+        Returns:
+            str: One line per span name with its count, total wall time, mean and p99 latency,
+            CPU time and allocations, followed by the counters.
+        """
+        lines = ["{:<40} {:>8} {:>10} {:>10} {:>10} {:>10} {:>12} {:>10}".format(
+            "Span", "Count", "Wall (s)", "Mean ms", "p99 ms", "CPU (s)", "Alloc (MB)", "Peak (MB)")]
+        for name, summary in self.summary()['spans'].items():
+            lines.append("{:<40} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>12.2f} {:>10.2f}".format(
+                name, summary['count'], summary['wall_seconds'], summary['mean_ms'], summary['p99_ms'],
+                summary['cpu_seconds'], summary['allocated_bytes'] / 2 ** 20, summary['peak_bytes'] / 2 ** 20))
+        for name, value in sorted(self.counters.items()):
+            lines.append("{:<40} {:>8}".format(name, value))
+        return '\n'.join(lines)
+
+
+def _make_parent_directory(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,335 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+# Scalar metrics of a run, stored as columns of the run index so runs can be filtered and sorted in SQL
+METRIC_COLUMNS = (
+    'initial_value', 'final_value', 'total_return', 'annual_return', 'max_drawdown', 'sharpe_ratio',
+    'value_at_risk', 'sqn', 'vwr', 'total_trades',
+)
+
+# Per-run tables persisted as Parquet files
+FRAME_NAMES = ('value', 'returns', 'positions', 'transactions')
+
+
+class BacktestResult:
+    """
+    Compact result of one backtest run: scalar metrics, raw analyzer outputs, the broker value per
+    bar and, for the 'full' analyzer profile, the PyFolio returns, positions and transactions.
+
+    Attributes:
+        run_id (str): Unique identifier of the run.
+        stock_ticker (str): Stock Ticker name.
+        start_date (str): Start date of the backtest.
+        end_date (str): End date of the backtest.
+        strategy (str): Strategy class name.
+        params (dict): Strategy parameters overriding the class defaults.
+        metrics (dict): Values of METRIC_COLUMNS, None where the analyzers could not compute them.
+        analyzers (dict): JSON-serializable output of every analyzer but PyFolio.
+        frames (dict): DataFrames of FRAME_NAMES; runs without the PyFolio analyzer only have 'value'.
+    """
+
+    def __init__(self, run_id, stock_ticker, start_date, end_date, strategy, params, metrics, analyzers, frames):
+        self.run_id = run_id
+        self.stock_ticker = stock_ticker
+        self.start_date = start_date
+        self.end_date = end_date
+        self.strategy = strategy
+        self.params = params
+        self.metrics = metrics
+        self.analyzers = analyzers
+        self.frames = frames
+
+    @staticmethod
+    def new_run_id():
+        """
+        Returns:
+            str: Time-ordered unique run identifier.
+        """
+        return '{}-{}'.format(time.strftime('%Y%m%dT%H%M%S'), uuid.uuid4().hex[:8])
+
+    @classmethod
+    def from_strategy(cls, thestrat, cerebro, stock_ticker, start_date, end_date, strategy_params=None):
+        """
+        Collect the results of a finished Cerebro run.
+
+        Args:
+            thestrat (bt.Strategy): Strategy instance returned by `cerebro.run()`.
+            cerebro (bt.Cerebro): The engine that ran it.
+            stock_ticker (str): Stock Ticker name.
+            start_date (str): Start date of the backtest.
+            end_date (str): End date of the backtest.
+            strategy_params (dict): Strategy parameters overriding the class defaults.
+
+        Returns:
+            BacktestResult: Result of the run.
+        """
+        analyzers = {}
+        frames = {}
+        for name in thestrat.analyzers.getnames():
+            analyzer = thestrat.analyzers.getbyname(name)
+            if name == 'pyfolio':
+                returns, positions, transactions, _ = analyzer.get_pf_items()
+                frames.update({
+                    'returns': returns.rename('return').to_frame(),
+                    'positions': positions,
+                    'transactions': transactions,
+                })
+            elif name == 'equitycurve':
+                frames['value'] = analyzer.get_analysis().to_frame()
+            else:
+                analyzers[name] = json.loads(json.dumps(analyzer.get_analysis(), default=str))
+
+        returns = analyzers.get('returns', {})
+        trades = analyzers.get('tradeanalyzer', {})
+        # Daily returns of the broker value, the first one relative to the starting cash
+        daily_returns = None
+        if 'value' in frames and len(frames['value']):
+            values = frames['value']['value']
+            daily_returns = values.pct_change().fillna(values.iloc[0] / cerebro.broker.startingcash - 1)
+
+        metrics = {
+            'initial_value': cerebro.broker.startingcash,
+            'final_value': cerebro.broker.getvalue(),
+            'total_return': returns.get('rtot'),
+            # Assuming 252 trading days in a year
+            'annual_return': returns['ravg'] * 252 if 'ravg' in returns else None,
+            'max_drawdown': analyzers.get('drawdown', {}).get('max', {}).get('drawdown'),
+            'sharpe_ratio': analyzers.get('sharperatio', {}).get('sharperatio'),
+            # Historical one-day 95% Value at Risk, as a positive fraction of the portfolio
+            'value_at_risk': -float(daily_returns.quantile(0.05)) if daily_returns is not None else None,
+            'sqn': analyzers.get('sqn', {}).get('sqn'),
+            'vwr': analyzers.get('vwr', {}).get('vwr'),
+            'total_trades': trades.get('total', {}).get('total', 0),
+        }
+
+        return cls(cls.new_run_id(), stock_ticker, start_date, end_date, type(thestrat).__name__,
+                   dict(strategy_params or {}), metrics, analyzers, frames)
+
+    @classmethod
+    def from_portfolio(cls, portfolio, symbols, start_date, end_date, strategy, strategy_params=None):
+        """
+        Collect the results of a sharded portfolio run.
+
+        Args:
+            portfolio (dict): Merged shard results, see `runner.portfolio.merge_shards`.
+            symbols (list): Stock tickers of the portfolio.
+            start_date (str): Start date of the backtest.
+            end_date (str): End date of the backtest.
+            strategy (type): Backtrader strategy class.
+            strategy_params (dict): Strategy parameters overriding the class defaults.
+
+        Returns:
+            BacktestResult: Result of the run, with the per-asset PnL under the 'assetpnl' analyzer.
+        """
+        daily_returns = portfolio['returns']
+        bars = len(daily_returns)
+        metrics = {
+            'initial_value': portfolio['initial_value'],
+            'final_value': portfolio['final_value'],
+            'total_return': portfolio['total_return'],
+            # Like the Returns analyzer: the mean log return per bar, over 252 trading days
+            'annual_return': portfolio['total_return'] / bars * 252 if bars else None,
+            'max_drawdown': portfolio['max_drawdown'],
+            'sharpe_ratio': portfolio['sharpe_ratio'],
+            'value_at_risk': -float(daily_returns.quantile(0.05)) if bars else None,
+            'sqn': None,
+            'vwr': None,
+            'total_trades': sum(asset['trades'] for asset in portfolio['asset_pnl'].values()),
+        }
+        analyzers = {
+            'portfolio': {'symbols': list(symbols), 'volatility': portfolio['volatility']},
+            'assetpnl': portfolio['asset_pnl'],
+        }
+        frames = {'value': portfolio['equity'].to_frame(), 'returns': daily_returns.to_frame()}
+
+        return cls(cls.new_run_id(), ','.join(symbols), start_date, end_date, strategy.__name__,
+                   dict(strategy_params or {}), metrics, analyzers, frames)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Run identification and metrics, one flat row of the run index.
+        """
+        row = {
+            'run_id': self.run_id,
+            'stock_ticker': self.stock_ticker,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'strategy': self.strategy,
+            'params': self.params,
+        }
+        row.update(self.metrics)
+        return row
+
+    def print_report(self):
+        """
+        Print the backtesting report.
+        """
+        metrics = self.metrics
+
+        def percent(value):
+            return 'n/a' if value is None else '{:.2f}%'.format(value)
+
+        portfolio = self.analyzers.get('portfolio')
+        if portfolio is None:
+            print("\n--- Backtesting Report ---")
+            print("Stock Ticker: {}".format(self.stock_ticker))
+        else:
+            print("\n--- Portfolio Backtesting Report ---")
+            print("Stock Tickers: {}".format(len(portfolio['symbols'])))
+        print("Start Date: {}".format(self.start_date))
+        print("End Date: {}".format(self.end_date))
+        print("Initial Portfolio Value: ${:.2f}".format(metrics['initial_value']))
+        print("Final Portfolio Value: ${:.2f}".format(metrics['final_value']))
+        print("Total Return: {}".format(percent(None if metrics['total_return'] is None
+                                                else metrics['total_return'] * 100)))
+        print("Annualized Return: {}".format(percent(None if metrics['annual_return'] is None
+                                                     else metrics['annual_return'] * 100)))
+        # DrawDown already reports the drawdown in percent
+        print("Max Drawdown: {}".format(percent(metrics['max_drawdown'])))
+        if portfolio is not None:
+            print("Annualized Volatility: {}".format(percent(portfolio['volatility'] * 100)))
+
+        # Print Additional Metrics
+        print("\n--- Additional Metrics ---")
+        print("{:<15} {:<15} {:<15} {:<15}".format("Value at Risk", "VWR", "SQN", "Total Trades"))
+        print("{:<15} {:<15} {:<15} {:<15}".format(
+            percent(None if metrics['value_at_risk'] is None else metrics['value_at_risk'] * 100),
+            'n/a' if metrics['vwr'] is None else '{:.4f}'.format(metrics['vwr']),
+            'n/a' if metrics['sqn'] is None else '{:.4f}'.format(metrics['sqn']),
+            metrics['total_trades']))
+
+        asset_pnl = self.analyzers.get('assetpnl')
+        if asset_pnl is not None:
+            print("\n--- Per-Asset Results ---")
+            print("{:<10} {:>15} {:>10}".format("Ticker", "Net PnL", "Trades"))
+            ranked = sorted(asset_pnl.items(), key=lambda item: item[1]['pnlcomm'], reverse=True)
+            for symbol, asset in ranked:
+                print("{:<10} {:>15.2f} {:>10}".format(symbol, asset['pnlcomm'], asset['trades']))
+
+
+class ResultStore:
+    """
+    Persistent store of backtest results for large batches of runs.
+
+    Every run's broker value per bar and, with PyFolio, its returns, positions and transactions are
+    written to Parquet files in a directory named after the run, and its metrics, parameters and
+    analyzer outputs to one row of a SQLite run index. Runs can then be filtered and ranked with
+    SQL, and their curves read back, without re-executing them.
+
+    Attributes:
+        root (str): Directory holding the run index and one sub-directory per run.
+    """
+
+    INDEX_FILE = 'runs.sqlite'
+
+    def __init__(self, root='output/runs'):
+        """
+        Args:
+            root (str): Directory holding the run index and one sub-directory per run.
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        self._connection = sqlite3.connect(os.path.join(root, self.INDEX_FILE), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS runs ('
+            'run_id TEXT PRIMARY KEY, created_at REAL NOT NULL, stock_ticker TEXT, start_date TEXT, end_date TEXT, '
+            'strategy TEXT, params TEXT, {}, analyzers TEXT)'.format(
+                ', '.join('{} REAL'.format(column) for column in METRIC_COLUMNS))
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS runs_stock_ticker ON runs (stock_ticker)')
+        self._connection.commit()
+
+    def save(self, result):
+        """
+        Persist a run: its frames as Parquet files, then its row in the run index.
+
+        Args:
+            result (BacktestResult): Result to store.
+
+        Returns:
+            str: The run identifier.
+        """
+        if result.frames:
+            directory = os.path.join(self.root, result.run_id)
+            os.makedirs(directory, exist_ok=True)
+            for name, frame in result.frames.items():
+                frame = frame.copy()
+                frame.columns = [str(column) for column in frame.columns]
+                frame.to_parquet(os.path.join(directory, name + '.parquet'))
+
+        row = [result.run_id, time.time(), result.stock_ticker, str(result.start_date), str(result.end_date),
+               result.strategy, json.dumps(result.params, default=str)]
+        row += [result.metrics.get(column) for column in METRIC_COLUMNS]
+        row.append(json.dumps(result.analyzers))
+
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO runs VALUES ({})'.format(','.join('?' * len(row))), row)
+            self._connection.commit()
+        return result.run_id
+
+    def query(self, where=None, parameters=(), order_by='created_at', limit=None):
+        """
+        Query the run index.
+
+        Args:
+            where (str): Optional SQL condition, e.g. "stock_ticker = ? AND sharpe_ratio > 1".
+            parameters (tuple): Values bound to the placeholders of `where`.
+            order_by (str): SQL ordering, e.g. "sharpe_ratio DESC".
+            limit (int): Maximum number of runs returned.
+
+        Returns:
+            pd.DataFrame: One row per run with its metrics; `params` is decoded to a dict.
+        """
+        sql = 'SELECT run_id, created_at, stock_ticker, start_date, end_date, strategy, params, {} FROM runs'.format(
+            ', '.join(METRIC_COLUMNS))
+        if where:
+            sql += ' WHERE ' + where
+        if order_by:
+            sql += ' ORDER BY ' + order_by
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(limit)
+
+        with self._lock:
+            runs = pd.read_sql_query(sql, self._connection, params=parameters)
+        runs['params'] = runs['params'].map(json.loads)
+        return runs
+
+    def analyzers(self, run_id):
+        """
+        Returns:
+            dict: Stored analyzer outputs of a run.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT analyzers FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return json.loads(row[0])
+
+    def load_frame(self, run_id, name):
+        """
+        Read one of the stored frames of a run.
+
+        Args:
+            run_id (str): Run identifier.
+            name (str): One of FRAME_NAMES.
+
+        Returns:
+            pd.DataFrame: The stored frame.
+        """
+        return pd.read_parquet(os.path.join(self.root, run_id, name + '.parquet'))
+
+    def close(self):
+        """
+        Closes the run index connection.
+        """
+        self._connection.close()
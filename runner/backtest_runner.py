@@ -1,72 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import backtrader as bt
+import pandas as pd
+
+from profiling.tracer import span
+from runner.backtest_results import BacktestResult
+from runner.portfolio import EquityCurve, merge_shards, run_shard
 
 from strategies.technical_with_sentiment_strategy.optimized_strategy import OptimizedStrategy
-from strategies.technical_with_sentiment_strategy.sentiment_data import SentimentData
+from strategies.technical_with_sentiment_strategy.sentiment_data import SentimentData, SentimentPandasData
+
+# Sharpe ratio of daily returns, annualized: the default yearly returns give no ratio on less than two years of data
+SHARPE_RATIO_PARAMS = {'timeframe': bt.TimeFrame.Days, 'annualize': True, 'riskfreerate': 0.0}
+
+# Analyzers added to each run; 'light' skips the per-run cost of SQN, VWR and PyFolio but keeps the equity curve
+ANALYZER_PROFILES = {
+    'full': (
+        (bt.analyzers.Returns, {}),
+        (bt.analyzers.SharpeRatio, SHARPE_RATIO_PARAMS),
+        (bt.analyzers.DrawDown, {}),
+        (bt.analyzers.TradeAnalyzer, {}),
+        (bt.analyzers.SQN, {}),
+        (bt.analyzers.VWR, {}),
+        (bt.analyzers.PyFolio, {}),
+        (EquityCurve, {}),
+    ),
+    'light': (
+        (bt.analyzers.Returns, {}),
+        (bt.analyzers.SharpeRatio, SHARPE_RATIO_PARAMS),
+        (bt.analyzers.DrawDown, {}),
+        (bt.analyzers.TradeAnalyzer, {}),
+        (EquityCurve, {}),
+    ),
+}
 
 
 class BacktestRunner:
     @staticmethod
-    def run_backtest(data, stock_ticker, start_date, end_date):
+    def make_data_feed(data, name=None):
         """
-        Run Backtrader backtest with the provided data.
+        Convert merged stock and sentiment data to a Backtrader data feed.
 
         Args:
-            data (pd.DataFrame): Merged stock and sentiment data.
-            stock_ticker (str): Stock Ticker name.
-            start_date (str): Start date for backtesting.
-            end_date (str): End date for backtesting.
+            data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+            name (str): Optional feed name, usually the stock ticker.
+
+        Returns:
+            bt.feeds.DataBase: Data feed with a 'signal' line.
         """
-        cerebro = bt.Cerebro()
+        if isinstance(data, pd.DataFrame):
+            return SentimentPandasData(dataname=data, name=name)
+        return SentimentData(dataname=data, name=name)
 
-        # Convert data to Backtrader format
-        data_feed = SentimentData(dataname=data)
+    @staticmethod
+    def build_cerebro(data_feed, strategy=OptimizedStrategy, strategy_params=None, analyzer_profile='full',
+                      cash=100000, stdstats=True):
+        """
+        Set up a Cerebro engine with the data feeds, strategy, broker settings and analyzers.
+
+        Args:
+            data_feed (bt.feeds.DataBase or list): Data feed to backtest on, or one feed per asset.
+            strategy (type): Backtrader strategy class.
+            strategy_params (dict): Strategy parameters overriding the class defaults.
+            analyzer_profile (str): Key of ANALYZER_PROFILES selecting the analyzers to add, or None for none.
+            cash (float): Starting cash.
+            stdstats (bool): Add the default observers, which keep per-bar lines for every feed.
 
+        Returns:
+            bt.Cerebro: Engine ready to run.
+        """
+        cerebro = bt.Cerebro(stdstats=stdstats)
 
         # Add data to cerebro
-        cerebro.adddata(data_feed)
+        for feed in (data_feed if isinstance(data_feed, (list, tuple)) else [data_feed]):
+            cerebro.adddata(feed)
 
         # Add strategy with parameters
-        cerebro.addstrategy(OptimizedStrategy)
+        cerebro.addstrategy(strategy, **(strategy_params or {}))
 
         # Set initial cash and commission
-        cerebro.broker.set_cash(100000)
+        cerebro.broker.set_cash(cash)
         cerebro.broker.setcommission(commission=0.001)
 
         # Add built-in analyzers
-        cerebro.addanalyzer(bt.analyzers.Returns)
-        cerebro.addanalyzer(bt.analyzers.SharpeRatio, riskfreerate=0.0)
-        cerebro.addanalyzer(bt.analyzers.DrawDown)
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer)
-        cerebro.addanalyzer(bt.analyzers.SQN)
-        cerebro.addanalyzer(bt.analyzers.VWR)
-        cerebro.addanalyzer(bt.analyzers.PyFolio)
-
-        thestrats = cerebro.run()
+        for analyzer, kwargs in ANALYZER_PROFILES.get(analyzer_profile, ()):
+            cerebro.addanalyzer(analyzer, **kwargs)
+
+        return cerebro
+
+    @staticmethod
+    def run_backtest(data, stock_ticker, start_date, end_date, strategy=OptimizedStrategy, strategy_params=None,
+                     analyzer_profile='full', result_store=None, verbose=True):
+        """
+        Run Backtrader backtest with the provided data.
+
+        Args:
+            data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+            stock_ticker (str): Stock Ticker name.
+            start_date (str): Start date for backtesting.
+            end_date (str): End date for backtesting.
+            strategy (type): Backtrader strategy class.
+            strategy_params (dict): Strategy parameters overriding the class defaults.
+            analyzer_profile (str): Key of ANALYZER_PROFILES; 'light' skips SQN, VWR and the PyFolio frames.
+            result_store (ResultStore): Optional store the result is persisted to.
+            verbose (bool): Print the backtesting report.
+
+        Returns:
+            BacktestResult: Metrics, analyzer outputs, broker value per bar and PyFolio frames of the run.
+        """
+        # Convert data to Backtrader format
+        with span('build_cerebro'):
+            data_feed = BacktestRunner.make_data_feed(data, name=stock_ticker)
+            cerebro = BacktestRunner.build_cerebro(data_feed, strategy, strategy_params, analyzer_profile)
+
+        with span('cerebro.run'):
+            thestrats = cerebro.run()
         thestrat = thestrats[0]
 
         # Get results from analyzers
-        returns = thestrat.analyzers.returns.get_analysis()
-        sharpe_ratio = thestrat.analyzers.sharperatio.get_analysis()
-        drawdown = thestrat.analyzers.drawdown.get_analysis()
-        trades = thestrat.analyzers.tradeanalyzer.get_analysis()
-        sqn = thestrat.analyzers.sqn.get_analysis()
-        vwr = thestrat.analyzers.vwr.get_analysis()
-        pyfolio = thestrat.analyzers.getbyname('pyfolio')
-
-        pyfolio_returns, positions, transactions, gross_lev = pyfolio.get_pf_items()
-
-        # Print the backtesting report
-        print("\n--- Backtesting Report ---")
-        print("Stock Ticker: {}".format(stock_ticker))
-        print("Start Date: {}".format(start_date))
-        print("End Date: {}".format(end_date))
-        print("Initial Portfolio Value: ${:.2f}".format(cerebro.broker.startingcash))
-        print("Final Portfolio Value: ${:.2f}".format(cerebro.broker.getvalue()))
-        print("Total Return: {:.2f}%".format(returns['rtot'] * 100))
-        print("Annualized Return: {:.2f}%".format(returns['ravg'] * 100 * 252))  # Assuming 252 trading days in a year
-        print("Max Drawdown: {:.2f}%".format(drawdown['max']['drawdown'] * 100))
-
-        # Print Additional Metrics
-        print("\n--- Additional Metrics ---")
-        print("{:<15} {:<15} {:<15}".format("Value at Risk", "VWR", "Total Trades"))
-        print("{:<15.2f} {:<15.4f} {:<15}".format(vwr['vwr'], vwr['vwr'], trades.total.total))
\ No newline at end of file
+        with span('collect_results'):
+            result = BacktestResult.from_strategy(thestrat, cerebro, stock_ticker, start_date, end_date,
+                                                  strategy_params)
+
+        if result_store is not None:
+            result_store.save(result)
+        if verbose:
+            result.print_report()
+        return result
+
+    @staticmethod
+    def run_portfolio_backtest(data_by_symbol, start_date, end_date, strategy=OptimizedStrategy,
+                               strategy_params=None, cash=100000, shard_size=50, processes=None, weight=None,
+                               result_store=None, verbose=True):
+        """
+        Run a backtest over a universe of stocks.
+
+        Symbols are split into shards of at most `shard_size` feeds, each backtested in its own
+        Cerebro run with a share of the cash proportional to its number of symbols, and the shard
+        equity curves are summed afterwards. Every asset targets an equal weight of its shard's
+        cash (see EqualWeightSizer), so every asset gets the same allocation whatever the shard
+        size. Sharding bounds the memory of each run and lets the shards run in parallel processes.
+
+        The broker rejects orders its cash cannot cover, and a shard only has its own cash. A sharded
+        run therefore equals a single run as long as no order is rejected for cash; a `weight` below
+        the equal split keeps a reserve for commissions and gaps between the signal close and the fill.
+
+        Args:
+            data_by_symbol (dict): Merged stock and sentiment DataFrame per stock ticker.
+            start_date (str): Start date for backtesting.
+            end_date (str): End date for backtesting.
+            strategy (type): Backtrader strategy class trading every feed, e.g. the technical-with-sentiment strategies.
+            strategy_params (dict): Strategy parameters overriding the class defaults.
+            cash (float): Starting cash of the whole portfolio.
+            shard_size (int): Maximum number of symbols per Cerebro run, or None for a single run.
+            processes (int): Number of worker processes, defaults to the CPU count; 1 runs the shards in-process.
+            weight (float): Share of the portfolio's starting cash targeted by each asset, defaults to 1 / number of symbols.
+            result_store (ResultStore): Optional store the result is persisted to.
+            verbose (bool): Print the portfolio report.
+
+        Returns:
+            BacktestResult: Portfolio metrics, per-asset PnL under the 'assetpnl' analyzer and daily returns.
+        """
+        symbols = list(data_by_symbol)
+        shard_size = shard_size or len(symbols)
+        shards = [{symbol: data_by_symbol[symbol] for symbol in symbols[i:i + shard_size]}
+                  for i in range(0, len(symbols), shard_size)]
+        shard_cash = [cash * len(shard) / len(symbols) for shard in shards]
+        # The sizer weighs each asset against its shard's cash
+        shard_weights = [None if weight is None else weight * cash / shard_cash[i] for i in range(len(shards))]
+
+        if processes == 1 or len(shards) == 1:
+            results = [run_shard(shard, strategy, strategy_params, shard_cash[i], shard_weights[i])
+                       for i, shard in enumerate(shards)]
+        else:
+            with ProcessPoolExecutor(max_workers=min(processes or os.cpu_count(), len(shards))) as executor:
+                results = list(executor.map(run_shard, shards, [strategy] * len(shards),
+                                            [strategy_params] * len(shards), shard_cash, shard_weights))
+
+        with span('collect_results'):
+            result = BacktestResult.from_portfolio(merge_shards(results), symbols, start_date, end_date, strategy,
+                                                   strategy_params)
+
+        if result_store is not None:
+            result_store.save(result)
+        if verbose:
+            result.print_report()
+        return result
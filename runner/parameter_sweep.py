@@ -0,0 +1,284 @@
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from runner.backtest_runner import BacktestRunner
+from runner.vectorized_backtest import VectorizedBacktest
+from strategies.indicator_cache import IndicatorCache
+from strategies.technical_with_sentiment_strategy.optimized_strategy import OptimizedStrategy
+
+# Merged data of the current worker process, set once by the pool initializer
+_worker_data = None
+_worker_vectorized_backtest = None
+# Indicator series shared by every candidate evaluated in the worker
+_worker_indicator_cache = None
+
+
+def _init_worker(data):
+    global _worker_data, _worker_vectorized_backtest, _worker_indicator_cache
+    _worker_data = data
+    _worker_vectorized_backtest = None
+    _worker_indicator_cache = IndicatorCache()
+
+
+def _evaluate_vectorized(params):
+    global _worker_vectorized_backtest
+    if _worker_vectorized_backtest is None:
+        _worker_vectorized_backtest = VectorizedBacktest(_worker_data, indicator_cache=_worker_indicator_cache)
+    result = _worker_vectorized_backtest.run(**params)
+    del result['value']
+    return result
+
+
+def _evaluate(strategy, params, analyzer_profile, engine='backtrader'):
+    """
+    Backtest one parameter combination on the worker's data.
+
+    Returns:
+        dict: Parameters and summary metrics of the run.
+    """
+    if engine == 'vectorized':
+        return _evaluate_vectorized(params)
+
+    strategy_params = dict(params)
+    if 'indicator_cache' in strategy.params._getkeys():
+        strategy_params['indicator_cache'] = _worker_indicator_cache
+
+    data_feed = BacktestRunner.make_data_feed(_worker_data)
+    cerebro = BacktestRunner.build_cerebro(data_feed, strategy, strategy_params, analyzer_profile)
+    thestrat = cerebro.run()[0]
+
+    returns = thestrat.analyzers.returns.get_analysis()
+    sharpe_ratio = thestrat.analyzers.sharperatio.get_analysis()
+    drawdown = thestrat.analyzers.drawdown.get_analysis()
+    trades = thestrat.analyzers.tradeanalyzer.get_analysis()
+
+    return {
+        'params': params,
+        'final_value': cerebro.broker.getvalue(),
+        'total_return': returns.get('rtot'),
+        'sharpe_ratio': sharpe_ratio.get('sharperatio'),
+        'max_drawdown': drawdown['max']['drawdown'],
+        'total_trades': trades.get('total', {}).get('total', 0),
+    }
+
+
+def _failed_result(params, error):
+    """
+    Result of a candidate whose backtest raised, so that the sweep records it and goes on.
+
+    Returns:
+        dict: Parameters, the error and empty metrics.
+    """
+    return {
+        'params': params,
+        'final_value': None,
+        'total_return': None,
+        'sharpe_ratio': None,
+        'max_drawdown': None,
+        'total_trades': 0,
+        'error': '{}: {}'.format(type(error).__name__, error),
+    }
+
+
+class ParameterSweep:
+    """
+    Backtest many strategy parameter combinations in parallel and rank them.
+
+    The merged data is sent to each worker process once, when the pool starts, and every
+    candidate run in that worker builds its feed from the in-memory copy and reuses the worker's
+    IndicatorCache. Results are appended to a JSON lines file as soon as each run finishes.
+    """
+
+    def __init__(self, data, strategy=OptimizedStrategy, analyzer_profile='light', processes=None,
+                 results_path=None, engine='backtrader'):
+        """
+        Args:
+            data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+            strategy (type): Backtrader strategy class whose params are swept.
+            analyzer_profile (str): Key of ANALYZER_PROFILES; 'light' skips the heavy analyzers.
+            processes (int): Number of worker processes, defaults to the CPU count.
+            results_path (str): Optional JSON lines file each result is appended to.
+            engine (str): 'backtrader', or 'vectorized' to evaluate the OptimizedStrategy rules
+                with VectorizedBacktest (the strategy and analyzer profile are then ignored).
+        """
+        self.data = data
+        self.strategy = strategy
+        self.analyzer_profile = analyzer_profile
+        self.processes = processes
+        self.results_path = results_path
+        self.engine = engine
+
+    @staticmethod
+    def grid(param_grid):
+        """
+        Expand a parameter grid into every combination.
+
+        Args:
+            param_grid (dict): Mapping of parameter names to lists of values.
+
+        Returns:
+            list: One parameter dict per combination.
+        """
+        names = list(param_grid)
+        return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+    @staticmethod
+    def sample(param_space, n_samples, seed=None):
+        """
+        Draw random parameter combinations.
+
+        Args:
+            param_space (dict): Mapping of parameter names to either a list of values to choose from
+                or a (low, high) tuple, sampled as an int if both bounds are ints and as a float otherwise.
+            n_samples (int): Number of combinations to draw.
+            seed (int): Optional random seed.
+
+        Returns:
+            list: One parameter dict per sample.
+        """
+        rng = random.Random(seed)
+        candidates = []
+        for _ in range(n_samples):
+            params = {}
+            for name, space in param_space.items():
+                if isinstance(space, tuple):
+                    low, high = space
+                    params[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) \
+                        else rng.uniform(low, high)
+                else:
+                    params[name] = rng.choice(space)
+            candidates.append(params)
+        return candidates
+
+    @staticmethod
+    def rank(results):
+        """
+        Order results best first: highest Sharpe ratio, then smallest max drawdown.
+
+        Runs without a Sharpe ratio (e.g. no trades) are ranked after the others, and failed runs last.
+
+        Args:
+            results (list): Result dicts as returned by `run`.
+
+        Returns:
+            list: The results, sorted.
+        """
+        return sorted(results, key=lambda result: (
+            'error' in result,
+            result['sharpe_ratio'] is None,
+            -(result['sharpe_ratio'] or 0.0),
+            result['max_drawdown'] or 0.0,
+        ))
+
+    def _executor(self):
+        return ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker, initargs=(self.data,))
+
+    def _write_result(self, result):
+        if self.results_path is None:
+            return
+        directory = os.path.dirname(self.results_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.results_path, 'a') as file:
+            file.write(json.dumps(result, default=str) + '\n')
+
+    def run(self, candidates):
+        """
+        Backtest parameter combinations across the process pool.
+
+        A candidate whose backtest raises is recorded with an 'error' entry and the sweep goes on.
+
+        Args:
+            candidates (list): Parameter dicts, e.g. from `grid` or `sample`.
+
+        Returns:
+            list: Result dicts ranked best first.
+        """
+        results = []
+        with self._executor() as executor:
+            futures = {executor.submit(_evaluate, self.strategy, params, self.analyzer_profile, self.engine): params
+                       for params in candidates}
+            for future in as_completed(futures):
+                result = self._result_of(future, futures[future])
+                self._write_result(result)
+                results.append(result)
+        return self.rank(results)
+
+    @staticmethod
+    def _result_of(future, params):
+        try:
+            return future.result()
+        except Exception as error:
+            return _failed_result(params, error)
+
+    def run_bayesian(self, param_space, n_trials, batch_size=None, seed=None):
+        """
+        Search parameters with Bayesian optimization (Optuna's TPE sampler), maximizing the Sharpe ratio.
+
+        Each round asks the sampler for one batch of candidates and runs them in parallel.
+
+        Args:
+            param_space (dict): Search space in the format accepted by `sample`.
+            n_trials (int): Total number of backtests.
+            batch_size (int): Candidates evaluated per round, defaults to the number of processes.
+            seed (int): Optional random seed of the sampler.
+
+        Returns:
+            list: Result dicts ranked best first.
+        """
+        try:
+            import optuna
+        except ImportError:
+            raise ImportError("Bayesian sampling requires optuna; install it with `pip install optuna`.")
+
+        study = optuna.create_study(direction='maximize', sampler=optuna.samplers.TPESampler(seed=seed))
+        batch_size = batch_size or self.processes or os.cpu_count()
+        results = []
+
+        with self._executor() as executor:
+            while len(results) < n_trials:
+                trials = [study.ask() for _ in range(min(batch_size, n_trials - len(results)))]
+                batch = [self._suggest(trial, param_space) for trial in trials]
+                futures = [executor.submit(_evaluate, self.strategy, params, self.analyzer_profile, self.engine)
+                           for params in batch]
+                for trial, params, future in zip(trials, batch, futures):
+                    result = self._result_of(future, params)
+                    if result['sharpe_ratio'] is None:
+                        study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                    else:
+                        study.tell(trial, result['sharpe_ratio'])
+                    self._write_result(result)
+                    results.append(result)
+
+        return self.rank(results)
+
+    @staticmethod
+    def _suggest(trial, param_space):
+        params = {}
+        for name, space in param_space.items():
+            if isinstance(space, tuple):
+                low, high = space
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = trial.suggest_int(name, low, high)
+                else:
+                    params[name] = trial.suggest_float(name, low, high)
+            else:
+                params[name] = trial.suggest_categorical(name, list(space))
+        return params
+
+
+if __name__ == '__main__':
+    # Example Usage: sweep the moving average and RSI windows on the sample data
+    sweep = ParameterSweep('data/merged_df.csv', results_path='output/sweep_results.jsonl')
+    ranked = sweep.run(ParameterSweep.grid({
+        'fast_ma': [10, 20, 30],
+        'slow_ma': [50, 100],
+        'rsi_period': [7, 14, 21],
+    }))
+
+    for result in ranked[:5]:
+        print(result['params'], 'Sharpe: {}'.format(result['sharpe_ratio']),
+              'Max Drawdown: {:.2f}%'.format(result['max_drawdown']))
@@ -0,0 +1,144 @@
+import math
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+
+class EqualWeightSizer(bt.Sizer):
+    """
+    Size each order so the position in its asset targets an equal share of the starting cash.
+
+    A buy moves the position to +target shares and a sell to -target shares, where target is the
+    asset's share of the starting cash divided by the current close. Repeated signals in the same
+    direction therefore top the position up to its target instead of stacking new orders, which
+    keeps the portfolio exposure bounded however many assets the strategy trades.
+
+    Parameters:
+    - weight (float): Share of the starting cash allocated to each asset; defaults to 1 / number of feeds.
+    """
+
+    params = (
+        ('weight', None),
+    )
+
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        weight = self.params.weight or 1.0 / len(self.strategy.datas)
+        price = data.close[0]
+        if not price > 0:
+            return 0
+
+        target = int(self.broker.startingcash * weight / price)
+        position = self.broker.getposition(data).size
+        return max(target - position, 0) if isbuy else max(position + target, 0)
+
+
+class AssetPnL(bt.Analyzer):
+    """
+    Analyzer collecting the closed-trade profit and loss of every data feed, keyed by feed name.
+    """
+
+    def create_analysis(self):
+        self.rets = {}
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+        name = trade.data._name
+        asset = self.rets.setdefault(name, {'pnl': 0.0, 'pnlcomm': 0.0, 'trades': 0})
+        asset['pnl'] += trade.pnl
+        asset['pnlcomm'] += trade.pnlcomm
+        asset['trades'] += 1
+
+
+class EquityCurve(bt.Analyzer):
+    """
+    Analyzer recording the broker value at the end of every bar.
+
+    Values are kept in a flat list and converted to a Series once, so the analysis costs one
+    float per bar regardless of the number of feeds, unlike the default observers.
+    """
+
+    def start(self):
+        self._dates = []
+        self._values = []
+
+    def next(self):
+        self._dates.append(self.strategy.datetime.datetime())
+        self._values.append(self.strategy.broker.getvalue())
+
+    def get_analysis(self):
+        return pd.Series(self._values, index=pd.DatetimeIndex(self._dates), name='value')
+
+
+def run_shard(data_by_symbol, strategy, strategy_params, cash, weight=None):
+    """
+    Backtest a group of symbols in one Cerebro run.
+
+    Args:
+        data_by_symbol (dict): Merged stock and sentiment DataFrame per symbol.
+        strategy (type): Backtrader strategy class.
+        strategy_params (dict): Strategy parameters overriding the class defaults.
+        cash (float): Starting cash of the shard.
+        weight (float): Share of the shard's cash targeted by each asset, see EqualWeightSizer.
+
+    Returns:
+        dict: Per-bar portfolio value of the shard and closed-trade PnL per symbol.
+    """
+    from runner.backtest_runner import BacktestRunner
+
+    data_feeds = [BacktestRunner.make_data_feed(data, name=symbol) for symbol, data in data_by_symbol.items()]
+    cerebro = BacktestRunner.build_cerebro(data_feeds, strategy, strategy_params, analyzer_profile=None,
+                                           cash=cash, stdstats=False)
+    cerebro.addsizer(EqualWeightSizer, weight=weight)
+    cerebro.addanalyzer(EquityCurve, _name='equity')
+    cerebro.addanalyzer(AssetPnL, _name='assetpnl')
+
+    thestrat = cerebro.run()[0]
+    return {
+        'equity': thestrat.analyzers.equity.get_analysis(),
+        'asset_pnl': dict(thestrat.analyzers.assetpnl.get_analysis()),
+        'cash': cash,
+    }
+
+
+def merge_shards(shards):
+    """
+    Combine the results of sharded runs into one portfolio.
+
+    Shard equity curves are aligned on the union of their dates, each carried forward over
+    dates it has no bar for (or held at its starting cash before its first bar), and summed.
+
+    Args:
+        shards (list): Results of `run_shard`.
+
+    Returns:
+        dict: Portfolio equity curve, daily returns, their volatility and Sharpe ratio (annualized, as
+        SHARPE_RATIO_PARAMS), drawdown and per-asset PnL.
+    """
+    curves = pd.concat([shard['equity'] for shard in shards], axis=1).sort_index().ffill()
+    starting_cash = np.array([shard['cash'] for shard in shards], dtype=np.float64)
+    curves = curves.fillna(pd.Series(starting_cash, index=curves.columns))
+    equity = curves.sum(axis=1).rename('value')
+
+    initial_value = float(starting_cash.sum())
+    values = equity.to_numpy()
+    peak = np.maximum.accumulate(np.concatenate(([initial_value], values)))[1:]
+    daily_returns = np.diff(np.concatenate(([initial_value], values))) / np.concatenate(([initial_value], values[:-1]))
+    volatility = daily_returns.std() if len(values) > 1 else 0.0
+
+    asset_pnl = {}
+    for shard in shards:
+        asset_pnl.update(shard['asset_pnl'])
+
+    return {
+        'equity': equity,
+        'initial_value': initial_value,
+        'final_value': float(values[-1]) if len(values) else initial_value,
+        'total_return': math.log(values[-1] / initial_value) if len(values) else 0.0,
+        'max_drawdown': float(np.max(100.0 * (peak - values) / peak)) if len(values) else 0.0,
+        'returns': pd.Series(daily_returns, index=equity.index, name='return'),
+        'volatility': float(volatility * math.sqrt(252)),
+        'sharpe_ratio': float(daily_returns.mean() / volatility * math.sqrt(252)) if volatility > 0 else None,
+        'asset_pnl': asset_pnl,
+    }
@@ -0,0 +1,206 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from strategies.indicator_cache import IndicatorCache
+from strategies.optimized_rules import optimized_orders
+from strategies.vectorized_indicators import relative_strength_index, simple_moving_average
+
+
+class VectorizedBacktest:
+    """
+    Array-based backtest engine for the OptimizedStrategy trading rules.
+
+    Indicators, buy/sell signals, positions and portfolio values are computed with NumPy over
+    the whole history at once instead of bar by bar, reproducing the Backtrader setup used by
+    BacktestRunner: market orders of one share (the default sizer) filled at the next bar's open,
+    percentage commission on the traded value, and the same starting cash.
+
+    Orders are never rejected for lack of cash, which only differs from Backtrader once the
+    strategy has bought more shares than the starting cash can pay for.
+    """
+
+    def __init__(self, data, cash=100000, commission=0.001, indicator_cache=None, symbol=''):
+        """
+        Args:
+            data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+            cash (float): Starting cash.
+            commission (float): Commission as a fraction of the traded value.
+            indicator_cache (IndicatorCache): Optional cache of indicator series shared across runs.
+            symbol (str): Symbol of the data, part of the indicator cache key.
+        """
+        if not isinstance(data, pd.DataFrame):
+            data = pd.read_csv(data, index_col=0, parse_dates=True)
+
+        columns = {str(column).lower(): column for column in data.columns}
+        self._set_arrays(pd.DatetimeIndex(data.index),
+                         data[columns['open']].to_numpy(dtype=np.float64),
+                         data[columns['close']].to_numpy(dtype=np.float64),
+                         data[columns['signal']].to_numpy(dtype=np.float64) if 'signal' in columns
+                         else np.zeros(len(data)),
+                         cash, commission, indicator_cache, symbol)
+
+    @classmethod
+    def from_arrays(cls, index, open_, close, signal, cash=100000, commission=0.001, indicator_cache=None,
+                    symbol=''):
+        """
+        Build the engine from price and signal arrays without copying them, e.g. slices of memory-mapped files.
+
+        Args:
+            index (pd.DatetimeIndex or np.ndarray): Bar dates.
+            open_ (np.ndarray): Open prices.
+            close (np.ndarray): Close prices.
+            signal (np.ndarray): Sentiment signal per bar.
+            cash (float): Starting cash.
+            commission (float): Commission as a fraction of the traded value.
+            indicator_cache (IndicatorCache): Optional cache of indicator series shared across runs.
+            symbol (str): Symbol of the data, part of the indicator cache key.
+
+        Returns:
+            VectorizedBacktest: Engine over the arrays.
+        """
+        backtest = cls.__new__(cls)
+        backtest._set_arrays(pd.DatetimeIndex(index), open_, close, signal, cash, commission, indicator_cache, symbol)
+        return backtest
+
+    def _set_arrays(self, index, open_, close, signal, cash, commission, indicator_cache, symbol):
+        self.index = index
+        self.open = open_
+        self.close = close
+        self.signal = signal
+        self.cash = cash
+        self.commission = commission
+        self.indicator_cache = indicator_cache
+        self.symbol = symbol
+        self.data_version = IndicatorCache.data_version(self.close) if indicator_cache is not None else None
+
+    def _indicator(self, name, period, compute):
+        if self.indicator_cache is None:
+            return compute(self.close, period)
+        return self.indicator_cache.get_or_compute(self.symbol, self.data_version, name, (period,),
+                                                   lambda: compute(self.close, period))[0]
+
+    def orders(self, fast_ma=20, slow_ma=50, rsi_period=14, rsi_oversold=30, rsi_overbought=70, use_sentiment=True,
+               trade_start=0):
+        """
+        Compute the order issued on each bar by the OptimizedStrategy rules.
+
+        Args:
+            fast_ma (int): Period for the fast moving average.
+            slow_ma (int): Period for the slow moving average.
+            rsi_period (int): Period for the Relative Strength Index (RSI).
+            rsi_oversold (float): RSI level considered as oversold for buying.
+            rsi_overbought (float): RSI level considered as overbought for selling.
+            use_sentiment (bool): Apply the sentiment conditions of the technical-with-sentiment strategy.
+            trade_start (int): First bar on which orders may be issued; earlier bars only warm up the indicators.
+
+        Returns:
+            np.ndarray: +1 for a buy, -1 for a sell and 0 for no order, per bar.
+        """
+        fast = self._indicator('sma', fast_ma, simple_moving_average)
+        slow = self._indicator('sma', slow_ma, simple_moving_average)
+        rsi = self._indicator('rsi', rsi_period, relative_strength_index)
+
+        orders = optimized_orders(fast, slow, rsi, rsi_oversold, rsi_overbought,
+                                  self.signal if use_sentiment else None)
+
+        # Backtrader only calls next() once every indicator has enough data
+        minimum_period = max(fast_ma, slow_ma, rsi_period + 1)
+        orders[:max(minimum_period - 1, trade_start)] = 0
+        return orders
+
+    def run(self, trade_start=0, **params):
+        """
+        Backtest one parameter combination.
+
+        Args:
+            trade_start (int): First bar on which orders may be issued.
+            **params: Strategy parameters accepted by `orders`.
+
+        Returns:
+            dict: Final value, Backtrader-equivalent metrics and the per-bar portfolio value.
+        """
+        orders = self.orders(trade_start=trade_start, **params)
+
+        # Market orders fill at the open of the following bar
+        fills = np.zeros(len(orders))
+        fills[1:] = orders[:-1]
+
+        traded_value = fills * self.open
+        cash = self.cash - np.cumsum(traded_value + np.abs(traded_value) * self.commission)
+        position = np.cumsum(fills)
+        value = cash + position * self.close
+
+        return {
+            'params': params,
+            'final_value': float(value[-1]),
+            'total_return': math.log(value[-1] / self.cash),
+            'sharpe_ratio': self.sharpe_ratio(value),
+            'max_drawdown': self.max_drawdown(value),
+            'total_trades': self.count_trades(position),
+            'value': pd.Series(value, index=self.index, name='value'),
+        }
+
+    def sharpe_ratio(self, value, periods_per_year=252):
+        """
+        Annualized Sharpe ratio of daily returns with a zero risk-free rate, as computed by
+        bt.analyzers.SharpeRatio with the SHARPE_RATIO_PARAMS of BacktestRunner.
+
+        Returns:
+            float: Sharpe ratio, or None when the daily returns have no dispersion.
+        """
+        returns = value / np.concatenate(([self.cash], value[:-1])) - 1.0
+        deviation = returns.std()
+        if deviation == 0.0 or np.isnan(deviation):
+            return None
+        return float(math.sqrt(periods_per_year) * returns.mean() / deviation)
+
+    @staticmethod
+    def max_drawdown(value):
+        """
+        Maximum drawdown in percent, as reported by bt.analyzers.DrawDown.
+        """
+        peak = np.maximum.accumulate(value)
+        return float(np.max(100.0 * (peak - value) / peak))
+
+    @staticmethod
+    def count_trades(position):
+        """
+        Number of trades opened, as counted by bt.analyzers.TradeAnalyzer: a trade opens whenever
+        the position leaves zero or reverses direction.
+        """
+        previous = np.concatenate(([0.0], position[:-1]))
+        opened = ((previous == 0) & (position != 0)) | (np.sign(previous) * np.sign(position) < 0)
+        return int(opened.sum())
+
+
+def compare_with_backtrader(data, **params):
+    """
+    Run the same parameters through Backtrader and the vectorized engine.
+
+    Args:
+        data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+        **params: OptimizedStrategy parameters.
+
+    Returns:
+        dict: (Backtrader, vectorized) pair of the final value, total return, Sharpe ratio, max drawdown
+        and trade count.
+    """
+    from runner.backtest_runner import BacktestRunner
+    from strategies.technical_with_sentiment_strategy.optimized_strategy import OptimizedStrategy
+
+    cerebro = BacktestRunner.build_cerebro(BacktestRunner.make_data_feed(data), OptimizedStrategy, params,
+                                           analyzer_profile='light')
+    thestrat = cerebro.run()[0]
+    backtrader_result = {
+        'final_value': cerebro.broker.getvalue(),
+        'total_return': thestrat.analyzers.returns.get_analysis()['rtot'],
+        'sharpe_ratio': thestrat.analyzers.sharperatio.get_analysis()['sharperatio'],
+        'max_drawdown': thestrat.analyzers.drawdown.get_analysis()['max']['drawdown'],
+        'total_trades': thestrat.analyzers.tradeanalyzer.get_analysis().get('total', {}).get('total', 0),
+    }
+
+    vectorized_result = VectorizedBacktest(data).run(**params)
+    return {key: (backtrader_result[key], vectorized_result[key]) for key in backtrader_result}
+
@@ -0,0 +1,203 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from runner.parameter_sweep import ParameterSweep
+from runner.vectorized_backtest import VectorizedBacktest
+
+# Columns shared with the workers, one memory-mapped .npy file each
+ARRAY_COLUMNS = ('date', 'open', 'close', 'signal')
+
+# Memory-mapped arrays of the current worker process, opened once by the pool initializer
+_worker_arrays = None
+
+
+def _init_worker(directory):
+    global _worker_arrays
+    _worker_arrays = {column: np.load(os.path.join(directory, column + '.npy'), mmap_mode='r')
+                      for column in ARRAY_COLUMNS}
+
+
+def _backtest(arrays, start, end, cash, commission):
+    return VectorizedBacktest.from_arrays(arrays['date'][start:end], arrays['open'][start:end],
+                                          arrays['close'][start:end], arrays['signal'][start:end],
+                                          cash=cash, commission=commission)
+
+
+def _best(results, objective):
+    return sorted(results, key=lambda result: (result[objective] is None, -(result[objective] or 0.0)))[0]
+
+
+def _evaluate_window(window, candidates, objective, cash, commission, arrays=None):
+    """
+    Optimize the parameters on a train window and evaluate them on the following test window.
+
+    The test run starts at the beginning of the train window with trading held back until the
+    test window, so the indicators are warmed up on the train data as they would be live.
+
+    Returns:
+        dict: Window bounds, selected parameters, in-sample result and out-of-sample value per bar.
+    """
+    arrays = _worker_arrays if arrays is None else arrays
+    train_start, train_end, test_end = window
+
+    train = _backtest(arrays, train_start, train_end, cash, commission)
+    results = []
+    for params in candidates:
+        result = train.run(**params)
+        del result['value']
+        results.append(result)
+    best = _best(results, objective)
+
+    test = _backtest(arrays, train_start, test_end, cash, commission).run(trade_start=train_end - train_start,
+                                                                          **best['params'])
+    return {
+        'window': window,
+        'params': best['params'],
+        'in_sample': best,
+        'value': test['value'].iloc[train_end - train_start:],
+    }
+
+
+class WalkForward:
+    """
+    Walk-forward optimization of the OptimizedStrategy rules on rolling train/test windows.
+
+    The history is split into windows of `train_size` bars followed by `test_size` out-of-sample
+    bars, rolled forward by `step` bars. On each window every candidate is backtested with
+    VectorizedBacktest on the train bars, the best one by `objective` is kept and then traded on
+    the test bars. Each test window starts flat with the full starting cash, and the test windows'
+    growth is chained into one out-of-sample equity curve.
+
+    Windows are independent and run in parallel worker processes. The open, close and signal
+    columns are written once to .npy files that every worker memory-maps, so windows are slices
+    of the same pages instead of DataFrames pickled to each task.
+    """
+
+    def __init__(self, data, train_size=252, test_size=63, step=None, objective='total_return', cash=100000,
+                 commission=0.001, processes=None, directory=None):
+        """
+        Args:
+            data (pd.DataFrame or str): Merged stock and sentiment data, or the path of a CSV file holding it.
+            train_size (int): Number of bars parameters are optimized on.
+            test_size (int): Number of out-of-sample bars following each train window.
+            step (int): Number of bars between consecutive windows, defaults to `test_size` so test windows tile.
+            objective (str): Result metric maximized on the train windows, e.g. 'total_return' or 'sharpe_ratio'.
+            cash (float): Starting cash.
+            commission (float): Commission as a fraction of the traded value.
+            processes (int): Number of worker processes, defaults to the CPU count; 1 runs the windows in-process.
+            directory (str): Directory for the memory-mapped arrays, defaults to a temporary directory
+                removed after each run.
+        """
+        backtest = VectorizedBacktest(data)
+        self.arrays = {
+            'date': backtest.index.values.astype('datetime64[ns]'),
+            'open': backtest.open,
+            'close': backtest.close,
+            'signal': backtest.signal,
+        }
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step or test_size
+        self.objective = objective
+        self.cash = cash
+        self.commission = commission
+        self.processes = processes
+        self.directory = directory
+
+    def windows(self):
+        """
+        Split the history into walk-forward windows.
+
+        Returns:
+            list: (train_start, train_end, test_end) bar indexes per window; the last test window
+            may be shorter than `test_size`.
+        """
+        length = len(self.arrays['close'])
+        return [(start, start + self.train_size, min(start + self.train_size + self.test_size, length))
+                for start in range(0, length - self.train_size, self.step)]
+
+    def _write_arrays(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for column in ARRAY_COLUMNS:
+            np.save(os.path.join(directory, column + '.npy'), self.arrays[column])
+
+    def run(self, candidates):
+        """
+        Run the walk-forward optimization.
+
+        Args:
+            candidates (list): Parameter dicts tried on every train window, e.g. from `ParameterSweep.grid`.
+
+        Returns:
+            dict: Per-window results and the chained out-of-sample equity curve under 'equity'.
+        """
+        windows = self.windows()
+        if not windows:
+            raise ValueError("Not enough data for a {}-bar train window.".format(self.train_size))
+
+        if self.processes == 1:
+            window_results = [_evaluate_window(window, candidates, self.objective, self.cash, self.commission,
+                                               self.arrays) for window in windows]
+        else:
+            directory = self.directory or tempfile.mkdtemp(prefix='walk_forward_')
+            try:
+                self._write_arrays(directory)
+                with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                         initargs=(directory,)) as executor:
+                    window_results = list(executor.map(
+                        _evaluate_window, windows, [candidates] * len(windows), [self.objective] * len(windows),
+                        [self.cash] * len(windows), [self.commission] * len(windows)))
+            finally:
+                if self.directory is None:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+        return {
+            'windows': window_results,
+            'equity': self.chain_equity(window_results),
+        }
+
+    def chain_equity(self, window_results):
+        """
+        Chain the test windows into one out-of-sample equity curve.
+
+        Bars covered by several test windows (when `step` is smaller than `test_size`) are taken
+        from the earliest window; the next window continues from its own growth since that bar.
+
+        Returns:
+            pd.Series: Portfolio value per out-of-sample bar, starting from the starting cash.
+        """
+        segments = []
+        value = self.cash
+        last_date = None
+        for result in window_results:
+            growth = result['value'] / self.cash
+            if last_date is not None:
+                overlap = growth[growth.index <= last_date]
+                if not overlap.empty:
+                    growth = growth / overlap.iloc[-1]
+                growth = growth[growth.index > last_date]
+            if growth.empty:
+                continue
+            segments.append(value * growth)
+            value = segments[-1].iloc[-1]
+            last_date = growth.index[-1]
+        return pd.concat(segments).rename('value') if segments else pd.Series(dtype=np.float64, name='value')
+
+
+if __name__ == '__main__':
+    # Example Usage: half-year train windows, monthly out-of-sample windows on the sample data
+    walk_forward = WalkForward('data/merged_df.csv', train_size=126, test_size=21)
+    report = walk_forward.run(ParameterSweep.grid({
+        'fast_ma': [5, 10, 20],
+        'slow_ma': [30, 50],
+        'rsi_period': [7, 14],
+    }))
+
+    for result in report['windows']:
+        print(result['value'].index[0].date(), result['params'])
+    print('Out-of-sample final value: {:.2f}'.format(report['equity'].iloc[-1]))
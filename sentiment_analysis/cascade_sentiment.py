@@ -0,0 +1,133 @@
+import threading
+
+from profiling.tracer import count, traced
+from sentiment_analysis.labels import LABELS, normalize_label
+
+
+class CascadeSentimentAnalysis:
+    """
+    A cheap-first sentiment scorer: a fast classifier labels every text and only the texts it is
+    unsure about are escalated to an LLM.
+
+    The classifier is a NewsSentimentAnalysis, whose confidence is the probability of its label.
+    Texts below the confidence threshold of their label are sent in one call to `escalate`, e.g.
+    `SentimentAnalysisWithLLM.classify_many` or `AsyncOpenAISentimentAnalysis.analyze_many_sync`,
+    and take the LLM's answer. The number of texts scored and escalated is kept for the
+    escalation rate.
+
+    Attributes:
+    - classifier (NewsSentimentAnalysis): Fast classifier scoring every text.
+    - escalate (callable): Called with a list of texts, returns one LLM answer per text: a label
+      string or the probability of each label.
+    - thresholds (dict): Minimum classifier confidence per canonical label below which a text is escalated.
+    - batch_size (int): Number of texts classified per forward pass.
+    - texts (int): Number of texts scored so far.
+    - escalated (int): Number of texts escalated so far.
+    """
+
+    def __init__(self, classifier, escalate, threshold=0.95, batch_size=32):
+        """
+        Initializes the CascadeSentimentAnalysis object.
+
+        Args:
+        - classifier (NewsSentimentAnalysis): Fast classifier scoring every text.
+        - escalate (callable): Called with a list of texts, returns one label string or one dictionary
+          of label probabilities per text.
+        - threshold (float or dict): Minimum classifier confidence, or a mapping of canonical labels to
+          their minimum confidence, e.g. {'Positive': 0.97, 'Negative': 0.9}; labels missing from the
+          mapping are always escalated.
+        - batch_size (int): Number of texts classified per forward pass.
+        """
+        self.classifier = classifier
+        self.escalate = escalate
+        self.thresholds = dict(threshold) if isinstance(threshold, dict) else dict.fromkeys(LABELS, threshold)
+        self.batch_size = batch_size
+        self.texts = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    @property
+    def escalation_rate(self):
+        """
+        Fraction of the texts scored so far that were escalated to the LLM.
+        """
+        return self.escalated / self.texts if self.texts else 0.0
+
+    def reset_metrics(self):
+        """
+        Resets the scored and escalated counts.
+        """
+        with self._lock:
+            self.texts = 0
+            self.escalated = 0
+
+    def analyze_sentiment(self, text):
+        """
+        Scores a single text through the cascade.
+
+        Args:
+        - text (str): Text to analyze.
+
+        Returns:
+        - str: One of LABELS, or None if the answer names no label.
+        """
+        return self.classify_texts([text])['label'][0]
+
+    @traced()
+    def classify_texts(self, texts):
+        """
+        Scores texts with the classifier and escalates the low-confidence ones to the LLM.
+
+        Args:
+        - texts (list): Texts to analyze.
+
+        Returns:
+        - dict: A columnar dictionary with 'label' (one of LABELS or None), 'score' (confidence of the
+          label, NaN for LLM answers without probabilities) and 'escalated' lists, in input order.
+        """
+        classifier_labels, scores = self.classifier.classify_texts(texts, batch_size=self.batch_size)
+        labels = [normalize_label(label) for label in classifier_labels]
+        escalated = [score < self.thresholds.get(label, float('inf')) for label, score in zip(labels, scores)]
+
+        pending = [index for index, escalate in enumerate(escalated) if escalate]
+        if pending:
+            answers = self.escalate([texts[index] for index in pending])
+            for index, answer in zip(pending, answers):
+                labels[index], scores[index] = self.label_of(answer)
+
+        with self._lock:
+            self.texts += len(texts)
+            self.escalated += len(pending)
+        count('CascadeSentimentAnalysis.texts', len(texts))
+        count('CascadeSentimentAnalysis.escalated', len(pending))
+
+        return {'label': labels, 'score': scores, 'escalated': escalated}
+
+    def score_records(self, records):
+        """
+        Scores columnar news records through the cascade.
+
+        Args:
+        - records (SentimentRecords): News articles, e.g. from AlpacaNewsFetcher.fetch_records.
+
+        Returns:
+        - SentimentRecords: The records with their label codes and scores set.
+        """
+        result = self.classify_texts(list(records.relevant_texts()))
+        return records.with_sentiment(result['label'], result['score'])
+
+    @staticmethod
+    def label_of(answer):
+        """
+        Reads the label of an LLM answer.
+
+        Args:
+        - answer (str or dict): Free-form answer, or the probability of each label.
+
+        Returns:
+        - tuple: The canonical label (or None) and its probability (NaN for free-form answers).
+        """
+        if isinstance(answer, dict):
+            label = max(LABELS, key=answer.__getitem__)
+            return label, answer[label]
+        return normalize_label(answer), float('nan')
@@ -0,0 +1,154 @@
+import zlib
+
+import numpy as np
+
+from profiling.tracer import count
+from sentiment_analysis.sentiment_cache import SentimentCache
+
+# MinHash permutations are computed as (a * x + b) mod a Mersenne prime over 32-bit shingle hashes
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+class HeadlineDeduplicator:
+    """
+    Collapses duplicate and near-duplicate headlines so that each cluster is scored once.
+
+    Exact duplicates are found by hashing the normalized text. With a threshold, the remaining
+    distinct texts are also compared by MinHash signatures over word shingles, bucketed with
+    locality-sensitive hashing, and candidates whose estimated Jaccard similarity reaches the
+    threshold are merged into one cluster. The first headline of each cluster is scored and its
+    result is fanned back out to every member, so each article keeps its own row and the daily
+    counts aggregated by `preprocess_sentiment_data` are unchanged.
+
+    Near-duplicate merging is off by default: headlines differing by a single word, e.g. "rise"
+    and "fall", can have opposite sentiment however similar they are.
+
+    Attributes:
+    - threshold (float): Estimated Jaccard similarity above which two headlines are merged, or None.
+    - shingle_size (int): Number of words per shingle.
+    - bands (int): Number of LSH bands.
+    - rows (int): Number of MinHash values per band.
+    """
+
+    def __init__(self, threshold=None, shingle_size=2, bands=16, rows=4, seed=1):
+        """
+        Initializes the HeadlineDeduplicator object.
+
+        Args:
+        - threshold (float): Estimated Jaccard similarity above which two headlines are merged, e.g.
+          0.9, or None to collapse exact duplicates only.
+        - shingle_size (int): Number of words per shingle.
+        - bands (int): Number of LSH bands; more bands find less similar candidates.
+        - rows (int): Number of MinHash values per band; more rows make candidates more similar.
+        - seed (int): Seed of the MinHash permutations.
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+        random_state = np.random.RandomState(seed)
+        self._a = random_state.randint(1, int(_MERSENNE_PRIME), size=(bands * rows, 1)).astype(np.uint64)
+        self._b = random_state.randint(0, int(_MERSENNE_PRIME), size=(bands * rows, 1)).astype(np.uint64)
+
+    def cluster(self, texts):
+        """
+        Groups texts into clusters of duplicates and near-duplicates.
+
+        Args:
+        - texts (list): Headlines or other texts to be scored.
+
+        Returns:
+        - tuple: (representatives, inverse), where `representatives` holds the index of the first
+          text of each cluster and `inverse` the cluster of every text, so that
+          `results[inverse]` fans the results of the representatives back out.
+        """
+        first_index = {}
+        distinct_indices = []
+        inverse = np.empty(len(texts), dtype=np.int64)
+        for index, text in enumerate(texts):
+            position = first_index.setdefault(SentimentCache.normalize_text(text).lower(), len(first_index))
+            if position == len(distinct_indices):
+                distinct_indices.append(index)
+            inverse[index] = position
+        distinct = list(first_index)
+        distinct_indices = np.array(distinct_indices, dtype=np.int64)
+
+        # Map every distinct text to the first distinct text of its near-duplicate cluster
+        parents = np.arange(len(distinct))
+        if self.threshold is not None and len(distinct) > 1:
+            parents = self._near_duplicate_roots(distinct)
+
+        roots, cluster_of_distinct = np.unique(parents, return_inverse=True)
+        count('HeadlineDeduplicator.texts', len(texts))
+        count('HeadlineDeduplicator.clusters', len(roots))
+        return distinct_indices[roots], cluster_of_distinct[inverse]
+
+    def score(self, texts, score_many):
+        """
+        Scores one text per cluster and fans the results back out.
+
+        Args:
+        - texts (list): Texts to score.
+        - score_many (callable): Called with the list of representative texts, returns one result per text,
+          e.g. `SentimentAnalysisWithLLM.classify_many`.
+
+        Returns:
+        - list: The result of every text, in input order.
+        """
+        representatives, inverse = self.cluster(texts)
+        results = score_many([texts[index] for index in representatives])
+        return [results[cluster] for cluster in inverse]
+
+    def score_records(self, records, scorer, **kwargs):
+        """
+        Scores one article per cluster of columnar news records and fans the sentiment back out.
+
+        Args:
+        - records (SentimentRecords): News articles, e.g. from AlpacaNewsFetcher.fetch_records.
+        - scorer: Sentiment backend with a `score_records` method, e.g. NewsSentimentAnalysis.
+        - **kwargs: Passed on to `scorer.score_records`.
+
+        Returns:
+        - SentimentRecords: Every article with the label code and score of its cluster.
+        """
+        representatives, inverse = self.cluster(list(records.relevant_texts()))
+        scored = scorer.score_records(records.take(representatives), **kwargs)
+        return records.with_sentiment(scored.labels[inverse], scored.scores[inverse])
+
+    def _near_duplicate_roots(self, texts):
+        """
+        Returns, for every text, the index of the first text of its near-duplicate cluster.
+        """
+        signatures = np.stack([self._signature(text) for text in texts])
+        parents = np.arange(len(texts))
+
+        def find(index):
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for band in range(self.bands):
+            band_values = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets = {}
+            for index, key in enumerate(row.tobytes() for row in band_values):
+                members = buckets.setdefault(key, [])
+                # LSH only proposes candidates; merge those whose signatures agree often enough
+                for member in members:
+                    if np.mean(signatures[member] == signatures[index]) >= self.threshold:
+                        root, other = sorted((find(member), find(index)))
+                        parents[other] = root
+                members.append(index)
+
+        return np.array([find(index) for index in range(len(texts))])
+
+    def _signature(self, text):
+        """
+        Computes the MinHash signature of the word shingles of a normalized text.
+        """
+        size = self.shingle_size
+        words = text.split()
+        shingles = {' '.join(words[start:start + size]) for start in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
@@ -0,0 +1,27 @@
+import re
+
+LABELS = ('Positive', 'Negative', 'Neutral')
+LABEL_SIGNALS = {'Positive': 1, 'Negative': -1, 'Neutral': 0}
+
+_LABEL_PATTERN = re.compile(r'\b(positive|negative|neutral)\b', re.IGNORECASE)
+
+
+def normalize_label(text):
+    """
+    Maps a free-form sentiment answer to one of the canonical labels.
+
+    Handles the variants produced by the different backends, e.g. ' Positive' from the
+    LLM prompts, 'POSITIVE' from the Transformers classifier or 'Negative.' from OpenAI.
+
+    Args:
+    - text (str): Sentiment answer to normalize.
+
+    Returns:
+    - str: One of LABELS, or None if the answer does not name exactly one label.
+    """
+    if not isinstance(text, str):
+        return None
+    matches = {match.lower() for match in _LABEL_PATTERN.findall(text)}
+    if len(matches) != 1:
+        return None
+    return matches.pop().capitalize()
@@ -1,23 +1,74 @@
 # !pip install transformers
-from transformers import pipeline
+from llms.model_registry import ModelRegistry
+from profiling.tracer import count, traced
 
-from alpaca.client import AlpacaNewsFetcher
+DEFAULT_MODEL = 'distilbert/distilbert-base-uncased-finetuned-sst-2-english'
+CACHE_TEMPLATE = '{summary}{headline}'
+
+# Inference backends: the PyTorch pipeline, int8 dynamic quantization of its linear layers, or ONNX Runtime
+BACKENDS = ('pytorch', 'int8', 'onnx')
 
 
 class NewsSentimentAnalysis:
     """
   A class for sentiment analysis of news articles using the Transformers library.
 
+  The classifier is loaded on first use and shared process-wide through the ModelRegistry.
+
   Attributes:
+  - model (str): Hugging Face model name or path of the classifier.
   - classifier (pipeline): Sentiment analysis pipeline from Transformers.
+  - cache (SentimentCache): Optional persistent cache consulted before running the classifier.
+  - backend (str): Inference backend, one of BACKENDS.
   """
 
-    def __init__(self):
+    def __init__(self, model=DEFAULT_MODEL, cache=None, backend='pytorch'):
         """
     Initializes the NewsSentimentAnalysis object.
+
+    Args:
+    - model (str): Hugging Face model name or path of the classifier.
+    - cache (SentimentCache): Optional persistent cache consulted before running the classifier.
+    - backend (str): 'pytorch', 'int8' for int8 dynamic quantization of the linear layers on CPU,
+      or 'onnx' for the model exported to ONNX Runtime (requires optimum[onnxruntime]).
+    """
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend {!r}, expected one of {}.".format(backend, ', '.join(BACKENDS)))
+        self.model = model
+        self.cache = cache
+        self.backend = backend
+
+    @property
+    def classifier(self):
+        """
+    The shared sentiment analysis pipeline, loaded on first access.
     """
-        self.classifier = pipeline('sentiment-analysis')
+        return ModelRegistry.get(('sentiment-analysis', self.model, self.backend), self._load_classifier)
+
+    def _load_classifier(self):
+        from transformers import AutoTokenizer, pipeline
+
+        if self.backend == 'pytorch':
+            return pipeline('sentiment-analysis', model=self.model)
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model)
+        if self.backend == 'int8':
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            model = AutoModelForSequenceClassification.from_pretrained(self.model)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            try:
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+            except ImportError:
+                raise ImportError("The onnx backend requires optimum; install it with "
+                                  "`pip install optimum[onnxruntime]`.")
+            model = ORTModelForSequenceClassification.from_pretrained(self.model, export=True)
 
+        return pipeline('sentiment-analysis', model=model, tokenizer=tokenizer)
+
+    @traced()
     def analyze_sentiment(self, news_article):
         """
     Analyzes the sentiment of a given news article.
@@ -32,8 +83,12 @@ class NewsSentimentAnalysis:
         title = news_article['headline']
         timestamp = news_article['created_at']
 
-        relevant_text = summary + title
-        sentiment_result = self.classifier(relevant_text)
+        relevant_text = self._relevant_text(news_article)
+        if self.cache is not None:
+            sentiment_result = [self.cache.get_or_compute(self._model_id(), CACHE_TEMPLATE, relevant_text,
+                                                          lambda text: self.classifier(text)[0])]
+        else:
+            sentiment_result = self.classifier(relevant_text)
 
         analysis_result = {
             'timestamp': timestamp,
@@ -44,8 +99,116 @@ class NewsSentimentAnalysis:
 
         return analysis_result
 
+    @traced()
+    def analyze_batch(self, news_articles, batch_size=32):
+        """
+    Analyzes the sentiment of many news articles in padded, length-bucketed batches.
+
+    Articles are sorted by token length before batching so that each batch is padded
+    to roughly the same length, which keeps wasted computation on padding tokens low.
+    Results are returned in the original article order. When a cache is configured only
+    articles without a cached result are classified.
+
+    Args:
+    - news_articles (list): List of dictionaries containing 'summary', 'headline', and 'created_at' keys.
+    - batch_size (int): Number of articles classified per forward pass.
+
+    Returns:
+    - dict: A columnar dictionary with 'timestamp', 'title', 'summary', 'label' and 'score' lists,
+      aligned with the input articles.
+    """
+        labels, scores = self.classify_texts([self._relevant_text(article) for article in news_articles],
+                                              batch_size)
+
+        return {
+            'timestamp': [article['created_at'] for article in news_articles],
+            'title': [article['headline'] for article in news_articles],
+            'summary': [article['summary'] for article in news_articles],
+            'label': labels,
+            'score': scores
+        }
+
+    @traced()
+    def score_records(self, records, batch_size=32):
+        """
+    Analyzes the sentiment of columnar news records in padded, length-bucketed batches.
+
+    Args:
+    - records (SentimentRecords): News articles, e.g. from AlpacaNewsFetcher.fetch_records.
+    - batch_size (int): Number of articles classified per forward pass.
+
+    Returns:
+    - SentimentRecords: The records with their label codes and scores set.
+    """
+        labels, scores = self.classify_texts(list(records.relevant_texts()), batch_size)
+        return records.with_sentiment(labels, scores)
+
+    def classify_texts(self, texts, batch_size=32):
+        """
+    Classifies texts in padded, length-bucketed batches, consulting the cache first.
+
+    Args:
+    - texts (list): Texts to classify.
+    - batch_size (int): Number of texts classified per forward pass.
+
+    Returns:
+    - tuple: (labels, scores) lists of the classifier's labels and their confidence, in input order.
+    """
+        labels = [None] * len(texts)
+        scores = [None] * len(texts)
+        pending = list(range(len(texts)))
+
+        if self.cache is not None:
+            model_id = self._model_id()
+            keys = [self.cache.make_key(model_id, CACHE_TEMPLATE, text) for text in texts]
+            cached = self.cache.get_many(keys)
+            pending = []
+            for index, key in enumerate(keys):
+                if key in cached:
+                    labels[index] = cached[key]['label']
+                    scores[index] = cached[key]['score']
+                else:
+                    pending.append(index)
+
+        count('NewsSentimentAnalysis.articles', len(texts))
+        count('NewsSentimentAnalysis.classified', len(pending))
+
+        order = []
+        if pending:
+            tokenizer = self.classifier.tokenizer
+            token_lengths = [len(ids) for ids in tokenizer([texts[i] for i in pending], truncation=True)['input_ids']]
+            order = [pending[i] for i in sorted(range(len(pending)), key=token_lengths.__getitem__)]
+
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            batch_results = self.classifier([texts[i] for i in batch_indices], batch_size=len(batch_indices),
+                                            truncation=True)
+            for index, result in zip(batch_indices, batch_results):
+                labels[index] = result['label']
+                scores[index] = result['score']
+
+        if self.cache is not None and pending:
+            self.cache.set_many({keys[i]: {'label': labels[i], 'score': scores[i]} for i in pending})
+
+        return labels, scores
+
+    def _model_id(self):
+        """
+    Returns the identifier of the classifier model and backend, used to key cached results.
+    """
+        return self.model if self.backend == 'pytorch' else '{}@{}'.format(self.model, self.backend)
+
+    @staticmethod
+    def _relevant_text(news_article):
+        """
+    Builds the text that is classified for a news article.
+    """
+        return news_article['summary'] + news_article['headline']
+
 
 if __name__ == '__main__':
+    from alpaca.client import AlpacaNewsFetcher
+
     # Example Usage:
     # Initialize the AlpacaNewsFetcher object
     api_key = "your_api_key"
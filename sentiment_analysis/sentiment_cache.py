@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+class SentimentCache:
+    """
+    A persistent, content-addressed cache for sentiment analysis results backed by SQLite.
+
+    Entries are keyed on a hash of (model id, prompt template, normalized text), so the same
+    headline scored by the same model and prompt is only ever computed once across runs.
+
+    Attributes:
+    - path (str): Path of the SQLite database file.
+    - max_entries (int): Maximum number of entries kept; the oldest entries are evicted beyond it.
+    - max_age (float): Maximum age of an entry in seconds, or None to keep entries forever.
+    """
+
+    EVICTION_INTERVAL = 1000
+
+    def __init__(self, path='data/sentiment_cache.sqlite', max_entries=1000000, max_age=None):
+        """
+        Initializes the SentimentCache object and creates the database if needed.
+
+        Args:
+        - path (str): Path of the SQLite database file.
+        - max_entries (int): Maximum number of entries kept; the oldest entries are evicted beyond it.
+        - max_age (float): Maximum age of an entry in seconds, or None to keep entries forever.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)')
+        self._connection.commit()
+        self.evict()
+
+    @staticmethod
+    def normalize_text(text):
+        """
+        Normalizes text so that trivially different copies of a headline share a cache entry.
+
+        Args:
+        - text (str): Text to normalize.
+
+        Returns:
+        - str: Unicode-normalized text with collapsed whitespace.
+        """
+        return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+    @classmethod
+    def make_key(cls, model_id, prompt_template, text):
+        """
+        Builds the content address of a sentiment analysis request.
+
+        Args:
+        - model_id (str): Identifier of the model producing the result.
+        - prompt_template (str): Prompt template the text is inserted into.
+        - text (str): Text to analyze.
+
+        Returns:
+        - str: Hex digest identifying the request.
+        """
+        payload = '\x1f'.join((model_id, prompt_template, cls.normalize_text(text)))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Looks up several cache entries at once.
+
+        Args:
+        - keys (list): Keys built with `make_key`.
+
+        Returns:
+        - dict: Mapping of the keys found in the cache to their stored values.
+        """
+        keys = list(set(keys))
+        found = {}
+        min_created_at = time.time() - self.max_age if self.max_age is not None else float('-inf')
+
+        with self._lock:
+            # SQLite limits the number of bound parameters, so query in chunks
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    'SELECT key, value FROM entries WHERE created_at >= ? AND key IN ({})'.format(
+                        ','.join('?' * len(chunk))),
+                    [min_created_at] + chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+
+        return found
+
+    def get(self, key, default=None):
+        """
+        Looks up a single cache entry.
+
+        Args:
+        - key (str): Key built with `make_key`.
+        - default: Value returned when the key is not cached.
+
+        Returns:
+        - The stored value, or `default`.
+        """
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items):
+        """
+        Stores several results in the cache.
+
+        Args:
+        - items (dict): Mapping of keys built with `make_key` to JSON-serializable results.
+        """
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items.items()]
+
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)', rows)
+            self._connection.commit()
+            self._writes_since_eviction += len(rows)
+            should_evict = self._writes_since_eviction >= self.EVICTION_INTERVAL
+
+        if should_evict:
+            self.evict()
+
+    def set(self, key, value):
+        """
+        Stores a single result in the cache.
+
+        Args:
+        - key (str): Key built with `make_key`.
+        - value: JSON-serializable result.
+        """
+        self.set_many({key: value})
+
+    def get_or_compute(self, model_id, prompt_template, text, compute):
+        """
+        Returns the cached result for a request, computing and storing it on a miss.
+
+        Args:
+        - model_id (str): Identifier of the model producing the result.
+        - prompt_template (str): Prompt template the text is inserted into.
+        - text (str): Text to analyze.
+        - compute (callable): Called with `text` to produce the result on a cache miss.
+
+        Returns:
+        - The cached or freshly computed result.
+        """
+        key = self.make_key(model_id, prompt_template, text)
+        missing = object()
+        result = self.get(key, missing)
+        if result is missing:
+            result = compute(text)
+            self.set(key, result)
+        return result
+
+    def evict(self):
+        """
+        Removes expired entries and, beyond `max_entries`, the oldest remaining ones.
+        """
+        with self._lock:
+            if self.max_age is not None:
+                self._connection.execute('DELETE FROM entries WHERE created_at < ?', (time.time() - self.max_age,))
+
+            if self.max_entries is not None:
+                self._connection.execute(
+                    'DELETE FROM entries WHERE key IN ('
+                    'SELECT key FROM entries ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+
+            self._connection.commit()
+            self._writes_since_eviction = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._connection.close()
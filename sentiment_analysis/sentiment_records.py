@@ -0,0 +1,595 @@
+import io
+import json
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from sentiment_analysis.labels import LABELS, normalize_label
+
+# Label codes index into LABELS; -1 marks an article that is not scored or has no recognizable label
+UNKNOWN_LABEL = -1
+_LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+
+
+def encode_label(label):
+    """
+    Maps a sentiment answer of any backend to its label code.
+
+    Args:
+    - label (str): Sentiment answer, e.g. 'POSITIVE' or ' Negative'.
+
+    Returns:
+    - int: Index of the label in LABELS, or UNKNOWN_LABEL.
+    """
+    return _LABEL_CODES.get(normalize_label(label), UNKNOWN_LABEL)
+
+
+def to_epoch_ns(timestamp):
+    """
+    Converts a timestamp to nanoseconds since the epoch in UTC.
+
+    Args:
+    - timestamp (str or datetime): Timestamp; naive values are taken as UTC.
+
+    Returns:
+    - int: Nanoseconds since 1970-01-01 UTC.
+    """
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+class SentimentRecords:
+    """
+    A columnar batch of news articles and their sentiment.
+
+    Every field is a NumPy array with one entry per article: the article id, the publication
+    time as int64 nanoseconds since the epoch (UTC), an int32 index into the interned `symbols`,
+    an int8 label code into LABELS and a float32 score. Titles and summaries are UTF-8 encoded
+    into a single byte blob; article i's title is `text[text_offsets[2i]:text_offsets[2i + 1]]`
+    and its summary runs up to `text_offsets[2i + 2]`.
+
+    Records are sorted by symbol, then by time, so slicing by symbol and date range only takes
+    views of the arrays and shares the text blob.
+
+    Attributes:
+    - symbols (tuple): Interned stock symbols.
+    - ids (np.ndarray): int64 article ids.
+    - timestamps (np.ndarray): int64 publication times in nanoseconds since the epoch.
+    - symbol_ids (np.ndarray): int32 index of each article's symbol in `symbols`.
+    - labels (np.ndarray): int8 label codes.
+    - scores (np.ndarray): float32 confidence of the labels, NaN when not scored.
+    - text_offsets (np.ndarray): int64 offsets of the titles and summaries in `text`.
+    - text (np.ndarray): uint8 UTF-8 text blob.
+    """
+
+    def __init__(self, symbols, ids, timestamps, symbol_ids, labels, scores, text_offsets, text):
+        self.symbols = tuple(symbols)
+        self.ids = ids
+        self.timestamps = timestamps
+        self.symbol_ids = symbol_ids
+        self.labels = labels
+        self.scores = scores
+        self.text_offsets = text_offsets
+        self.text = text
+
+    @classmethod
+    def empty(cls, symbols=()):
+        """
+        Returns:
+        - SentimentRecords: Records without any article.
+        """
+        return cls(symbols, np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int32),
+                   np.empty(0, np.int8), np.empty(0, np.float32), np.zeros(1, np.int64), np.empty(0, np.uint8))
+
+    @classmethod
+    def from_articles(cls, symbol, articles):
+        """
+        Builds records from the article dictionaries returned by AlpacaNewsFetcher.
+
+        Args:
+        - symbol (str): Stock symbol the articles were fetched for.
+        - articles (iterable): Dictionaries with 'id', 'timestamp', 'title' and 'summary' keys.
+
+        Returns:
+        - SentimentRecords: The articles, unscored.
+        """
+        builder = SentimentRecordBuilder()
+        for article in articles:
+            builder.append_article(symbol, article)
+        return builder.build()
+
+    @classmethod
+    def concat(cls, records_list):
+        """
+        Concatenates records, re-interning their symbols.
+
+        Args:
+        - records_list (list): SentimentRecords to concatenate.
+
+        Returns:
+        - SentimentRecords: All articles, in the given order; use `sorted` to restore the ordering.
+        """
+        symbols = list(dict.fromkeys(symbol for records in records_list for symbol in records.symbols))
+        codes = {symbol: code for code, symbol in enumerate(symbols)}
+
+        symbol_ids, offsets, texts = [], [np.zeros(1, np.int64)], []
+        text_size = 0
+        for records in records_list:
+            remap = np.array([codes[symbol] for symbol in records.symbols] or [0], dtype=np.int32)
+            symbol_ids.append(remap[records.symbol_ids])
+            # Offsets may be a view into a larger blob, so rebase them on the records' own text
+            first, last = records.text_offsets[0], records.text_offsets[-1]
+            offsets.append(records.text_offsets[1:] - first + text_size)
+            texts.append(records.text[first:last])
+            text_size += last - first
+
+        return cls(symbols,
+                   np.concatenate([records.ids for records in records_list]),
+                   np.concatenate([records.timestamps for records in records_list]),
+                   np.concatenate(symbol_ids).astype(np.int32),
+                   np.concatenate([records.labels for records in records_list]),
+                   np.concatenate([records.scores for records in records_list]),
+                   np.concatenate(offsets), np.concatenate(texts))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def title(self, index):
+        """
+        Returns:
+        - str: Title of the article at `index`.
+        """
+        return self._text(2 * index)
+
+    def summary(self, index):
+        """
+        Returns:
+        - str: Summary of the article at `index`.
+        """
+        return self._text(2 * index + 1)
+
+    def titles(self):
+        """
+        Yields:
+        - str: Title of each article.
+        """
+        for index in range(len(self)):
+            yield self._text(2 * index)
+
+    def summaries(self):
+        """
+        Yields:
+        - str: Summary of each article.
+        """
+        for index in range(len(self)):
+            yield self._text(2 * index + 1)
+
+    def relevant_texts(self):
+        """
+        Yields the text scored for each article, its summary followed by its title, as
+        classified by NewsSentimentAnalysis.
+
+        Yields:
+        - str: Summary and title of each article.
+        """
+        for index in range(len(self)):
+            start, end = self.text_offsets[2 * index], self.text_offsets[2 * index + 2]
+            middle = self.text_offsets[2 * index + 1]
+            text = bytes(self.text[start:end])
+            yield (text[middle - start:] + text[:middle - start]).decode('utf-8')
+
+    def _text(self, position):
+        return bytes(self.text[self.text_offsets[position]:self.text_offsets[position + 1]]).decode('utf-8')
+
+    def slice(self, first, last):
+        """
+        Returns the articles at positions [first, last) without copying any data.
+
+        Returns:
+        - SentimentRecords: Views of these records.
+        """
+        return SentimentRecords(self.symbols, self.ids[first:last], self.timestamps[first:last],
+                                self.symbol_ids[first:last], self.labels[first:last], self.scores[first:last],
+                                self.text_offsets[2 * first:2 * last + 1], self.text)
+
+    def for_symbol(self, symbol):
+        """
+        Returns the articles of one symbol without copying any data.
+
+        Args:
+        - symbol (str): Stock symbol.
+
+        Returns:
+        - SentimentRecords: Views of the symbol's articles, empty if the symbol is unknown.
+        """
+        if symbol not in self.symbols:
+            return self.slice(0, 0)
+        code = self.symbols.index(symbol)
+        return self.slice(np.searchsorted(self.symbol_ids, code, side='left'),
+                          np.searchsorted(self.symbol_ids, code, side='right'))
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Returns the articles published in [start_date, end_date).
+
+        Records of a single symbol are sliced without copying; records of several symbols are
+        sliced per symbol and copied into new records.
+
+        Args:
+        - start_date (str): First timestamp of the range, or None for no lower bound.
+        - end_date (str): End of the range (exclusive), or None for no upper bound.
+
+        Returns:
+        - SentimentRecords: The articles in the range.
+        """
+        if len(self) and self.symbol_ids[0] != self.symbol_ids[-1]:
+            ranges = [self.for_symbol(symbol)._range(start_date, end_date) for symbol in self.symbols]
+            offsets = np.searchsorted(self.symbol_ids, np.arange(len(self.symbols)), side='left')
+            return self.take(np.concatenate([np.arange(offset + first, offset + last, dtype=np.int64)
+                                             for offset, (first, last) in zip(offsets, ranges)]))
+        return self.slice(*self._range(start_date, end_date))
+
+    def _range(self, start_date, end_date):
+        first = 0 if start_date is None else np.searchsorted(self.timestamps, to_epoch_ns(start_date), side='left')
+        last = len(self) if end_date is None else np.searchsorted(self.timestamps, to_epoch_ns(end_date), side='left')
+        return first, max(first, last)
+
+    def take(self, indices):
+        """
+        Copies the articles at the given positions into new records.
+
+        Args:
+        - indices (np.ndarray): Positions of the articles, in the order they are taken.
+
+        Returns:
+        - SentimentRecords: The selected articles with their own text blob.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.text_offsets[2 * indices]
+        middles = self.text_offsets[2 * indices + 1]
+        ends = self.text_offsets[2 * indices + 2]
+
+        text = np.empty(0, np.uint8)
+        if len(indices):
+            # Copy runs of articles that are adjacent in the blob in one go
+            breaks = np.flatnonzero(starts[1:] != ends[:-1]) + 1
+            run_starts = starts[np.concatenate([[0], breaks])]
+            run_ends = ends[np.concatenate([breaks - 1, [len(indices) - 1]])]
+            text = np.concatenate([self.text[start:end] for start, end in zip(run_starts, run_ends)])
+
+        bases = np.concatenate([[0], np.cumsum(ends - starts)]).astype(np.int64)
+        text_offsets = np.empty(2 * len(indices) + 1, dtype=np.int64)
+        text_offsets[0::2] = bases
+        text_offsets[1::2] = bases[:-1] + (middles - starts)
+
+        return SentimentRecords(self.symbols, self.ids[indices], self.timestamps[indices],
+                                np.asarray(self.symbol_ids)[indices], self.labels[indices], self.scores[indices],
+                                text_offsets, text)
+
+    def sorted(self):
+        """
+        Returns:
+        - SentimentRecords: The articles ordered by symbol, then by time; self if already ordered.
+        """
+        order = np.lexsort((self.timestamps, self.symbol_ids))
+        if np.array_equal(order, np.arange(len(self))):
+            return self
+        return self.take(order)
+
+    def with_sentiment(self, labels, scores):
+        """
+        Returns these articles with new sentiment, sharing the ids, timestamps and text.
+
+        Args:
+        - labels (list): Sentiment answer or label code per article.
+        - scores (list): Confidence of each label.
+
+        Returns:
+        - SentimentRecords: The scored articles.
+        """
+        if isinstance(labels, np.ndarray) and np.issubdtype(labels.dtype, np.integer):
+            codes = labels.astype(np.int8)
+        else:
+            codes = np.array([label if isinstance(label, (int, np.integer)) else encode_label(label)
+                              for label in labels], dtype=np.int8)
+        codes = codes.reshape(len(self))
+        return SentimentRecords(self.symbols, self.ids, self.timestamps, self.symbol_ids, codes,
+                                np.asarray(scores, dtype=np.float32).reshape(len(self)), self.text_offsets, self.text)
+
+    def with_probabilities(self, probabilities):
+        """
+        Returns these articles labelled with their most likely label and its probability.
+
+        Args:
+        - probabilities (list): Probability of 'Positive', 'Negative' and 'Neutral' per article,
+          as returned by the `classify` methods of the LLM backends; None leaves the article unlabelled.
+
+        Returns:
+        - SentimentRecords: The scored articles.
+        """
+        labels = [None if label_probabilities is None else max(LABELS, key=label_probabilities.__getitem__)
+                  for label_probabilities in probabilities]
+        scores = [np.nan if label is None else label_probabilities[label]
+                  for label, label_probabilities in zip(labels, probabilities)]
+        return self.with_sentiment(labels, scores)
+
+    def to_frame(self, text=False):
+        """
+        Converts the records to a DataFrame.
+
+        Args:
+        - text (bool): Whether to decode the 'title' and 'summary' columns.
+
+        Returns:
+        - pd.DataFrame: 'id', 'timestamp' (UTC), 'symbol' and 'sentiment' (categorical) and 'score' columns.
+        """
+        frame = pd.DataFrame({
+            'id': self.ids,
+            'timestamp': pd.to_datetime(np.asarray(self.timestamps), utc=True),
+            'symbol': pd.Categorical.from_codes(np.asarray(self.symbol_ids), categories=list(self.symbols)),
+            'sentiment': pd.Categorical.from_codes(self.labels, categories=list(LABELS)),
+            'score': self.scores,
+        })
+        if text:
+            frame['title'] = list(self.titles())
+            frame['summary'] = list(self.summaries())
+        return frame
+
+
+class SentimentRecordBuilder:
+    """
+    Accumulates articles into compact typed buffers and builds SentimentRecords from them.
+    """
+
+    def __init__(self):
+        self._symbols = {}
+        self._ids = array('q')
+        self._timestamps = array('q')
+        self._symbol_ids = array('i')
+        self._labels = array('b')
+        self._scores = array('f')
+        self._text_lengths = array('q')
+        self._text = bytearray()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def append(self, symbol, article_id, timestamp, title, summary, label=None, score=float('nan')):
+        """
+        Adds an article.
+
+        Args:
+        - symbol (str): Stock symbol of the article.
+        - article_id (int): Article id.
+        - timestamp (str or datetime): Publication time; naive values are taken as UTC.
+        - title (str): Headline.
+        - summary (str): Summary.
+        - label (str or int): Sentiment answer or label code, or None if not scored.
+        - score (float): Confidence of the label.
+        """
+        symbol_id = self._symbols.setdefault(symbol, len(self._symbols))
+        title, summary = (title or '').encode('utf-8'), (summary or '').encode('utf-8')
+
+        self._ids.append(int(article_id))
+        self._timestamps.append(to_epoch_ns(timestamp))
+        self._symbol_ids.append(symbol_id)
+        if label is None:
+            self._labels.append(UNKNOWN_LABEL)
+        else:
+            self._labels.append(int(label) if isinstance(label, (int, np.integer)) else encode_label(label))
+        self._scores.append(score)
+        self._text_lengths.append(len(title))
+        self._text_lengths.append(len(summary))
+        self._text += title
+        self._text += summary
+
+    def append_article(self, symbol, article):
+        """
+        Adds an article dictionary returned by AlpacaNewsFetcher.
+
+        Args:
+        - symbol (str): Stock symbol the article was fetched for.
+        - article (dict): Article with 'id', 'timestamp', 'title' and 'summary' keys.
+        """
+        self.append(symbol, article['id'], article['timestamp'], article['title'], article['summary'])
+
+    def build(self):
+        """
+        The records are views of the builder's buffers, so no articles can be appended afterwards.
+
+        Returns:
+        - SentimentRecords: The appended articles, ordered by symbol, then by time.
+        """
+        text_offsets = np.zeros(len(self._text_lengths) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._text_lengths, dtype=np.int64), out=text_offsets[1:])
+        records = SentimentRecords(
+            self._symbols, np.frombuffer(self._ids, dtype=np.int64), np.frombuffer(self._timestamps, dtype=np.int64),
+            np.frombuffer(self._symbol_ids, dtype=np.int32), np.frombuffer(self._labels, dtype=np.int8),
+            np.frombuffer(self._scores, dtype=np.float32), text_offsets, np.frombuffer(self._text, dtype=np.uint8))
+        return records.sorted()
+
+
+class SentimentRecordStore:
+    """
+    Local columnar store of news sentiment records, one directory per symbol.
+
+    Like MarketDataStore, every column is a NumPy ``.npy`` file that is memory-mapped on read,
+    next to a ``meta.json`` written last. The titles and summaries are kept in a single byte blob
+    indexed by the ``text_offsets`` column, so reading a symbol or a date range loads no text
+    until an article's text is accessed.
+    """
+
+    COLUMNS = ('ids', 'timestamps', 'labels', 'scores', 'text_offsets', 'text')
+    META_FILE = 'meta.json'
+
+    def __init__(self, root='data/sentiment_store'):
+        """
+        Args:
+            root (str): Directory holding one sub-directory per symbol.
+        """
+        self.root = root
+
+    def symbols(self):
+        """
+        Returns:
+            list: Symbols with stored records.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, self.META_FILE)))
+
+    def read(self, symbol, start_date=None, end_date=None):
+        """
+        Read the stored records of a symbol.
+
+        Args:
+            symbol (str): Stock symbol.
+            start_date (str): First timestamp of the range, or None for the first stored article.
+            end_date (str): End of the range (exclusive), or None for the last stored article.
+
+        Returns:
+            SentimentRecords: Memory-mapped records ordered by time, empty if nothing is stored.
+        """
+        symbol = symbol.upper()
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return SentimentRecords.empty((symbol,))
+
+        directory = self._symbol_dir(symbol)
+        columns = {column: np.load(os.path.join(directory, column + '.npy'), mmap_mode='r') for column in self.COLUMNS}
+        # Columns may hold a tail written after the last meta.json, which is not part of the store yet
+        count = meta['count']
+        text_offsets = columns['text_offsets'][:2 * count + 1]
+        # Every stored article belongs to the directory's symbol, so its symbol ids take no memory
+        symbol_ids = np.broadcast_to(np.int32(0), (count,))
+        records = SentimentRecords((symbol,), columns['ids'][:count], columns['timestamps'][:count], symbol_ids,
+                                   columns['labels'][:count], columns['scores'][:count], text_offsets,
+                                   columns['text'][:text_offsets[-1]])
+        return records.between(start_date, end_date)
+
+    def append(self, records):
+        """
+        Merge records into the store, per symbol.
+
+        Articles already stored with the same id are replaced, so scoring stored records and
+        appending them again updates their sentiment. Articles with ids above the stored ones that
+        are not older than the last stored article are appended to the column files in place, so
+        storing newly fetched news costs time proportional to the news, not to the store.
+
+        Args:
+            records (SentimentRecords): Records to store.
+        """
+        for symbol in records.symbols:
+            new = records.for_symbol(symbol)
+            if not len(new):
+                continue
+            symbol = symbol.upper()
+            new = self._latest(new)
+
+            directory = self._symbol_dir(symbol)
+            meta = self._read_meta(symbol)
+            stored = self.read(symbol)
+            if meta is not None and len(stored):
+                max_id = meta['max_id'] if 'max_id' in meta else int(stored.ids.max())
+                if new.ids.min() > max_id and new.timestamps[0] >= stored.timestamps[-1] \
+                        and self._append_tail(directory, stored, new):
+                    self._write_meta(directory, len(stored) + len(new), max(max_id, int(new.ids.max())))
+                    continue
+
+            merged = self._latest(SentimentRecords.concat([stored, new]))
+            os.makedirs(directory, exist_ok=True)
+            for column in self.COLUMNS:
+                self._save_array(directory, column + '.npy', getattr(merged, column))
+            self._write_meta(directory, len(merged), int(merged.ids.max()))
+
+    @staticmethod
+    def _latest(records):
+        """
+        Keeps the last copy of every article id, ordered by time.
+        """
+        _, last_from_end = np.unique(records.ids[::-1], return_index=True)
+        keep = len(records) - 1 - last_from_end
+        return records.take(keep[np.argsort(records.timestamps[keep], kind='stable')])
+
+    def _append_tail(self, directory, stored, new):
+        """
+        Appends newer articles to the stored column files without rewriting them.
+
+        Returns:
+            bool: False if a column file cannot be extended in place and the store must be rewritten.
+        """
+        first, last = new.text_offsets[0], new.text_offsets[-1]
+        tails = {
+            'ids': (new.ids, len(stored)),
+            'timestamps': (new.timestamps, len(stored)),
+            'labels': (new.labels, len(stored)),
+            'scores': (new.scores, len(stored)),
+            'text_offsets': (new.text_offsets[1:] - first + stored.text_offsets[-1], len(stored.text_offsets)),
+            'text': (new.text[first:last], int(stored.text_offsets[-1])),
+        }
+        headers = {}
+        for column, (tail, count) in tails.items():
+            header = self._extended_header(os.path.join(directory, column + '.npy'), tail, count)
+            if header is None:
+                return False
+            headers[column] = header
+
+        # The stored items are never overwritten, so records read before the append stay valid
+        for column, (tail, count) in tails.items():
+            header_size, header = headers[column]
+            with open(os.path.join(directory, column + '.npy'), 'r+b') as file:
+                file.seek(header_size + count * tail.dtype.itemsize)
+                file.write(np.ascontiguousarray(tail).tobytes())
+                file.truncate()
+                file.seek(0)
+                file.write(header)
+        return True
+
+    @staticmethod
+    def _extended_header(path, tail, count):
+        """
+        Returns the size of a ``.npy`` header and its bytes once `tail` is appended after `count`
+        items, or None if the file has another dtype or the header would change size.
+        """
+        with open(path, 'rb') as file:
+            if np.lib.format.read_magic(file) != (1, 0):
+                return None
+            _, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            header_size = file.tell()
+        if fortran_order or dtype != tail.dtype:
+            return None
+
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                      'fortran_order': False, 'shape': (count + len(tail),)})
+        header = header.getvalue()
+        return (header_size, header) if len(header) == header_size else None
+
+    def _write_meta(self, directory, count, max_id):
+        # meta.json is written last so a crash mid-write leaves the previous records in place
+        meta = {'count': count, 'max_id': max_id}
+        temporary_path = os.path.join(directory, self.META_FILE + '.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(meta, file, indent=2)
+        os.replace(temporary_path, os.path.join(directory, self.META_FILE))
+
+    @staticmethod
+    def _save_array(directory, filename, array):
+        temporary_path = os.path.join(directory, filename + '.tmp.npy')
+        np.save(temporary_path, np.ascontiguousarray(array))
+        os.replace(temporary_path, os.path.join(directory, filename))
+
+    def _read_meta(self, symbol):
+        path = os.path.join(self._symbol_dir(symbol), self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, symbol.upper())
@@ -0,0 +1,231 @@
+import array
+import hashlib
+import threading
+from collections import OrderedDict
+
+import backtrader as bt
+import numpy as np
+
+from strategies import vectorized_indicators
+
+
+class PrecomputedIndicator(bt.Indicator):
+    """
+    Backtrader indicator replaying series computed ahead of time.
+
+    Subclasses created by `precomputed_indicator_class` declare the line names; each line is
+    filled from the matching array of the `values` parameter instead of being recomputed bar by bar.
+
+    Parameters:
+    - values (tuple): One array per line, aligned with the bars of the data feed.
+    - minperiod (int): Number of bars before the first valid value.
+    """
+
+    lines = ()
+
+    params = (
+        ('values', ()),
+        ('minperiod', 1),
+    )
+
+    def __init__(self):
+        self.addminperiod(self.params.minperiod)
+
+    def next(self):
+        index = len(self) - 1
+        for line, values in zip(self.lines, self.params.values):
+            line[0] = values[index]
+
+    def once(self, start, end):
+        for line, values in zip(self.lines, self.params.values):
+            line.array[start:end] = array.array('d', values[start:end].tobytes())
+
+
+_indicator_classes = {}
+
+
+def precomputed_indicator_class(line_names):
+    """
+    Returns the PrecomputedIndicator subclass exposing the given line names.
+
+    Args:
+    - line_names (tuple): Names of the indicator lines, e.g. ('mid', 'top', 'bot').
+
+    Returns:
+    - type: A PrecomputedIndicator subclass, shared by every caller asking for the same lines.
+    """
+    if line_names not in _indicator_classes:
+        name = 'Precomputed_' + '_'.join(line_names)
+        _indicator_classes[line_names] = type(name, (PrecomputedIndicator,), {'lines': line_names})
+    return _indicator_classes[line_names]
+
+
+class IndicatorCache:
+    """
+    A memory-bounded LRU cache of indicator series shared across strategies and runs.
+
+    Series are computed once with the vectorized indicators and keyed on
+    (symbol, data version, indicator, params), where the data version is a digest of the
+    price arrays, so parameter sweeps reuse e.g. the same SMA(20) for every candidate.
+
+    Attributes:
+    - max_bytes (int): Maximum total size of the cached arrays.
+    - hits (int): Number of lookups served from the cache.
+    - misses (int): Number of lookups that computed a new series.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Initializes the IndicatorCache object.
+
+        Args:
+        - max_bytes (int): Maximum total size of the cached arrays; least recently used series are evicted beyond it.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def data_version(*arrays):
+        """
+        Digest identifying the contents of price arrays.
+
+        Args:
+        - *arrays (np.ndarray): Price arrays, e.g. high, low and close.
+
+        Returns:
+        - str: Hex digest of the arrays.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for series in arrays:
+            digest.update(np.ascontiguousarray(series, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def get_or_compute(self, symbol, data_version, indicator, params, compute):
+        """
+        Returns a cached indicator series, computing it on a miss.
+
+        Args:
+        - symbol (str): Symbol of the data feed.
+        - data_version (str): Digest of the price data, see `data_version`.
+        - indicator (str): Indicator name.
+        - params (tuple): Indicator parameters.
+        - compute (callable): Called without arguments to compute the series on a miss.
+
+        Returns:
+        - tuple: One read-only array per indicator line.
+        """
+        key = (symbol, data_version, indicator, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = compute()
+        result = tuple(result) if isinstance(result, tuple) else (result,)
+        for series in result:
+            series.setflags(write=False)
+
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = result
+                self._size += sum(series.nbytes for series in result)
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= sum(series.nbytes for series in evicted)
+        return result
+
+    def bind(self, data):
+        """
+        Binds the cache to a Backtrader data feed.
+
+        Args:
+        - data (bt.feeds.DataBase): Data feed of the strategy.
+
+        Returns:
+        - CachedIndicators: Factory of the indicators of the feed.
+        """
+        return CachedIndicators(self, data)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedIndicators:
+    """
+    Builds the Backtrader indicators used by the strategies for one data feed.
+
+    Indicators are replayed from series precomputed through the cache. Without a cache, or when
+    the feed is not preloaded (e.g. live data), the regular Backtrader indicators are built instead.
+    """
+
+    def __init__(self, cache, data):
+        """
+        Initializes the CachedIndicators object.
+
+        Args:
+        - cache (IndicatorCache): Cache holding the series, or None to build regular indicators.
+        - data (bt.feeds.DataBase): Data feed of the strategy.
+        """
+        self.cache = cache if cache is not None and len(data.close.array) > 0 else None
+        self.data = data
+        if self.cache is not None:
+            self.high = np.asarray(data.high.array, dtype=np.float64)
+            self.low = np.asarray(data.low.array, dtype=np.float64)
+            self.close = np.asarray(data.close.array, dtype=np.float64)
+            self.symbol = data._name
+            self.version = IndicatorCache.data_version(self.high, self.low, self.close)
+
+    def _indicator(self, name, params, line_names, minperiod, compute, build):
+        if self.cache is None:
+            return build()
+        values = self.cache.get_or_compute(self.symbol, self.version, name, params, compute)
+        indicator_class = precomputed_indicator_class(line_names)
+        return indicator_class(self.data, values=values, minperiod=minperiod)
+
+    def sma(self, period):
+        """bt.indicators.SimpleMovingAverage of the close."""
+        return self._indicator('sma', (period,), ('sma',), period,
+                               lambda: vectorized_indicators.simple_moving_average(self.close, period),
+                               lambda: bt.indicators.SimpleMovingAverage(self.data.close, period=period))
+
+    def ema(self, period):
+        """bt.indicators.ExponentialMovingAverage of the close."""
+        return self._indicator('ema', (period,), ('ema',), period,
+                               lambda: vectorized_indicators.exponential_moving_average(self.close, period),
+                               lambda: bt.indicators.ExponentialMovingAverage(self.data.close, period=period))
+
+    def rsi(self, period):
+        """bt.indicators.RelativeStrengthIndex of the close."""
+        return self._indicator('rsi', (period,), ('rsi',), period + 1,
+                               lambda: vectorized_indicators.relative_strength_index(self.close, period),
+                               lambda: bt.indicators.RelativeStrengthIndex(self.data, period=period))
+
+    def bollinger(self, period, devfactor):
+        """bt.indicators.BollingerBands of the close."""
+        return self._indicator('bollinger', (period, devfactor), ('mid', 'top', 'bot'), period,
+                               lambda: vectorized_indicators.bollinger_bands(self.close, period, devfactor),
+                               lambda: bt.indicators.BollingerBands(self.data.close, period=period,
+                                                                    devfactor=devfactor))
+
+    def macd(self, period_me1, period_me2, period_signal):
+        """bt.indicators.MACD of the close."""
+        return self._indicator('macd', (period_me1, period_me2, period_signal), ('macd', 'signal', 'histo'),
+                               max(period_me1, period_me2) + period_signal - 1,
+                               lambda: vectorized_indicators.macd(self.close, period_me1, period_me2, period_signal),
+                               lambda: bt.indicators.MACD(self.data.close, period_me1=period_me1,
+                                                          period_me2=period_me2, period_signal=period_signal))
+
+    def stochastic(self, period, period_dfast, period_dslow=3):
+        """bt.indicators.Stochastic of the feed."""
+        return self._indicator('stochastic', (period, period_dfast, period_dslow), ('percK', 'percD'),
+                               period + period_dfast + period_dslow - 2,
+                               lambda: vectorized_indicators.stochastic(self.high, self.low, self.close, period,
+                                                                        period_dfast, period_dslow),
+                               lambda: bt.indicators.Stochastic(self.data, period=period, period_dfast=period_dfast,
+                                                                period_dslow=period_dslow))
@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def optimized_orders(fast_ma, slow_ma, rsi, rsi_oversold=30, rsi_overbought=70, sentiment=None):
+    """
+    Entry and exit rules of the OptimizedStrategy, shared by the Backtrader strategies, the
+    vectorized engine and the live trader.
+
+    Buys if the fast MA is above the slow MA and the RSI is below the oversold threshold; otherwise
+    sells if the fast MA is below the slow MA or the RSI is above the overbought threshold. With a
+    sentiment signal, buys also need a positive and sells a negative sentiment.
+
+    Comparisons with the NaN of warming-up indicators are False, so they issue no order.
+
+    Args:
+        fast_ma (float or np.ndarray): Fast moving average.
+        slow_ma (float or np.ndarray): Slow moving average.
+        rsi (float or np.ndarray): Relative Strength Index.
+        rsi_oversold (float): RSI level considered as oversold for buying.
+        rsi_overbought (float): RSI level considered as overbought for selling.
+        sentiment (float or np.ndarray): Net sentiment signal, or None for the technical-only rules.
+
+    Returns:
+        int or np.ndarray: +1 for a buy, -1 for a sell and 0 for no order, per value of the inputs.
+    """
+    fast_ma, slow_ma, rsi = np.asarray(fast_ma), np.asarray(slow_ma), np.asarray(rsi)
+    buy = (fast_ma > slow_ma) & (rsi < rsi_oversold)
+    sell = (fast_ma < slow_ma) | (rsi > rsi_overbought)
+    if sentiment is not None:
+        sentiment = np.asarray(sentiment)
+        buy &= sentiment > 0
+        sell &= sentiment < 0
+
+    orders = np.where(buy, 1, np.where(sell, -1, 0))
+    return int(orders) if orders.ndim == 0 else orders
@@ -1,5 +1,8 @@
 import backtrader as bt
 
+from profiling.tracer import traced
+from strategies.indicator_cache import CachedIndicators
+
 
 class AdvancedStrategy(bt.Strategy):
     """
@@ -21,6 +24,7 @@ class AdvancedStrategy(bt.Strategy):
     - macd_signal_window (int): Signal window period for MACD.
     - stochastic_k_window (int): Window period for Stochastic Oscillator %K.
     - stochastic_d_window (int): Window period for Stochastic Oscillator %D.
+    - indicator_cache (IndicatorCache): Optional cache of precomputed indicator series shared across runs.
     """
 
     params = (
@@ -39,6 +43,7 @@ class AdvancedStrategy(bt.Strategy):
         ("macd_signal_window", 9),
         ("stochastic_k_window", 14),
         ("stochastic_d_window", 3),
+        ("indicator_cache", None),
     )
 
     def __init__(self):
@@ -54,18 +59,18 @@ class AdvancedStrategy(bt.Strategy):
         - macd: Moving Average Convergence Divergence (MACD)
         - stochastic: Stochastic Oscillator
         """
-        self.fast_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.fast_ma)
-        self.slow_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.slow_ma)
-        self.rsi = bt.indicators.RelativeStrengthIndex(period=self.params.rsi_period)
-        self.bollinger = bt.indicators.BollingerBands(self.data.close, period=self.params.bollinger_window,
-                                                      devfactor=self.params.bollinger_dev)
-        self.ema = bt.indicators.ExponentialMovingAverage(self.data.close, period=self.params.ema_window)
-        self.macd = bt.indicators.MACD(self.data.close, period_me1=self.params.macd_short_window,
-                                       period_me2=self.params.macd_long_window,
-                                       period_signal=self.params.macd_signal_window)
-        self.stochastic = bt.indicators.Stochastic(self.data, period=self.params.stochastic_k_window,
-                                                   period_dfast=self.params.stochastic_d_window)
+        indicators = CachedIndicators(self.params.indicator_cache, self.data)
+
+        self.fast_ma = indicators.sma(self.params.fast_ma)
+        self.slow_ma = indicators.sma(self.params.slow_ma)
+        self.rsi = indicators.rsi(self.params.rsi_period)
+        self.bollinger = indicators.bollinger(self.params.bollinger_window, self.params.bollinger_dev)
+        self.ema = indicators.ema(self.params.ema_window)
+        self.macd = indicators.macd(self.params.macd_short_window, self.params.macd_long_window,
+                                    self.params.macd_signal_window)
+        self.stochastic = indicators.stochastic(self.params.stochastic_k_window, self.params.stochastic_d_window)
 
+    @traced()
     def next(self):
         """
         Executes the trading logic on each iteration.
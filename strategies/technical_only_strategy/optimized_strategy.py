@@ -1,5 +1,9 @@
 import backtrader as bt
 
+from profiling.tracer import traced
+from strategies.indicator_cache import CachedIndicators
+from strategies.optimized_rules import optimized_orders
+
 
 class OptimizedStrategy(bt.Strategy):
     """
@@ -11,6 +15,7 @@ class OptimizedStrategy(bt.Strategy):
     - rsi_period (int): Period for the Relative Strength Index (RSI).
     - rsi_oversold (float): RSI level considered as oversold for buying.
     - rsi_overbought (float): RSI level considered as overbought for selling.
+    - indicator_cache (IndicatorCache): Optional cache of precomputed indicator series shared across runs.
     """
 
     params = (
@@ -19,6 +24,7 @@ class OptimizedStrategy(bt.Strategy):
         ("rsi_period", 14),
         ("rsi_oversold", 30),
         ("rsi_overbought", 70),
+        ("indicator_cache", None),
     )
 
     def __init__(self):
@@ -30,10 +36,13 @@ class OptimizedStrategy(bt.Strategy):
         - slow_ma: Slow Simple Moving Average (SMA)
         - rsi: Relative Strength Index (RSI)
         """
-        self.fast_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.fast_ma)
-        self.slow_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.slow_ma)
-        self.rsi = bt.indicators.RelativeStrengthIndex(period=self.params.rsi_period)
+        indicators = CachedIndicators(self.params.indicator_cache, self.data)
+
+        self.fast_ma = indicators.sma(self.params.fast_ma)
+        self.slow_ma = indicators.sma(self.params.slow_ma)
+        self.rsi = indicators.rsi(self.params.rsi_period)
 
+    @traced()
     def next(self):
         """
         Executes the trading logic on each iteration.
@@ -46,8 +55,10 @@ class OptimizedStrategy(bt.Strategy):
         - Fast MA is below Slow MA
         - RSI is above the overbought threshold
         """
-        if self.fast_ma > self.slow_ma and self.rsi < self.params.rsi_oversold:
+        order = optimized_orders(self.fast_ma[0], self.slow_ma[0], self.rsi[0], self.params.rsi_oversold,
+                                 self.params.rsi_overbought)
+        if order > 0:
             self.buy()
 
-        elif self.fast_ma < self.slow_ma or self.rsi > self.params.rsi_overbought:
+        elif order < 0:
             self.sell()
@@ -1,5 +1,8 @@
 import backtrader as bt
 
+from profiling.tracer import traced
+from strategies.indicator_cache import CachedIndicators
+
 
 class AdvancedStrategy(bt.Strategy):
     """
@@ -21,6 +24,7 @@ class AdvancedStrategy(bt.Strategy):
     - macd_signal_window (int): Signal window period for MACD.
     - stochastic_k_window (int): Window period for Stochastic Oscillator %K.
     - stochastic_d_window (int): Window period for Stochastic Oscillator %D.
+    - indicator_cache (IndicatorCache): Optional cache of precomputed indicator series shared across runs.
     """
 
     params = (
@@ -39,13 +43,14 @@ class AdvancedStrategy(bt.Strategy):
         ("macd_signal_window", 9),
         ("stochastic_k_window", 14),
         ("stochastic_d_window", 3),
+        ("indicator_cache", None),
     )
 
     def __init__(self):
         """
         Initializes the AdvancedStrategy.
 
-        Creates and initializes the required technical indicators and sentiment data:
+        Creates and initializes the required technical indicators and sentiment data for every data feed:
         - fast_ma: Fast Simple Moving Average (SMA)
         - slow_ma: Slow Simple Moving Average (SMA)
         - rsi: Relative Strength Index (RSI)
@@ -54,23 +59,48 @@ class AdvancedStrategy(bt.Strategy):
         - macd: Moving Average Convergence Divergence (MACD)
         - stochastic: Stochastic Oscillator
         - sentiment: Custom sentiment data
+
+        The indicators of the first data feed are also exposed directly on the strategy.
+        """
+        self.assets = [self._create_indicators(data) for data in self.datas]
+        for name, indicator in self.assets[0].items():
+            setattr(self, name, indicator)
+        # Bars each feed needs before its own indicators are valid
+        self.warmups = [max(indicator._minperiod for name, indicator in asset.items() if name != 'sentiment')
+                        for asset in self.assets]
+
+    def _create_indicators(self, data):
         """
-        self.fast_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.fast_ma)
-        self.slow_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.slow_ma)
-        self.rsi = bt.indicators.RelativeStrengthIndex(period=self.params.rsi_period)
-        self.bollinger = bt.indicators.BollingerBands(self.data.close, period=self.params.bollinger_window,
-                                                      devfactor=self.params.bollinger_dev)
-        self.ema = bt.indicators.ExponentialMovingAverage(self.data.close, period=self.params.ema_window)
-        self.macd = bt.indicators.MACD(self.data.close, period_me1=self.params.macd_short_window,
-                                       period_me2=self.params.macd_long_window,
-                                       period_signal=self.params.macd_signal_window)
-        self.stochastic = bt.indicators.Stochastic(self.data, period=self.params.stochastic_k_window,
-                                                   period_dfast=self.params.stochastic_d_window)
-        self.sentiment = self.datas[0].signal
+        Creates the indicators of one data feed.
+
+        Returns:
+        - dict: Indicators and sentiment line of the feed, keyed by attribute name.
+        """
+        indicators = CachedIndicators(self.params.indicator_cache, data)
+
+        return {
+            'fast_ma': indicators.sma(self.params.fast_ma),
+            'slow_ma': indicators.sma(self.params.slow_ma),
+            'rsi': indicators.rsi(self.params.rsi_period),
+            'bollinger': indicators.bollinger(self.params.bollinger_window, self.params.bollinger_dev),
+            'ema': indicators.ema(self.params.ema_window),
+            'macd': indicators.macd(self.params.macd_short_window, self.params.macd_long_window,
+                                    self.params.macd_signal_window),
+            'stochastic': indicators.stochastic(self.params.stochastic_k_window, self.params.stochastic_d_window),
+            'sentiment': data.signal,
+        }
 
+    def prenext(self):
+        """
+        Trades the warmed-up feeds while others are still warming up or have not started, so that an
+        asset trades the same in a Cerebro run of its own as next to feeds with other histories.
+        """
+        self.next()
+
+    @traced()
     def next(self):
         """
-        Executes the trading logic on each iteration.
+        Executes the trading logic on each iteration, for every data feed.
 
         Buys if conditions for a bullish trend are met:
         - RSI is below the oversold threshold
@@ -86,24 +116,27 @@ class AdvancedStrategy(bt.Strategy):
         - Close price is below the EMA
         - Sentiment is negative
         """
-        buy_condition = (
-                self.rsi < self.params.rsi_oversold and
-                self.macd.macd > 0 and
-                self.data.close > self.bollinger.lines.bot and
-                self.data.close > self.ema and
-                self.sentiment > 0
-        )
-
-        sell_condition = (
-                self.rsi > self.params.rsi_overbought or
-                self.macd.macd < 0 or
-                self.data.close < self.bollinger.lines.top or
-                self.data.close < self.ema or
-                self.sentiment < 0
-        )
-
-        if buy_condition:
-            self.buy()
-
-        if sell_condition:
-            self.sell()
+        for data, asset, warmup in zip(self.datas, self.assets, self.warmups):
+            if len(data) < warmup:
+                continue
+            buy_condition = (
+                    asset['rsi'] < self.params.rsi_oversold and
+                    asset['macd'].macd > 0 and
+                    data.close > asset['bollinger'].lines.bot and
+                    data.close > asset['ema'] and
+                    asset['sentiment'] > 0
+            )
+
+            sell_condition = (
+                    asset['rsi'] > self.params.rsi_overbought or
+                    asset['macd'].macd < 0 or
+                    data.close < asset['bollinger'].lines.top or
+                    data.close < asset['ema'] or
+                    asset['sentiment'] < 0
+            )
+
+            if buy_condition:
+                self.buy(data=data)
+
+            if sell_condition:
+                self.sell(data=data)
@@ -1,5 +1,9 @@
 import backtrader as bt
 
+from profiling.tracer import traced
+from strategies.indicator_cache import CachedIndicators
+from strategies.optimized_rules import optimized_orders
+
 
 class OptimizedStrategy(bt.Strategy):
     """
@@ -11,6 +15,7 @@ class OptimizedStrategy(bt.Strategy):
     - rsi_period (int): Period for the Relative Strength Index (RSI).
     - rsi_oversold (float): RSI level considered as oversold for buying.
     - rsi_overbought (float): RSI level considered as overbought for selling.
+    - indicator_cache (IndicatorCache): Optional cache of precomputed indicator series shared across runs.
     """
 
     params = (
@@ -19,26 +24,55 @@ class OptimizedStrategy(bt.Strategy):
         ("rsi_period", 14),
         ("rsi_oversold", 30),
         ("rsi_overbought", 70),
+        ("indicator_cache", None),
     )
 
     def __init__(self):
         """
         Initializes the OptimizedStrategy.
 
-        Creates and initializes the required indicators and sentiment data:
+        Creates and initializes the required indicators and sentiment data for every data feed:
         - fast_ma: Fast Simple Moving Average (SMA)
         - slow_ma: Slow Simple Moving Average (SMA)
         - rsi: Relative Strength Index (RSI)
         - sentiment: Custom sentiment data
+
+        The indicators of the first data feed are also exposed directly on the strategy.
+        """
+        self.assets = [self._create_indicators(data) for data in self.datas]
+        for name, indicator in self.assets[0].items():
+            setattr(self, name, indicator)
+        # Bars each feed needs before its own indicators are valid
+        self.warmups = [max(indicator._minperiod for name, indicator in asset.items() if name != 'sentiment')
+                        for asset in self.assets]
+
+    def _create_indicators(self, data):
+        """
+        Creates the indicators of one data feed.
+
+        Returns:
+        - dict: Indicators and sentiment line of the feed, keyed by attribute name.
+        """
+        indicators = CachedIndicators(self.params.indicator_cache, data)
+
+        return {
+            'fast_ma': indicators.sma(self.params.fast_ma),
+            'slow_ma': indicators.sma(self.params.slow_ma),
+            'rsi': indicators.rsi(self.params.rsi_period),
+            'sentiment': data.signal,
+        }
+
+    def prenext(self):
+        """
+        Trades the warmed-up feeds while others are still warming up or have not started, so that an
+        asset trades the same in a Cerebro run of its own as next to feeds with other histories.
         """
-        self.fast_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.fast_ma)
-        self.slow_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.slow_ma)
-        self.rsi = bt.indicators.RelativeStrengthIndex(period=self.params.rsi_period)
-        self.sentiment = self.datas[0].signal
+        self.next()
 
+    @traced()
     def next(self):
         """
-        Executes the trading logic on each iteration.
+        Executes the trading logic on each iteration, for every data feed.
 
         Buys if conditions for a bullish trend are met:
         - Fast MA is above Slow MA
@@ -49,8 +83,13 @@ class OptimizedStrategy(bt.Strategy):
         - Fast MA is below Slow MA or RSI is above the overbought threshold
         - Sentiment is negative
         """
-        if self.fast_ma > self.slow_ma and self.rsi < self.params.rsi_oversold and self.sentiment > 0:
-            self.buy()
+        for data, asset, warmup in zip(self.datas, self.assets, self.warmups):
+            if len(data) < warmup:
+                continue
+            order = optimized_orders(asset['fast_ma'][0], asset['slow_ma'][0], asset['rsi'][0],
+                                     self.params.rsi_oversold, self.params.rsi_overbought, asset['sentiment'][0])
+            if order > 0:
+                self.buy(data=data)
 
-        elif (self.fast_ma < self.slow_ma or self.rsi > self.params.rsi_overbought) and self.sentiment < 0:
-            self.sell()
+            elif order < 0:
+                self.sell(data=data)
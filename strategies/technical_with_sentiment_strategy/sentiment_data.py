@@ -20,3 +20,23 @@ class SentimentData(bt.feeds.GenericCSVData):
         ('signal', 7),
         ('openinterest', -1)
     )
+
+
+class SentimentPandasData(bt.feeds.PandasData):
+    """
+    Custom Backtrader data feed reading merged stock and sentiment data straight from a DataFrame.
+
+    The DataFrame index holds the dates and the OHLCV columns are matched by name, so the merged
+    frame built by StockDataProcessor is consumed in memory without a CSV round-trip.
+
+    Parameters:
+    - signal (int or str): Column for the sentiment signal; -1 detects a column named 'signal'.
+    - openinterest (int or str): Column for the open interest; None as merged data has none.
+    """
+
+    lines = ('signal',)
+
+    params = (
+        ('signal', -1),
+        ('openinterest', None)
+    )
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def simple_moving_average(values, period):
+    """
+    Simple moving average, matching bt.indicators.SimpleMovingAverage.
+
+    Args:
+        values (np.ndarray): Input series.
+        period (int): Window length.
+
+    Returns:
+        np.ndarray: Moving average, NaN for the first ``period - 1`` bars.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        result[period - 1:] = sliding_window_view(values, period).mean(axis=1)
+    return result
+
+
+def exponential_smoothing(values, period, alpha, first_valid=0):
+    """
+    Exponential smoothing seeded with the simple average of the first ``period`` values,
+    the way Backtrader seeds its EMA and SMMA indicators.
+
+    Args:
+        values (np.ndarray): Input series.
+        period (int): Length of the seeding window.
+        alpha (float): Smoothing factor.
+        first_valid (int): Index of the first valid input value.
+
+    Returns:
+        np.ndarray: Smoothed series, NaN before the seed.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    seed_index = first_valid + period - 1
+    result = np.full(len(values), np.nan)
+    if len(values) <= seed_index:
+        return result
+
+    seeded = np.full(len(values), np.nan)
+    seeded[seed_index] = values[first_valid:seed_index + 1].mean()
+    seeded[seed_index + 1:] = values[seed_index + 1:]
+    # With adjust=False pandas applies the same recursion, in C, from the first non-NaN value
+    result[seed_index:] = pd.Series(seeded[seed_index:]).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return result
+
+
+def relative_strength_index(values, period):
+    """
+    Relative Strength Index with Wilder smoothing, matching bt.indicators.RelativeStrengthIndex.
+
+    Args:
+        values (np.ndarray): Input series, usually close prices.
+        period (int): RSI period.
+
+    Returns:
+        np.ndarray: RSI in [0, 100], NaN for the first ``period`` bars.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    change = np.empty(len(values))
+    change[0] = np.nan
+    change[1:] = np.diff(values)
+
+    up_average = exponential_smoothing(np.maximum(change, 0.0), period, 1.0 / period, first_valid=1)
+    down_average = exponential_smoothing(np.maximum(-change, 0.0), period, 1.0 / period, first_valid=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + up_average / down_average)
+    # Only gains over the window: RSI saturates at 100
+    rsi[(down_average == 0.0) & ~np.isnan(up_average)] = 100.0
+    return rsi
+
+
+def exponential_moving_average(values, period, first_valid=0):
+    """
+    Exponential moving average, matching bt.indicators.ExponentialMovingAverage.
+
+    Args:
+        values (np.ndarray): Input series.
+        period (int): EMA period.
+        first_valid (int): Index of the first valid input value.
+
+    Returns:
+        np.ndarray: Moving average, NaN before ``first_valid + period - 1``.
+    """
+    return exponential_smoothing(values, period, 2.0 / (1 + period), first_valid=first_valid)
+
+
+def bollinger_bands(values, period, devfactor):
+    """
+    Bollinger Bands, matching bt.indicators.BollingerBands.
+
+    Args:
+        values (np.ndarray): Input series.
+        period (int): Window length.
+        devfactor (float): Standard deviation factor of the bands.
+
+    Returns:
+        tuple: (mid, top, bot) arrays.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mid = simple_moving_average(values, period)
+    # Population standard deviation computed as Backtrader does: sqrt(mean(x^2) - mean(x)^2)
+    deviation = np.sqrt(np.maximum(simple_moving_average(values ** 2, period) - mid ** 2, 0.0))
+    return mid, mid + devfactor * deviation, mid - devfactor * deviation
+
+
+def macd(values, period_me1, period_me2, period_signal):
+    """
+    Moving Average Convergence Divergence, matching bt.indicators.MACD.
+
+    Args:
+        values (np.ndarray): Input series.
+        period_me1 (int): Period of the short EMA.
+        period_me2 (int): Period of the long EMA.
+        period_signal (int): Period of the signal EMA.
+
+    Returns:
+        tuple: (macd, signal, histo) arrays.
+    """
+    macd_line = exponential_moving_average(values, period_me1) - exponential_moving_average(values, period_me2)
+    signal = exponential_moving_average(macd_line, period_signal, first_valid=max(period_me1, period_me2) - 1)
+    return macd_line, signal, macd_line - signal
+
+
+def stochastic(high, low, close, period, period_dfast, period_dslow=3):
+    """
+    Slow Stochastic Oscillator, matching bt.indicators.Stochastic.
+
+    Args:
+        high (np.ndarray): High prices.
+        low (np.ndarray): Low prices.
+        close (np.ndarray): Close prices.
+        period (int): Look-back period of the highest high and lowest low.
+        period_dfast (int): Smoothing period of %K.
+        period_dslow (int): Smoothing period of %D.
+
+    Returns:
+        tuple: (percK, percD) arrays.
+    """
+    high, low, close = (np.asarray(series, dtype=np.float64) for series in (high, low, close))
+    highest = np.full(len(close), np.nan)
+    lowest = np.full(len(close), np.nan)
+    if len(close) >= period:
+        highest[period - 1:] = sliding_window_view(high, period).max(axis=1)
+        lowest[period - 1:] = sliding_window_view(low, period).min(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fast_k = 100.0 * (close - lowest) / (highest - lowest)
+
+    slow_k = _shifted_sma(fast_k, period_dfast, period - 1)
+    slow_d = _shifted_sma(slow_k, period_dslow, period + period_dfast - 2)
+    return slow_k, slow_d
+
+
+def _shifted_sma(values, period, first_valid):
+    result = np.full(len(values), np.nan)
+    result[first_valid:] = simple_moving_average(values[first_valid:], period)
+    return result
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('alpaca_trade_api')
+
+from alpaca.client import AlpacaNewsFetcher
+from alpaca.news_watermarks import NewsWatermarkStore
+
+
+class StubNewsRestClient:
+    """A local stand-in for alpaca_trade_api.REST serving news from a list, with the API's paging rules."""
+
+    def __init__(self, articles):
+        self.articles = list(articles)
+        self.calls = 0
+
+    def get_news(self, symbol, start, end, limit=50, sort='desc'):
+        self.calls += 1
+        start, end = pd.Timestamp(start), pd.Timestamp(end, tz='UTC')
+        matching = [article for article in self.articles
+                    if symbol in article.symbols and start <= pd.Timestamp(article.created_at) <= end]
+        matching.sort(key=lambda article: (pd.Timestamp(article.created_at), article.id), reverse=sort == 'desc')
+        return matching[:limit]
+
+
+def make_article(article_id, created_at):
+    return SimpleNamespace(id=article_id, created_at=pd.Timestamp(created_at, tz='UTC'),
+                           headline='Headline {}'.format(article_id), summary='', symbols=['AAPL'])
+
+
+def make_fetcher(articles):
+    return AlpacaNewsFetcher('key', 'secret', rest_client=StubNewsRestClient(articles))
+
+
+def test_stream_news_pages_through_the_range_oldest_first():
+    articles = [make_article(index, pd.Timestamp('2022-03-01 14:00') + pd.Timedelta(minutes=index))
+                for index in range(7)]
+    fetcher = make_fetcher(reversed(articles))
+
+    streamed = list(fetcher.stream_news('AAPL', '2022-03-01', '2022-03-31', page_size=3))
+
+    assert [article['id'] for article in streamed] == list(range(7))
+    assert fetcher.rest_client.calls == 4
+
+
+def test_stream_news_returns_every_article_of_a_timestamp_shared_beyond_one_page():
+    articles = [make_article(index, '2022-03-01 14:00') for index in range(7)]
+    articles += [make_article(7, '2022-03-01 15:00'), make_article(8, '2022-03-01 16:00')]
+    fetcher = make_fetcher(articles)
+
+    streamed = list(fetcher.stream_news('AAPL', '2022-03-01', '2022-03-31', page_size=3))
+
+    assert [article['id'] for article in streamed] == list(range(9))
+
+
+def test_stream_news_resumes_from_the_watermark(tmp_path):
+    watermark_store = NewsWatermarkStore(str(tmp_path / 'watermarks.json'))
+    articles = [make_article(0, '2022-03-01 14:00'), make_article(1, '2022-03-01 15:00'),
+                make_article(2, '2022-03-01 15:00')]
+    fetcher = make_fetcher(articles)
+    first_run = list(fetcher.stream_news('AAPL', '2022-03-01', '2022-03-31', page_size=4,
+                                         watermark_store=watermark_store))
+
+    # New articles arrive, one of them at the watermark timestamp
+    fetcher.rest_client.articles += [make_article(3, '2022-03-01 15:00'), make_article(4, '2022-03-02 09:00')]
+    second_run = list(fetcher.stream_news('AAPL', '2022-03-01', '2022-03-31', page_size=4,
+                                          watermark_store=NewsWatermarkStore(watermark_store.path)))
+
+    assert [article['id'] for article in first_run] == [0, 1, 2]
+    assert [article['id'] for article in second_run] == [3, 4]
@@ -0,0 +1,38 @@
+import pytest
+
+openai = pytest.importorskip('openai')
+
+from benchmarks.openai_stub_server import StubOpenAIServer, stub_label
+from llms.async_openai_llm import AsyncOpenAISentimentAnalysis
+from llms.openai_llm import MODEL, PROMPT_TEMPLATE
+from sentiment_analysis.sentiment_cache import SentimentCache
+
+TEXTS = ['Apple beats earnings estimates', 'Tesla recalls 2 million cars', 'Apple beats earnings estimates',
+         'Fed holds rates steady', 'Nvidia guides revenue higher']
+
+
+def expected_labels(texts):
+    return [stub_label(PROMPT_TEMPLATE.format(text=text)) for text in texts]
+
+
+def test_analyze_many_keeps_order_retries_rate_limits_and_dedups():
+    with StubOpenAIServer(latency=0.01, rate_limited_requests=2) as stub:
+        analyzer = AsyncOpenAISentimentAnalysis('stub-key', base_url=stub.url, max_concurrency=2)
+        results = analyzer.analyze_many_sync(TEXTS)
+
+        assert results == expected_labels(TEXTS)
+        assert stub.rejected == 2
+        # The duplicated headline is requested once
+        assert stub.requests == len(set(TEXTS))
+
+
+def test_analyze_many_caches_successes_before_raising(tmp_path):
+    cache = SentimentCache(str(tmp_path / 'cache.sqlite'))
+    with StubOpenAIServer(latency=0.01, rate_limited_requests=1) as stub:
+        analyzer = AsyncOpenAISentimentAnalysis('stub-key', base_url=stub.url, max_retries=0, cache=cache)
+        with pytest.raises(openai.RateLimitError):
+            analyzer.analyze_many_sync(TEXTS)
+
+    distinct = list(dict.fromkeys(TEXTS))
+    cached = cache.get_many([cache.make_key(MODEL, PROMPT_TEMPLATE, text) for text in distinct])
+    assert len(cached) == len(distinct) - 1
@@ -0,0 +1,45 @@
+import math
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('backtrader')
+pytest.importorskip('pyarrow')
+
+from runner.backtest_results import ResultStore
+from runner.backtest_runner import ANALYZER_PROFILES, BacktestRunner
+
+MERGED_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'merged_df.csv')
+STRATEGY_PARAMS = {'fast_ma': 5, 'slow_ma': 20, 'rsi_period': 7, 'rsi_oversold': 40, 'rsi_overbought': 60}
+
+
+@pytest.mark.parametrize('analyzer_profile', sorted(ANALYZER_PROFILES))
+def test_every_profile_persists_the_broker_value_per_bar(tmp_path, analyzer_profile):
+    store = ResultStore(str(tmp_path))
+
+    result = BacktestRunner.run_backtest(MERGED_DATA_PATH, 'AAPL', '2022-01-01', '2022-12-31',
+                                         strategy_params=STRATEGY_PARAMS, analyzer_profile=analyzer_profile,
+                                         result_store=store, verbose=False)
+
+    value = store.load_frame(result.run_id, 'value')
+    assert len(value) == len(pd.read_csv(MERGED_DATA_PATH))
+    assert math.isclose(value['value'].iloc[-1], result.metrics['final_value'])
+    assert value['value'].nunique() > 1
+    pd.testing.assert_frame_equal(value, result.frames['value'], check_freq=False)
+    assert result.metrics['value_at_risk'] is not None
+    store.close()
+
+
+def test_value_at_risk_is_the_same_with_and_without_pyfolio():
+    results = {profile: BacktestRunner.run_backtest(MERGED_DATA_PATH, 'AAPL', '2022-01-01', '2022-12-31',
+                                                    strategy_params=STRATEGY_PARAMS, analyzer_profile=profile,
+                                                    verbose=False)
+               for profile in ('full', 'light')}
+
+    full, light = results['full'], results['light']
+    assert set(full.frames) == {'value', 'returns', 'positions', 'transactions'} and set(light.frames) == {'value'}
+    assert math.isclose(full.metrics['value_at_risk'], light.metrics['value_at_risk'], rel_tol=1e-9)
+    # The PyFolio returns are the daily returns of the stored value
+    returns = full.frames['value']['value'].pct_change().dropna().to_numpy()
+    assert full.frames['returns']['return'].to_numpy()[1:] == pytest.approx(returns)
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from sentiment_analysis.cascade_sentiment import CascadeSentimentAnalysis
+
+
+class StubClassifier:
+    """A stand-in for NewsSentimentAnalysis answering from a fixed table of (label, confidence)."""
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def classify_texts(self, texts, batch_size=32):
+        return [self.answers[text][0] for text in texts], [self.answers[text][1] for text in texts]
+
+
+CLASSIFIER_ANSWERS = {
+    'Apple beats earnings estimates': ('POSITIVE', 0.99),
+    'Fed holds rates steady': ('NEGATIVE', 0.6),
+    'Tesla recalls 2 million cars': ('NEGATIVE', 0.97),
+    'Markets await jobs data': ('POSITIVE', 0.7),
+}
+
+
+def make_cascade(answer, threshold=0.95):
+    escalated_calls = []
+
+    def escalate(texts):
+        escalated_calls.append(list(texts))
+        return [answer(text) for text in texts]
+
+    return CascadeSentimentAnalysis(StubClassifier(CLASSIFIER_ANSWERS), escalate, threshold=threshold), escalated_calls
+
+
+def test_only_low_confidence_texts_are_escalated_in_one_call():
+    cascade, escalated_calls = make_cascade(lambda text: ' Neutral')
+    texts = list(CLASSIFIER_ANSWERS)
+
+    result = cascade.classify_texts(texts)
+
+    assert escalated_calls == [['Fed holds rates steady', 'Markets await jobs data']]
+    assert result['label'] == ['Positive', 'Neutral', 'Negative', 'Neutral']
+    assert result['escalated'] == [False, True, False, True]
+    assert result['score'][0] == 0.99 and math.isnan(result['score'][1])
+    assert cascade.escalation_rate == 0.5
+
+
+def test_label_probabilities_of_the_llm_give_the_label_and_score():
+    cascade, _ = make_cascade(lambda text: {'Positive': 0.1, 'Negative': 0.7, 'Neutral': 0.2})
+
+    result = cascade.classify_texts(['Fed holds rates steady'])
+
+    assert result['label'] == ['Negative']
+    assert result['score'] == [0.7]
+
+
+def test_per_label_thresholds_escalate_labels_missing_from_the_mapping():
+    cascade, escalated_calls = make_cascade(lambda text: 'Neutral', threshold={'Negative': 0.5})
+
+    cascade.classify_texts(list(CLASSIFIER_ANSWERS))
+
+    # Positive has no threshold, so every Positive answer is escalated
+    assert escalated_calls == [['Apple beats earnings estimates', 'Markets await jobs data']]
+
+
+def test_threshold_zero_never_escalates_and_metrics_reset():
+    cascade, escalated_calls = make_cascade(lambda text: 'Neutral', threshold=0.0)
+
+    cascade.classify_texts(list(CLASSIFIER_ANSWERS))
+    assert escalated_calls == [] and cascade.texts == 4 and cascade.escalation_rate == 0.0
+
+    cascade.reset_metrics()
+    assert cascade.texts == 0 and cascade.escalated == 0
+
+
+def test_corpus_labels_answer_repeated_headlines_row_by_row():
+    pytest.importorskip('pandas')
+    from benchmarks.cascade_benchmark import CorpusLabels
+
+    headlines = ['Whales buy AAPL', 'Fed holds rates steady', 'Whales buy AAPL', 'Whales buy AAPL']
+    labels = ['Neutral', 'Negative', 'Positive', 'Negative']
+
+    assert CorpusLabels(headlines, labels)(headlines) == labels
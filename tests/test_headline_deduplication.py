@@ -0,0 +1,55 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from processor.sentiment_features import aggregate_daily_sentiment
+from sentiment_analysis.headline_deduplication import HeadlineDeduplicator
+
+EARNINGS_BEAT = 'Apple shares rise sharply after quarterly earnings beat Wall Street expectations'
+EARNINGS_FLIP = 'Apple shares fall sharply after quarterly earnings beat Wall Street expectations'
+
+
+def test_exact_duplicates_share_one_cluster():
+    texts = [EARNINGS_BEAT, 'Fed holds rates steady', '  apple SHARES rise sharply after quarterly earnings beat '
+                                                          'Wall Street expectations', 'Fed holds rates steady']
+
+    representatives, inverse = HeadlineDeduplicator().cluster(texts)
+
+    assert list(representatives) == [0, 1]
+    assert list(inverse) == [0, 1, 0, 1]
+
+
+@pytest.mark.parametrize('threshold', [None, 0.9])
+def test_headlines_with_opposite_meaning_are_not_merged(threshold):
+    representatives, inverse = HeadlineDeduplicator(threshold=threshold).cluster([EARNINGS_BEAT, EARNINGS_FLIP])
+
+    assert list(representatives) == [0, 1]
+    assert list(inverse) == [0, 1]
+
+
+def test_near_duplicates_are_merged_only_when_opted_in():
+    texts = [EARNINGS_BEAT + ' - Reuters', EARNINGS_BEAT]
+
+    assert list(HeadlineDeduplicator().cluster(texts)[1]) == [0, 1]
+    assert list(HeadlineDeduplicator(threshold=0.8).cluster(texts)[1]) == [0, 0]
+
+
+def test_score_fans_results_out_and_keeps_daily_counts():
+    news = pd.DataFrame({
+        'timestamp': ['2022-07-05 14:00:00+00:00', '2022-07-05 15:00:00+00:00', '2022-07-06 14:00:00+00:00',
+                      '2022-07-06 15:00:00+00:00', '2022-07-07 14:00:00+00:00'],
+        'title': [EARNINGS_BEAT, EARNINGS_BEAT, EARNINGS_FLIP, 'Fed holds rates steady', EARNINGS_BEAT],
+    })
+    scored = []
+
+    def score_many(texts):
+        scored.extend(texts)
+        return ['Negative' if ' fall ' in text else 'Positive' if ' rise ' in text else 'Neutral' for text in texts]
+
+    news['sentiment'] = HeadlineDeduplicator().score(news['title'].tolist(), score_many)
+
+    assert scored == [EARNINGS_BEAT, EARNINGS_FLIP, 'Fed holds rates steady']
+    assert news['sentiment'].tolist() == ['Positive', 'Positive', 'Negative', 'Neutral', 'Positive']
+    daily = aggregate_daily_sentiment(news)
+    assert daily['count'].tolist() == [2, 2, 1]
+    assert daily['signal'].tolist() == [2, -1, 1]
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from processor.incremental_sentiment import IncrementalSentimentAggregator
+from processor.sentiment_features import FEATURE_COLUMNS, aggregate_daily_sentiment, encode_signals
+
+HOLIDAYS = ['2022-07-04', '2022-09-05']
+
+
+def random_headlines(count=400, symbols=('AAPL', 'MSFT'), seed=3):
+    """Headlines at random times over a summer, including weekends, holidays, after-close news and gaps."""
+    random_state = np.random.RandomState(seed)
+    start = pd.Timestamp('2022-06-01', tz='UTC').value
+    end = pd.Timestamp('2022-09-30', tz='UTC').value
+    timestamps = pd.to_datetime(np.sort(random_state.randint(start, end, count)), utc=True)
+    # Leave a news-free stretch longer than the rolling window
+    timestamps = timestamps[(timestamps < '2022-07-20') | (timestamps > '2022-08-25')]
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'symbol': random_state.choice(list(symbols), len(timestamps)),
+        'sentiment': random_state.choice(['Positive', 'Negative', 'Neutral'], len(timestamps)),
+    })
+
+
+def test_aggregate_matches_the_vectorized_daily_features():
+    headlines = random_headlines(symbols=('AAPL',))
+
+    incremental = IncrementalSentimentAggregator.aggregate(headlines, window=10, halflife=3, holidays=HOLIDAYS)
+    daily = aggregate_daily_sentiment(headlines, halflife=3, holidays=HOLIDAYS)
+
+    pd.testing.assert_frame_equal(incremental[list(FEATURE_COLUMNS)], daily, check_dtype=False)
+
+
+def test_aggregate_matches_the_vectorized_daily_features_per_symbol():
+    headlines = random_headlines()
+
+    incremental = IncrementalSentimentAggregator.aggregate(headlines, symbol_column='symbol', holidays=HOLIDAYS)
+    daily = aggregate_daily_sentiment(headlines, symbol_column='symbol', holidays=HOLIDAYS)
+
+    pd.testing.assert_frame_equal(incremental[list(FEATURE_COLUMNS)], daily.sort_index(), check_dtype=False)
+
+
+def test_rolling_features_sum_the_last_window_sessions():
+    headlines = random_headlines(symbols=('AAPL',))
+
+    incremental = IncrementalSentimentAggregator.aggregate(headlines, window=10, holidays=HOLIDAYS)
+
+    expected = incremental[['signal', 'count']].rolling(10, min_periods=1).sum()
+    assert incremental['rolling_signal'].tolist() == expected['signal'].tolist()
+    assert incremental['rolling_count'].tolist() == expected['count'].tolist()
+
+
+def test_zscore_standardizes_by_the_previous_sessions():
+    headlines = random_headlines(symbols=('AAPL',))
+
+    incremental = IncrementalSentimentAggregator.aggregate(headlines, window=10, holidays=HOLIDAYS)
+
+    previous = incremental['signal'].shift(1).rolling(10, min_periods=2)
+    zscore = ((incremental['signal'] - previous.mean()) / previous.std(ddof=0)).replace([np.inf, -np.inf], np.nan)
+    assert np.allclose(incremental['zscore'], zscore.fillna(0.0))
+
+
+def test_snapshot_restore_continues_like_an_uninterrupted_aggregator(tmp_path):
+    headlines = random_headlines()
+    signals = encode_signals(headlines['sentiment'])
+    updates = list(zip(headlines['symbol'], headlines['timestamp'], signals.tolist()))
+    half = len(updates) // 2
+
+    uninterrupted = IncrementalSentimentAggregator(window=5, holidays=HOLIDAYS)
+    expected = [uninterrupted.update(*update) for update in updates]
+
+    aggregator = IncrementalSentimentAggregator(window=5, holidays=HOLIDAYS)
+    for update in updates[:half]:
+        aggregator.update(*update)
+    restored = IncrementalSentimentAggregator.restore(json.loads(json.dumps(aggregator.snapshot())))
+    assert [restored.update(*update) for update in updates[half:]] == expected[half:]
+
+    path = str(tmp_path / 'state' / 'sentiment.json')
+    uninterrupted.save(path)
+    loaded = IncrementalSentimentAggregator.load(path)
+    assert loaded.snapshot() == uninterrupted.snapshot()
+    assert loaded.features('AAPL') == uninterrupted.features('AAPL')
+
+
+def test_headlines_of_a_closed_session_are_ignored():
+    aggregator = IncrementalSentimentAggregator(window=5)
+    aggregator.update('AAPL', '2022-07-05 14:00:00+00:00', 1)
+    aggregator.update('AAPL', '2022-07-06 14:00:00+00:00', -1)
+
+    features = aggregator.update('AAPL', '2022-07-05 15:00:00+00:00', 1)
+
+    assert features['signal'] == -1 and features['count'] == 1
+    assert features['rolling_signal'] == 0 and features['rolling_count'] == 2
@@ -0,0 +1,25 @@
+import math
+
+from llms.label_scoring import label_for_token, label_probabilities, most_likely_label
+
+
+def test_label_probabilities_normalize_the_label_scores():
+    probabilities = label_probabilities({'Positive': math.log(3.0), 'Negative': 0.0})
+
+    assert math.isclose(probabilities['Positive'], 0.75)
+    assert math.isclose(probabilities['Negative'], 0.25)
+    assert probabilities['Neutral'] == 0.0
+    assert most_likely_label(probabilities) == 'Positive'
+
+
+def test_an_answer_without_a_label_is_unknown_rather_than_positive():
+    probabilities = label_probabilities({})
+
+    assert probabilities is None
+    assert most_likely_label(probabilities) is None
+
+
+def test_label_for_token_reads_label_prefixes():
+    assert label_for_token(' Neg') == 'Negative'
+    assert label_for_token('neutral') == 'Neutral'
+    assert label_for_token(' The') is None
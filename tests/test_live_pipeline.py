@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from live.pipeline import LivePipeline
+from live.sources import ReplayBarSource, ReplayNewsSource
+from live.trading import PaperBroker, SentimentTrader
+
+
+class StubBackend:
+    """A sentiment backend returning the label stored on each replayed article."""
+
+    async def score(self, articles):
+        return [article['label'] for article in articles]
+
+
+def make_article(article_id, timestamp, label):
+    return {'id': article_id, 'timestamp': timestamp, 'title': 'Headline {}'.format(article_id), 'summary': '',
+            'symbols': ['AAPL'], 'label': label}
+
+
+def test_pipeline_feeds_closed_bars_to_the_trader_before_deciding():
+    bars = pd.DataFrame({'Close': [10, 11, 12, 13, 14, 15, 14.5, 16, 17, 18]},
+                        index=pd.bdate_range('2022-03-07', '2022-03-18'))
+    source = ReplayNewsSource([
+        # Before the close of Thursday 03-10: bars up to Wednesday are closed
+        make_article(1, '2022-03-10 15:00:00+00:00', 'Positive'),
+        make_article(2, '2022-03-15 15:00:00+00:00', 'Negative'),
+        # After the close of Thursday 03-17: the Thursday bar is closed
+        make_article(3, '2022-03-17 21:00:00+00:00', 'Positive'),
+    ])
+    broker = PaperBroker()
+    # The RSI thresholds always hold, so the moving averages and sentiment decide
+    trader = SentimentTrader(broker, {}, weight=1.0, fast_ma=2, slow_ma=3, rsi_period=2, rsi_oversold=101,
+                             rsi_overbought=-1)
+    pipeline = LivePipeline(source, StubBackend(), trader, bar_source=ReplayBarSource({'AAPL': bars}))
+
+    asyncio.run(pipeline.run())
+
+    assert [(order['article_id'], order['size'], order['price']) for order in pipeline.decisions] == [
+        (1, 8333, 12.0),
+        (2, -6666 - 8333, 15.0),
+        (3, 5882 + 6666, 17.0),
+    ]
+    assert broker.position('AAPL') == 5882
+    assert trader.closes['AAPL'][-1] == 17.0
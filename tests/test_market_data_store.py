@@ -0,0 +1,100 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('yfinance')
+
+from processor.market_data_store import MarketDataStore
+
+
+class RecordingDownloader:
+    """A local stand-in for Yahoo Finance that serves business-day prices and records its calls."""
+
+    def __init__(self, close=100.0):
+        self.close = close
+        self.calls = []
+
+    def __call__(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        index = pd.bdate_range(start_date, end_date, inclusive='left', name='Date')
+        return pd.DataFrame({'Close': self.close, 'Volume': 1000}, index=index)
+
+
+def make_store(tmp_path, close=100.0):
+    downloader = RecordingDownloader(close)
+    return MarketDataStore(str(tmp_path), downloader=downloader), downloader
+
+
+def test_first_load_downloads_and_records_the_range(tmp_path):
+    store, downloader = make_store(tmp_path)
+
+    data = store.load('AAPL', '2022-07-04', '2022-07-11')
+
+    assert downloader.calls == [('AAPL', '2022-07-04', '2022-07-11')]
+    assert store.coverage('AAPL') == (pd.Timestamp('2022-07-04'), pd.Timestamp('2022-07-11'))
+    assert list(data.index.strftime('%Y-%m-%d')) == ['2022-07-04', '2022-07-05', '2022-07-06', '2022-07-07',
+                                                      '2022-07-08']
+
+
+def test_stored_range_is_served_without_downloading(tmp_path):
+    store, downloader = make_store(tmp_path)
+    store.load('AAPL', '2022-07-04', '2022-07-15')
+
+    data = store.load('AAPL', '2022-07-06', '2022-07-08')
+
+    assert len(downloader.calls) == 1
+    assert list(data.index.strftime('%Y-%m-%d')) == ['2022-07-06', '2022-07-07']
+
+
+def test_only_the_missing_ranges_on_both_sides_are_downloaded(tmp_path):
+    store, downloader = make_store(tmp_path)
+    store.load('AAPL', '2022-07-11', '2022-07-15')
+
+    data = store.load('AAPL', '2022-07-04', '2022-07-20')
+
+    assert downloader.calls[1:] == [('AAPL', '2022-07-04', '2022-07-11'), ('AAPL', '2022-07-15', '2022-07-20')]
+    assert store.coverage('AAPL') == (pd.Timestamp('2022-07-04'), pd.Timestamp('2022-07-20'))
+    assert data.index.equals(pd.bdate_range('2022-07-04', '2022-07-19', name='Date'))
+    assert data.index.is_unique
+
+
+def test_disjoint_range_is_bridged_to_keep_coverage_contiguous(tmp_path):
+    store, downloader = make_store(tmp_path)
+    store.load('AAPL', '2022-07-04', '2022-07-08')
+
+    store.load('AAPL', '2022-07-18', '2022-07-20')
+
+    assert downloader.calls[1:] == [('AAPL', '2022-07-08', '2022-07-20')]
+    assert store.read('AAPL').index.equals(pd.bdate_range('2022-07-04', '2022-07-19', name='Date'))
+
+
+def test_bars_from_today_on_are_not_marked_as_covered(tmp_path):
+    store, downloader = make_store(tmp_path)
+    today = pd.Timestamp.today().normalize()
+    start = (today - pd.Timedelta(days=10)).strftime('%Y-%m-%d')
+    end = (today + pd.Timedelta(days=3)).strftime('%Y-%m-%d')
+
+    store.load('AAPL', start, end)
+    store.load('AAPL', start, end)
+
+    assert store.coverage('AAPL')[1] == today
+    assert downloader.calls[1] == ('AAPL', today.strftime('%Y-%m-%d'), end)
+
+
+def test_redownloaded_rows_replace_the_stored_ones(tmp_path):
+    store, _ = make_store(tmp_path)
+    store.load('AAPL', '2022-07-04', '2022-07-08')
+
+    store.append('AAPL', RecordingDownloader(close=50.0)('AAPL', '2022-07-06', '2022-07-12'), '2022-07-06',
+                 '2022-07-12')
+
+    data = store.read('AAPL')
+    assert store.coverage('AAPL') == (pd.Timestamp('2022-07-04'), pd.Timestamp('2022-07-12'))
+    assert data['Close'].tolist() == [100.0, 100.0, 50.0, 50.0, 50.0, 50.0]
+
+
+def test_fetch_missing_false_reads_only_the_store(tmp_path):
+    store, downloader = make_store(tmp_path)
+
+    assert store.load('AAPL', '2022-07-04', '2022-07-08', fetch_missing=False).empty
+    assert downloader.calls == []
+    assert store.coverage('AAPL') is None
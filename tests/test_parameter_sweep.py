@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+pytest.importorskip('backtrader')
+
+from runner.parameter_sweep import ParameterSweep
+
+MERGED_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'merged_df.csv')
+
+
+@pytest.mark.parametrize('engine', ['backtrader', 'vectorized'])
+def test_sweep_reports_a_sharpe_ratio_on_less_than_a_year_of_data(engine):
+    results = ParameterSweep(MERGED_DATA_PATH, processes=1, engine=engine).run([{}, {'fast_ma': 10, 'slow_ma': 30}])
+
+    assert all(result['sharpe_ratio'] is not None for result in results)
+
+
+def test_failed_candidate_is_recorded_and_the_sweep_goes_on(tmp_path):
+    results_path = str(tmp_path / 'results.jsonl')
+    sweep = ParameterSweep(MERGED_DATA_PATH, processes=1, results_path=results_path)
+
+    results = sweep.run([{'fast_ma': 'not-a-period'}, {}])
+
+    assert len(results) == 2
+    assert 'error' not in results[0] and results[0]['sharpe_ratio'] is not None
+    assert results[1]['params'] == {'fast_ma': 'not-a-period'} and 'error' in results[1]
+    with open(results_path) as file:
+        assert len(file.readlines()) == 2
@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('backtrader')
+
+from runner.backtest_results import METRIC_COLUMNS, ResultStore
+from runner.backtest_runner import BacktestRunner
+
+STRATEGY_PARAMS = {'fast_ma': 3, 'slow_ma': 8, 'rsi_period': 5, 'rsi_oversold': 100, 'rsi_overbought': 100}
+
+
+def trending_data(bars=120, seed=1, start='2021-01-04'):
+    """Prices alternating 20-bar up and down trends, with a sentiment signal following the trend."""
+    random_state = np.random.RandomState(seed)
+    rising = (np.arange(bars) // 20) % 2 == 0
+    close = 100 + np.cumsum(np.where(rising, 0.5, -0.5) + random_state.normal(0, 0.4, bars))
+    open_ = close + random_state.normal(0, 0.3, bars)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + 0.5,
+        'Low': np.minimum(open_, close) - 0.5,
+        'Close': close,
+        'Volume': 1000,
+        'signal': np.where(rising, 1, -1),
+    }, index=pd.bdate_range(start, periods=bars, name='date'))
+
+
+def universe():
+    # One symbol starts later, so the shards' equity curves have different dates
+    return {
+        'AAA': trending_data(seed=1),
+        'BBB': trending_data(seed=2),
+        'CCC': trending_data(seed=3),
+        'DDD': trending_data(bars=100, seed=4, start='2021-02-01'),
+    }
+
+
+def run(verbose=False, **kwargs):
+    # Each asset targets a fifth of the cash, so commissions and gaps never leave a shard short of cash
+    return BacktestRunner.run_portfolio_backtest(universe(), '2021-01-04', '2021-06-18', strategy_params=STRATEGY_PARAMS,
+                                                 weight=0.2, verbose=verbose, **kwargs)
+
+
+@pytest.mark.parametrize('shard_size, processes', [(2, 1), (1, 1), (1, 2)])
+def test_sharded_runs_match_a_single_shard(shard_size, processes):
+    single = run(shard_size=None, processes=1)
+
+    sharded = run(shard_size=shard_size, processes=processes)
+
+    assert single.metrics['total_trades'] > len(universe())
+    assert single.analyzers['assetpnl'].keys() == sharded.analyzers['assetpnl'].keys()
+    for symbol, asset in single.analyzers['assetpnl'].items():
+        assert sharded.analyzers['assetpnl'][symbol]['trades'] == asset['trades']
+        assert math.isclose(sharded.analyzers['assetpnl'][symbol]['pnlcomm'], asset['pnlcomm'], abs_tol=1e-6)
+    for column in METRIC_COLUMNS:
+        expected, actual = single.metrics[column], sharded.metrics[column]
+        assert (actual is None) if expected is None else math.isclose(actual, expected, rel_tol=1e-9), column
+    pd.testing.assert_frame_equal(sharded.frames['returns'], single.frames['returns'], check_freq=False)
+
+
+def test_portfolio_result_is_reported_and_stored(tmp_path, capsys):
+    pytest.importorskip('pyarrow')
+    store = ResultStore(str(tmp_path))
+
+    result = run(shard_size=2, processes=1, result_store=store, verbose=True)
+
+    report = capsys.readouterr().out
+    assert 'Portfolio Backtesting Report' in report and 'Stock Tickers: 4' in report
+    assert 'Per-Asset Results' in report
+    assert result.stock_ticker == 'AAA,BBB,CCC,DDD' and result.strategy == 'OptimizedStrategy'
+    assert result.metrics['sharpe_ratio'] is not None
+    runs = store.query()
+    assert runs['run_id'].tolist() == [result.run_id]
+    assert runs['total_trades'].tolist() == [result.metrics['total_trades']]
+    assert store.analyzers(result.run_id)['assetpnl'] == result.analyzers['assetpnl']
+    value = store.load_frame(result.run_id, 'value')['value']
+    assert math.isclose(value.iloc[-1], result.metrics['final_value'])
+    store.close()
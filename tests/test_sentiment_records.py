@@ -0,0 +1,130 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from sentiment_analysis.sentiment_records import SentimentRecordBuilder, SentimentRecords, SentimentRecordStore
+
+ARTICLES = [
+    ('AAPL', 1, '2022-07-05 14:00:00', 'Apple beats earnings estimates', 'Revenue rose 8%.', 'Positive', 0.9),
+    ('MSFT', 2, '2022-07-05 15:00:00', 'Microsoft cuts jobs', 'Layoffs hit sales.', 'Negative', 0.8),
+    ('AAPL', 3, '2022-07-06 14:00:00', 'Apple suppliers warn', 'Chip shortage – again.', 'Negative', 0.7),
+    ('MSFT', 4, '2022-07-07 14:00:00', 'Microsoft cloud grows', '', None, float('nan')),
+    ('AAPL', 5, '2022-07-08 14:00:00', 'Apple unveils a new iPhone', 'Pre-orders open Friday.', 'Neutral', 0.6),
+]
+
+
+def build(articles=ARTICLES):
+    builder = SentimentRecordBuilder()
+    for article in articles:
+        builder.append(*article)
+    return builder.build()
+
+
+def texts(records):
+    return [(records.title(index), records.summary(index)) for index in range(len(records))]
+
+
+def test_builder_orders_by_symbol_then_time():
+    records = build()
+
+    assert records.symbols == ('AAPL', 'MSFT')
+    assert records.ids.tolist() == [1, 3, 5, 2, 4]
+    assert texts(records)[1] == ('Apple suppliers warn', 'Chip shortage – again.')
+    assert list(records.relevant_texts())[0] == 'Revenue rose 8%.Apple beats earnings estimates'
+
+
+def test_between_slices_one_symbol_without_copying():
+    apple = build().for_symbol('AAPL')
+
+    week = apple.between('2022-07-06', '2022-07-08')
+
+    assert week.ids.tolist() == [3]
+    assert texts(week) == [('Apple suppliers warn', 'Chip shortage – again.')]
+    assert np.shares_memory(week.ids, apple.ids) and week.text is apple.text
+    assert len(apple.between('2022-07-09')) == 0
+    assert len(apple.between('2022-07-08', '2022-07-06')) == 0
+
+
+def test_between_slices_every_symbol_of_mixed_records():
+    records = build()
+
+    week = records.between('2022-07-05 14:30:00', '2022-07-08')
+
+    assert week.ids.tolist() == [3, 2, 4]
+    assert [week.symbols[code] for code in week.symbol_ids] == ['AAPL', 'MSFT', 'MSFT']
+    assert texts(week) == [texts(records)[index] for index in (1, 3, 4)]
+
+
+def test_take_copies_the_text_of_the_selected_articles():
+    records = build()
+
+    taken = records.take([4, 0, 1])
+
+    assert taken.ids.tolist() == [4, 1, 3]
+    assert texts(taken) == [texts(records)[index] for index in (4, 0, 1)]
+    assert taken.text_offsets[0] == 0 and taken.text_offsets[-1] == len(taken.text)
+    assert math.isnan(taken.scores[0]) and taken.labels.tolist() == [-1, 0, 1]
+    assert len(records.take([])) == 0
+
+
+def test_concat_merges_symbols_and_rebases_text():
+    first, second = build(ARTICLES[:2]), build(ARTICLES[2:])
+
+    # Slices keep offsets into their parent's blob, which concat has to rebase
+    records = SentimentRecords.concat([first.for_symbol('MSFT'), second.for_symbol('AAPL'), second.for_symbol('MSFT')])
+
+    assert records.symbols == ('AAPL', 'MSFT')
+    assert records.ids.tolist() == [2, 3, 5, 4]
+    assert records.symbol_ids.tolist() == [1, 0, 0, 1]
+    assert texts(records) == [texts(build())[index] for index in (3, 1, 2, 4)]
+    assert records.sorted().ids.tolist() == [3, 5, 2, 4]
+
+
+def test_store_round_trip(tmp_path):
+    store = SentimentRecordStore(str(tmp_path))
+    records = build()
+
+    store.append(records)
+
+    assert store.symbols() == ['AAPL', 'MSFT']
+    apple = store.read('aapl')
+    assert apple.ids.tolist() == [1, 3, 5]
+    assert texts(apple) == texts(records.for_symbol('AAPL'))
+    assert apple.to_frame()['sentiment'].tolist() == ['Positive', 'Negative', 'Neutral']
+    assert store.read('AAPL', '2022-07-06', '2022-07-08').ids.tolist() == [3]
+    assert len(store.read('TSLA')) == 0
+
+
+def test_store_appends_newer_articles_in_place(tmp_path):
+    store = SentimentRecordStore(str(tmp_path))
+    store.append(build(ARTICLES[:3]))
+    stored = store.read('AAPL')
+    ids_file = tmp_path / 'AAPL' / 'ids.npy'
+    inode = ids_file.stat().st_ino
+
+    store.append(build(ARTICLES[3:]))
+
+    assert ids_file.stat().st_ino == inode
+    assert store.read('AAPL').ids.tolist() == [1, 3, 5]
+    assert texts(store.read('AAPL')) == texts(build().for_symbol('AAPL'))
+    assert store.read('MSFT').ids.tolist() == [2, 4]
+    # Records read before the append are left as they were
+    assert stored.ids.tolist() == [1, 3]
+
+
+def test_store_replaces_rescored_and_older_articles(tmp_path):
+    store = SentimentRecordStore(str(tmp_path))
+    store.append(build(ARTICLES[2:]))
+    rescored = store.read('AAPL')
+    rescored = rescored.with_sentiment(['Positive'] * len(rescored), [0.5] * len(rescored))
+
+    store.append(SentimentRecords.concat([build(ARTICLES[:1]), rescored]))
+
+    apple = store.read('AAPL')
+    assert apple.ids.tolist() == [1, 3, 5]
+    assert apple.to_frame()['sentiment'].tolist() == ['Positive'] * 3
+    assert np.allclose(apple.scores, [0.9, 0.5, 0.5])
+    assert texts(apple) == texts(build().for_symbol('AAPL'))
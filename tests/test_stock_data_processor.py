@@ -0,0 +1,72 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('yfinance')
+
+from processor.stock_data_processor import StockDataProcessor
+
+
+class StubMarketDataStore:
+    """A local stand-in for MarketDataStore serving fixed daily prices."""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def load(self, symbol, start_date, end_date):
+        return self.prices.loc[start_date:end_date]
+
+
+def make_prices(sessions):
+    index = pd.DatetimeIndex(sessions, name='Date')
+    return pd.DataFrame({'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 1000}, index=index)
+
+
+def make_processor(tmp_path, sessions, headlines):
+    sentiment_path = tmp_path / 'sentiment.csv'
+    pd.DataFrame(headlines, columns=['timestamp', 'title', 'sentiment']).to_csv(sentiment_path, index=False)
+    return StockDataProcessor('AAPL', sessions[0], sessions[-1], str(sentiment_path),
+                              StubMarketDataStore(make_prices(sessions)))
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_holiday_news_rolls_to_the_next_trading_session(tmp_path, incremental):
+    # 2022-07-04 is a Monday and an NYSE holiday, so the stock data has no row for it
+    sessions = ['2022-06-30', '2022-07-01', '2022-07-05', '2022-07-06']
+    processor = make_processor(tmp_path, sessions, [
+        ('2022-07-04 14:00:00+00:00', 'Apple rallies on holiday trading abroad', 'Positive'),
+        ('2022-07-02 14:00:00+00:00', 'Weekend headline about Apple suppliers', 'Positive'),
+        ('2022-07-05 15:00:00+00:00', 'Apple shares slip at the open', 'Negative'),
+    ])
+
+    merged_df = processor.preprocess_sentiment_data(incremental=incremental)
+
+    assert merged_df['count'].sum() == 3
+    assert merged_df.loc['2022-07-05', 'count'] == 3
+    assert merged_df.loc['2022-07-05', 'signal'] == 1
+
+
+def test_explicit_holidays_are_used_as_given(tmp_path):
+    sessions = ['2022-06-30', '2022-07-01', '2022-07-05', '2022-07-06']
+    processor = make_processor(tmp_path, sessions, [
+        ('2022-07-04 14:00:00+00:00', 'Apple rallies on holiday trading abroad', 'Positive'),
+    ])
+
+    # Without the holiday, the headline is assigned to a day the stock data does not have
+    merged_df = processor.preprocess_sentiment_data(holidays=[])
+
+    assert merged_df['count'].sum() == 0
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_empty_sentiment_store_gives_no_sentiment(tmp_path, incremental):
+    from sentiment_analysis.sentiment_records import SentimentRecordStore
+
+    sessions = ['2022-07-05', '2022-07-06']
+    processor = StockDataProcessor('AAPL', sessions[0], sessions[-1], None, StubMarketDataStore(make_prices(sessions)),
+                                   sentiment_store=SentimentRecordStore(str(tmp_path / 'sentiment_store')))
+
+    merged_df = processor.preprocess_sentiment_data(incremental=incremental)
+
+    assert len(merged_df) == 2
+    assert merged_df['count'].tolist() == [0, 0]
+    assert merged_df['signal'].tolist() == [0, 0]
@@ -0,0 +1,43 @@
+import math
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('backtrader')
+
+from runner.vectorized_backtest import compare_with_backtrader
+
+MERGED_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'merged_df.csv')
+
+
+def trending_data(bars=250, seed=1):
+    """Prices alternating 20-bar up and down trends, with a sentiment signal following the trend."""
+    random_state = np.random.RandomState(seed)
+    rising = (np.arange(bars) // 20) % 2 == 0
+    close = 100 + np.cumsum(np.where(rising, 0.5, -0.5) + random_state.normal(0, 0.4, bars))
+    open_ = close + random_state.normal(0, 0.3, bars)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + 0.5,
+        'Low': np.minimum(open_, close) - 0.5,
+        'Close': close,
+        'Volume': 1000,
+        'signal': np.where(rising, 1, -1),
+    }, index=pd.bdate_range('2021-01-04', periods=bars, name='date'))
+
+
+@pytest.mark.parametrize('data, params', [
+    (MERGED_DATA_PATH, {'fast_ma': 5, 'slow_ma': 20, 'rsi_period': 7, 'rsi_oversold': 40, 'rsi_overbought': 60}),
+    # The RSI thresholds always allow buys and never force sells, so the trends drive round trips
+    (trending_data(), {'fast_ma': 3, 'slow_ma': 8, 'rsi_period': 5, 'rsi_oversold': 100, 'rsi_overbought': 100}),
+], ids=['sample', 'trending'])
+def test_vectorized_engine_matches_backtrader(data, params):
+    comparison = compare_with_backtrader(data, **params)
+
+    assert comparison['total_trades'][0] > 1
+    assert comparison['sharpe_ratio'][0] is not None
+    for metric in ('final_value', 'total_return', 'sharpe_ratio', 'max_drawdown', 'total_trades'):
+        expected, actual = comparison[metric]
+        assert math.isclose(expected, actual, rel_tol=1e-6, abs_tol=1e-6), metric
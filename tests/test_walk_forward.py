@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from runner.walk_forward import WalkForward
+
+CANDIDATES = [
+    {'fast_ma': 3, 'slow_ma': 8, 'rsi_period': 5, 'rsi_oversold': 100, 'rsi_overbought': 100},
+    {'fast_ma': 5, 'slow_ma': 15, 'rsi_period': 5, 'rsi_oversold': 100, 'rsi_overbought': 100},
+]
+
+
+def trending_data(bars=120, seed=1):
+    """Prices alternating 20-bar up and down trends, with a sentiment signal following the trend."""
+    random_state = np.random.RandomState(seed)
+    rising = (np.arange(bars) // 20) % 2 == 0
+    close = 100 + np.cumsum(np.where(rising, 0.5, -0.5) + random_state.normal(0, 0.4, bars))
+    open_ = close + random_state.normal(0, 0.3, bars)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + 0.5,
+        'Low': np.minimum(open_, close) - 0.5,
+        'Close': close,
+        'Volume': 1000,
+        'signal': np.where(rising, 1, -1),
+    }, index=pd.bdate_range('2021-01-04', periods=bars, name='date'))
+
+
+def window_result(dates, values):
+    return {'value': pd.Series(values, index=pd.DatetimeIndex(dates), dtype=np.float64)}
+
+
+def test_windows_tile_the_history_with_a_shorter_last_test_window():
+    walk_forward = WalkForward(trending_data(bars=23), train_size=10, test_size=5)
+
+    assert walk_forward.windows() == [(0, 10, 15), (5, 15, 20), (10, 20, 23)]
+
+
+def test_windows_roll_by_step_and_need_a_train_window():
+    assert WalkForward(trending_data(bars=16), train_size=10, test_size=4, step=2).windows() == [
+        (0, 10, 14), (2, 12, 16), (4, 14, 16)]
+    assert WalkForward(trending_data(bars=10), train_size=10, test_size=4).windows() == []
+    with pytest.raises(ValueError):
+        WalkForward(trending_data(bars=10), train_size=10, test_size=4).run(CANDIDATES)
+
+
+def test_chain_equity_compounds_the_growth_of_each_test_window():
+    walk_forward = WalkForward(trending_data(bars=30), cash=100)
+
+    equity = walk_forward.chain_equity([
+        window_result(['2021-02-01', '2021-02-02'], [110, 120]),
+        window_result(['2021-02-03', '2021-02-04'], [90, 105]),
+    ])
+
+    assert equity.index.strftime('%Y-%m-%d').tolist() == ['2021-02-01', '2021-02-02', '2021-02-03', '2021-02-04']
+    assert np.allclose(equity.to_numpy(), [110, 120, 108, 126])
+
+
+def test_chain_equity_takes_overlapping_bars_from_the_earliest_window():
+    walk_forward = WalkForward(trending_data(bars=30), cash=100)
+
+    equity = walk_forward.chain_equity([
+        window_result(['2021-02-01', '2021-02-02'], [110, 120]),
+        # The second window continues from its own value on the last bar already chained
+        window_result(['2021-02-02', '2021-02-03', '2021-02-04'], [80, 100, 60]),
+        window_result(['2021-02-03'], [200]),
+    ])
+
+    assert equity.index.strftime('%Y-%m-%d').tolist() == ['2021-02-01', '2021-02-02', '2021-02-03', '2021-02-04']
+    assert np.allclose(equity.to_numpy(), [110, 120, 150, 90])
+
+
+def test_run_chains_the_out_of_sample_bars_of_every_window():
+    data = trending_data()
+    walk_forward = WalkForward(data, train_size=60, test_size=20, processes=1)
+
+    report = walk_forward.run(CANDIDATES)
+
+    assert [result['window'] for result in report['windows']] == [(0, 60, 80), (20, 80, 100), (40, 100, 120)]
+    assert report['equity'].index.equals(data.index[60:])
+    for result in report['windows']:
+        assert result['params'] in CANDIDATES
+        train_start, train_end, test_end = result['window']
+        assert result['value'].index.equals(data.index[train_end:test_end])
+
+    # Each window starts from the cash, so the chained curve is the product of the windows' growth
+    growth = np.prod([result['value'].iloc[-1] / walk_forward.cash for result in report['windows']])
+    assert report['equity'].iloc[-1] == pytest.approx(walk_forward.cash * growth)
+
+
+def test_worker_processes_match_the_in_process_run(tmp_path):
+    data = trending_data()
+    in_process = WalkForward(data, train_size=60, test_size=20, processes=1).run(CANDIDATES)
+
+    parallel = WalkForward(data, train_size=60, test_size=20, processes=2, directory=str(tmp_path)).run(CANDIDATES)
+
+    assert [result['params'] for result in parallel['windows']] == [result['params'] for result in in_process['windows']]
+    pd.testing.assert_series_equal(parallel['equity'], in_process['equity'])